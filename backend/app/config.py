@@ -20,12 +20,22 @@ else:
     BASE_DIR = Path(__file__).resolve().parent.parent
     APP_DATA_DIR = BASE_DIR
 
+# Override the data directory (tests, portable installs)
+if os.getenv('MYLIFE_DATA_DIR'):
+    APP_DATA_DIR = Path(os.getenv('MYLIFE_DATA_DIR'))
+
 # Create necessary directories
 APP_DATA_DIR.mkdir(parents=True, exist_ok=True)
 
 # Vault directories
 VAULT_DIR = APP_DATA_DIR / 'vault'
 VAULT_DB = VAULT_DIR / 'vault.enc'
+VAULT_SEGMENTS_DIR = VAULT_DIR / 'segments'
+
+# Encrypted checkpoints of the unlocked runtime DB (every N minutes, or after N commits)
+VAULT_CHECKPOINT_MINUTES = int(os.getenv('MYLIFE_CHECKPOINT_MINUTES', '5'))
+VAULT_CHECKPOINT_WRITES = int(os.getenv('MYLIFE_CHECKPOINT_WRITES', '200'))
+
 SALT_FILE = VAULT_DIR / 'salt.bin'
 ENCRYPTED_PHOTOS_DIR = VAULT_DIR / 'photos'
 RUNTIME_DIR = APP_DATA_DIR / 'runtime'
@@ -50,3 +60,31 @@ os.environ['SENTENCE_TRANSFORMERS_HOME'] = str(APP_DATA_DIR / 'models')
 # API Configuration
 API_HOST = "127.0.0.1"
 API_PORT = 8000
+
+# Response compression (gzip for responses above the minimum size, in bytes)
+GZIP_MINIMUM_SIZE = int(os.getenv('MYLIFE_GZIP_MIN_SIZE', '1024'))
+GZIP_COMPRESS_LEVEL = int(os.getenv('MYLIFE_GZIP_LEVEL', '6'))
+
+# Serialized report/recap payloads kept precompressed in memory
+PAYLOAD_CACHE_ENTRIES = 64
+
+# Decrypted photos kept in memory while the vault is unlocked (bigger photos are streamed)
+PHOTO_CACHE_BYTES = int(os.getenv('MYLIFE_PHOTO_CACHE_MB', '64')) * 1024 * 1024
+PHOTO_CACHE_MAX_ENTRY_BYTES = 8 * 1024 * 1024
+
+# Encrypted WebP thumbnails (longest side, px), made at upload and by a backfill job
+THUMBNAIL_SIZES = (128, 512, 1024)
+THUMBNAIL_QUALITY = 80
+THUMBNAIL_WORKERS = 2
+
+# Orphaned photo cleanup (daily job). Unreferenced photos younger than the grace period
+# are kept (uploaded, not yet attached); quarantine moves orphans to photos/quarantine
+PHOTO_GC_GRACE_HOURS = 24
+PHOTO_GC_BATCH_SIZE = 200
+PHOTO_GC_QUARANTINE = os.getenv('MYLIFE_PHOTO_GC_QUARANTINE', '0') == '1'
+
+# Files of one upload request encrypted in parallel
+UPLOAD_WORKERS = int(os.getenv('MYLIFE_UPLOAD_WORKERS', str(os.cpu_count() or 2)))
+
+# Async DB sessions open at once (hot read endpoints); further requests wait for a slot
+DB_CONCURRENCY = int(os.getenv('MYLIFE_DB_CONCURRENCY', '8'))
@@ -1,10 +1,16 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import extract, desc
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import desc, func, case, literal_column, or_, select, type_coerce, String
+from pydantic import ValidationError
 from datetime import datetime
+import base64
 import json
 import logging
-from . import models, schemas
+from . import models, schemas, time_keys
 from .services.vector_store import vector_store
+from .services.version_service import version_service
+from .services.memory_cache import memory_cache
+from .services.settings_cache import settings_cache
 
 logger = logging.getLogger(__name__)
 
@@ -12,18 +18,165 @@ logger = logging.getLogger(__name__)
 def get_memory(db: Session, memory_id: int):
     return db.query(models.Memory).filter(models.Memory.id == memory_id).first()
 
-def get_memories(db: Session, skip: int = 0, limit: int = 100, month: str = None):
-    query = db.query(models.Memory)
+# Column projections for lightweight list views (?fields= / ?view=summary)
+PREVIEW_LENGTH = 200
+MEMORY_COLUMNS = {
+    'id': models.Memory.id,
+    'title': models.Memory.title,
+    'note': models.Memory.note,
+    'preview': func.substr(models.Memory.note, 1, PREVIEW_LENGTH),
+    'tags': models.Memory.tags,
+    'mood': models.Memory.mood,
+    'photos': models.Memory.photos,
+    'photo_count': case(
+        (func.json_valid(models.Memory.photos), func.json_array_length(models.Memory.photos)),
+        else_=0
+    ),
+    'timestamp': models.Memory.timestamp,
+    'occurred_at': models.Memory.occurred_at,
+    'created_at': models.Memory.created_at,
+    'updated_at': models.Memory.updated_at,
+}
+SUMMARY_FIELDS = ('id', 'title', 'mood', 'tags', 'created_at', 'occurred_at', 'preview', 'photo_count')
+# Same shape as MemoryRead, for paths that skip the ORM (streaming)
+FULL_FIELDS = ('id', 'title', 'note', 'tags', 'mood', 'photos', 'created_at', 'updated_at')
+
+def parse_fields(fields: str = None, view: str = "full"):
+    """Resolve ?fields=/?view= to a tuple of projected columns (None = full rows)"""
+    if fields:
+        names = tuple(dict.fromkeys(f.strip() for f in fields.split(",") if f.strip()))
+        unknown = [f for f in names if f not in MEMORY_COLUMNS]
+        if unknown:
+            raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+        return names or None
+    if view == "summary":
+        return SUMMARY_FIELDS
+    return None
+
+def project_row(row, fields) -> dict:
+    """Projected row -> JSON-ready dict, skipping ORM objects and Pydantic"""
+    item = {}
+    for name in fields:
+        value = row._mapping[name]
+        if name == 'photos':
+            try:
+                value = json.loads(value) if value else []
+            except ValueError:
+                value = []
+        elif isinstance(value, datetime):
+            value = value.isoformat()
+        item[name] = value
+    return item
+
+def encode_cursor(created_at_raw: str, memory_id: int) -> str:
+    """Opaque keyset cursor for (created_at, id)"""
+    payload = json.dumps([created_at_raw, memory_id]).encode()
+    return base64.urlsafe_b64encode(payload).decode().rstrip("=")
+
+def decode_cursor(cursor: str):
+    """Inverse of encode_cursor; raises ValueError on a malformed cursor"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at_raw, memory_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except Exception:
+        raise ValueError("Invalid cursor")
+    if not isinstance(created_at_raw, str) or not isinstance(memory_id, int):
+        raise ValueError("Invalid cursor")
+    return created_at_raw, memory_id
+
+def _memories_query(fields: tuple = None, month: str = None, cursor: str = None, skip: int = 0):
+    """Newest-first memories statement shared by pages and streams, sync or async (None for a bad month)"""
+    # Compare against the stored text so CURRENT_TIMESTAMP values (no fraction)
+    # and Python-written values (with microseconds) order consistently; NULL reads
+    # as '' so those rows sort last and stay reachable. Must match the index expression.
+    created_key = func.coalesce(type_coerce(models.Memory.created_at, String), literal_column("''"), type_=String)
+    entities = [models.Memory] if fields is None else [MEMORY_COLUMNS[f].label(f) for f in fields]
+    query = select(*entities, created_key.label('cursor_created_at'), models.Memory.id.label('cursor_id'))
     
     if month:
         try:
-            target_date = datetime.strptime(month, "%Y-%m")
-            query = query.filter(extract('year', models.Memory.created_at) == target_date.year)
-            query = query.filter(extract('month', models.Memory.created_at) == target_date.month)
+            query = query.where(models.Memory.month_key == time_keys.month_key(month))
         except ValueError:
-            return []
+            return None
+
+    query = query.order_by(desc(created_key), desc(models.Memory.id))
+
+    if cursor:
+        created_at_raw, memory_id = decode_cursor(cursor)
+        # Spelled out rather than a row value so SQLite can seek the index
+        query = query.where(
+            created_key <= created_at_raw,
+            or_(created_key < created_at_raw, models.Memory.id < memory_id)
+        )
+    elif skip:
+        query = query.offset(skip)
+
+    return query
+
+def _memories_page(rows, limit: int, fields: tuple):
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].cursor_created_at, rows[-1].cursor_id)
+
+    if fields is None:
+        return [row[0] for row in rows], next_cursor
+    return [project_row(row, fields) for row in rows], next_cursor
+
+def get_memories_page(
+    db: Session,
+    limit: int = 100,
+    month: str = None,
+    cursor: str = None,
+    skip: int = 0,
+    fields: tuple = None
+):
+    """Newest-first page of memories plus the cursor for the next page (None at the end).
+
+    Uses keyset pagination on (created_at, id) when a cursor is given, so deep
+    pages cost the same as the first one; `skip` is kept for old clients.
+    With `fields`, only those columns are selected and plain dicts are returned.
+    """
+    query = _memories_query(fields, month, cursor, skip)
+    if query is None:
+        return [], None
+    return _memories_page(db.execute(query.limit(limit + 1)).all(), limit, fields)
 
-    return query.order_by(desc(models.Memory.created_at)).offset(skip).limit(limit).all()
+async def get_memories_page_async(
+    session: AsyncSession,
+    limit: int = 100,
+    month: str = None,
+    cursor: str = None,
+    skip: int = 0,
+    fields: tuple = None
+):
+    """get_memories_page on an AsyncSession"""
+    query = _memories_query(fields, month, cursor, skip)
+    if query is None:
+        return [], None
+    return _memories_page((await session.execute(query.limit(limit + 1))).all(), limit, fields)
+
+def iter_memories(
+    db: Session,
+    fields: tuple = FULL_FIELDS,
+    month: str = None,
+    cursor: str = None,
+    limit: int = None,
+    skip: int = 0,
+    batch_size: int = 500
+):
+    """Yield memories as plain dicts, fetching batch_size rows at a time"""
+    query = _memories_query(fields, month, cursor, skip)
+    if query is None:
+        return
+    if limit is not None:
+        query = query.limit(limit)
+
+    for row in db.execute(query.execution_options(yield_per=batch_size)):
+        yield project_row(row, fields)
+
+def get_memories(db: Session, skip: int = 0, limit: int = 100, month: str = None):
+    return get_memories_page(db, limit=limit, month=month, skip=skip)[0]
 
 def create_memory(db: Session, memory: schemas.MemoryCreate):
     data = memory.model_dump()
@@ -81,8 +234,195 @@ def delete_memory(db: Session, memory_id: int):
             
     return db_memory
 
+def _memories_by_ids_query(chunk, fields: tuple = None):
+    if fields is None:
+        return select(models.Memory).where(models.Memory.id.in_(chunk))
+    return select(
+        *[MEMORY_COLUMNS[f].label(f) for f in fields],
+        models.Memory.id.label('row_id')
+    ).where(models.Memory.id.in_(chunk))
+
+def _collect_by_id(found: dict, result, fields: tuple = None):
+    if fields is None:
+        for memory in result.scalars():
+            found[memory.id] = memory
+    else:
+        for row in result:
+            found[row.row_id] = project_row(row, fields)
+
+def get_memories_by_ids(db: Session, memory_ids, fields: tuple = None, chunk_size: int = 500):
+    """Load memories by id in input order (missing ids are skipped).
+
+    One IN query per chunk of ids. With `fields`, only those columns are
+    selected and plain dicts are returned.
+    """
+    ids = list(dict.fromkeys(memory_ids))
+    found = {}
+    for start in range(0, len(ids), chunk_size):
+        _collect_by_id(found, db.execute(_memories_by_ids_query(ids[start:start + chunk_size], fields)), fields)
+    return [found[mid] for mid in ids if mid in found]
+
+async def get_memories_by_ids_async(session: AsyncSession, memory_ids, fields: tuple = None, chunk_size: int = 500):
+    """get_memories_by_ids on an AsyncSession"""
+    ids = list(dict.fromkeys(memory_ids))
+    found = {}
+    for start in range(0, len(ids), chunk_size):
+        result = await session.execute(_memories_by_ids_query(ids[start:start + chunk_size], fields))
+        _collect_by_id(found, result, fields)
+    return [found[mid] for mid in ids if mid in found]
+
+def serialize_memory(memory: models.Memory) -> dict:
+    """MemoryRead-shaped JSON dict for a Memory row"""
+    return schemas.MemoryRead.model_validate(memory).model_dump(mode="json")
+
+def _cache_payloads(memories, found: dict, token):
+    for memory in memories:
+        payload = serialize_memory(memory)
+        memory_cache.put(memory.id, memory.updated_at, payload, token)
+        found[memory.id] = payload
+
+def _memory_versions_query(chunk):
+    return select(models.Memory.id, models.Memory.updated_at).where(models.Memory.id.in_(chunk))
+
+def get_memory_payloads(db: Session, memory_ids, chunk_size: int = 500) -> list:
+    """Serialized memories in input order, read through the process-wide row cache.
+
+    Cached rows are only used while their updated_at still matches the DB
+    (one id/updated_at query per chunk), so writes that bypass the session
+    hooks can't serve stale payloads.
+    """
+    ids = list(dict.fromkeys(memory_ids))
+    token = memory_cache.token()
+    versions = {}
+    for start in range(0, len(ids), chunk_size):
+        versions.update(db.execute(_memory_versions_query(ids[start:start + chunk_size])).all())
+    found = memory_cache.get_many(versions)
+
+    missing = [mid for mid in ids if mid in versions and mid not in found]
+    if missing:
+        _cache_payloads(get_memories_by_ids(db, missing), found, token)
+
+    return [found[mid] for mid in ids if mid in found]
+
+async def get_memory_payloads_async(session: AsyncSession, memory_ids, chunk_size: int = 500) -> list:
+    """get_memory_payloads on an AsyncSession"""
+    ids = list(dict.fromkeys(memory_ids))
+    token = memory_cache.token()
+    versions = {}
+    for start in range(0, len(ids), chunk_size):
+        result = await session.execute(_memory_versions_query(ids[start:start + chunk_size]))
+        versions.update(result.all())
+    found = memory_cache.get_many(versions)
+
+    missing = [mid for mid in ids if mid in versions and mid not in found]
+    if missing:
+        _cache_payloads(await get_memories_by_ids_async(session, missing), found, token)
+
+    return [found[mid] for mid in ids if mid in found]
+
+def bulk_write_memories(db: Session, operations: list):
+    """Apply many create/update/delete operations in a single transaction.
+
+    Items are validated up front; invalid ones are reported and skipped, and so
+    is any later update/delete of an id the batch already touches (one op per
+    memory, so each result is that memory's final state). All valid changes
+    are committed together, version snapshots are staged in the
+    same transaction, and the vector index is updated with one batched encode.
+    Returns one result dict per operation, in input order.
+    """
+    results = [None] * len(operations)
+
+    def fail(index, op, message, memory_id=None, details=None):
+        error = {"message": message}
+        if details is not None:
+            error["details"] = details
+        results[index] = {"index": index, "op": op, "success": False, "id": memory_id, "error": error}
+
+    # 1. Validate everything in one pass
+    parsed = []
+    first_use = {}  # memory id -> index of the op that owns it
+    for index, item in enumerate(operations):
+        try:
+            if item.op == "create":
+                parsed.append((index, item.op, None, schemas.MemoryCreate.model_validate(item.data or {})))
+            elif item.id is None:
+                fail(index, item.op, f"id is required for {item.op}")
+            elif item.id in first_use:
+                fail(index, item.op, f"Duplicate id in batch (already used by operation {first_use[item.id]})", item.id)
+            elif item.op == "update":
+                parsed.append((index, item.op, item.id, schemas.MemoryUpdate.model_validate(item.data or {})))
+            else:
+                parsed.append((index, item.op, item.id, None))
+        except ValidationError as e:
+            fail(index, item.op, "Validation failed", item.id, e.errors(include_url=False, include_context=False))
+        if item.op != "create" and parsed and parsed[-1][0] == index:
+            first_use[item.id] = index
+
+    # 2. Load every update/delete target with batched IN queries
+    existing = {m.id: m for m in get_memories_by_ids(db, {mid for _, _, mid, _ in parsed if mid is not None})}
+
+    # 3. Stage the changes in input order
+    created, updated, deleted = [], [], []
+    now = datetime.utcnow()
+    for index, op, memory_id, payload in parsed:
+        if op == "create":
+            data = payload.model_dump()
+            data["photos"] = json.dumps(data["photos"])
+            db_memory = models.Memory(**data)
+            db.add(db_memory)
+            created.append((index, db_memory))
+            continue
+
+        db_memory = existing.get(memory_id)
+        if db_memory is None:
+            fail(index, op, "Memory not found", memory_id)
+            continue
+
+        if op == "update":
+            update_data = payload.model_dump(exclude_unset=True)
+            if "photos" in update_data:
+                update_data["photos"] = json.dumps(update_data["photos"])
+            for key, value in update_data.items():
+                setattr(db_memory, key, value)
+            db_memory.updated_at = now
+            updated.append((index, db_memory))
+        else:
+            db.delete(db_memory)
+            deleted.append((index, memory_id))
+
+    # 4. One flush + commit for the whole batch
+    try:
+        db.flush()
+        version_service.add_versions(db, [m for _, m in created], "created")
+        version_service.add_versions(db, [m for _, m in updated], "updated")
+        written = [(index, op, m.id) for op, group in (("create", created), ("update", updated)) for index, m in group]
+        db.commit()
+    except Exception as e:
+        logger.error(f"Bulk write failed, rolled back: {e}")
+        db.rollback()
+        for index, op, memory_id, _ in parsed:
+            if results[index] is None:
+                fail(index, op, "Transaction rolled back", memory_id, str(e))
+        return results
+
+    for index, op, memory_id in written:
+        results[index] = {"index": index, "op": op, "success": True, "id": memory_id, "error": None}
+    for index, memory_id in deleted:
+        results[index] = {"index": index, "op": "delete", "success": True, "id": memory_id, "error": None}
+
+    # 5. Batched side effects (reload written rows with IN queries, then one encode)
+    try:
+        live_ids = {memory_id for _, _, memory_id in written}
+        vector_store.add_or_update_many(get_memories_by_ids(db, live_ids))
+        vector_store.remove_many([memory_id for _, memory_id in deleted])
+    except Exception as e:
+        logger.error(f"Error updating vector store: {e}")
+
+    return results
+
 # Settings
-def get_settings(db: Session):
+def get_settings_row(db: Session) -> models.AppSettings:
+    """The writable AppSettings row, created on first use"""
     settings = db.query(models.AppSettings).filter(models.AppSettings.id == 1).first()
     if not settings:
         settings = models.AppSettings(id=1)
@@ -91,11 +431,16 @@ def get_settings(db: Session):
         db.refresh(settings)
     return settings
 
-def update_settings(db: Session, settings_update: schemas.AppSettingsUpdate):
-    settings = get_settings(db)
+def get_settings(db: Session) -> schemas.AppSettingsRead:
+    """Read-only settings snapshot; only hits the DB after a settings write"""
+    return settings_cache.get(db, lambda s: schemas.AppSettingsRead.model_validate(get_settings_row(s)))
+
+def update_settings(db: Session, settings_update: schemas.AppSettingsUpdate) -> schemas.AppSettingsRead:
+    settings = get_settings_row(db)
     update_data = settings_update.model_dump(exclude_unset=True)
     for key, value in update_data.items():
         setattr(settings, key, value)
     db.commit()
     db.refresh(settings)
-    return settings
+    # The commit dropped the cached snapshot; prime it with the new row
+    return get_settings(db)
@@ -1,7 +1,11 @@
 from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
 from pathlib import Path
+from app.config import DB_CONCURRENCY
+import asyncio
 import logging
+import sqlite3
 
 logger = logging.getLogger(__name__)
 
@@ -11,6 +15,16 @@ Base = declarative_base()
 _engine = None
 _SessionLocal = None
 
+# aiosqlite engine for async handlers; DB_CONCURRENCY sessions at a time
+_async_engine = None
+_AsyncSessionLocal = None
+_db_slots = asyncio.Semaphore(DB_CONCURRENCY)
+
+# Online backup: pages copied per step (writers get the database between steps), and how
+# many times other connections' writes may restart the copy before one blocking pass
+BACKUP_PAGES_PER_STEP = 1024
+BACKUP_MAX_RESTARTS = 3
+
 
 def get_database_url():
     """Get database URL - uses persistent database file (vault features disabled)"""
@@ -43,7 +57,8 @@ def migrate_database_schema(engine):
             'is_deleted': "ALTER TABLE memories ADD COLUMN is_deleted BOOLEAN DEFAULT 0",
             'deleted_at': "ALTER TABLE memories ADD COLUMN deleted_at TEXT",
             'updated_at': "ALTER TABLE memories ADD COLUMN updated_at DATETIME",
-            'created_at': "ALTER TABLE memories ADD COLUMN created_at DATETIME DEFAULT CURRENT_TIMESTAMP"
+            'created_at': "ALTER TABLE memories ADD COLUMN created_at DATETIME DEFAULT CURRENT_TIMESTAMP",
+            'occurred_at': "ALTER TABLE memories ADD COLUMN occurred_at INTEGER"
         }
         
         # Add missing columns
@@ -54,6 +69,16 @@ def migrate_database_schema(engine):
                     conn.execute(text(alter_sql))
                     conn.commit()
         
+        migrate_time_keys(engine, existing_columns)
+        
+        # Keyset pagination index for the timeline
+        with engine.connect() as conn:
+            conn.execute(text("CREATE INDEX IF NOT EXISTS ix_memories_created_at_id ON memories (created_at, id)"))
+            conn.execute(text(
+                "CREATE INDEX IF NOT EXISTS ix_memories_created_key_id ON memories (coalesce(created_at, ''), id)"
+            ))
+            conn.commit()
+        
         logger.info("Database schema migration completed successfully")
         
     except Exception as e:
@@ -61,6 +86,36 @@ def migrate_database_schema(engine):
         # Don't raise - allow app to continue
 
 
+def migrate_time_keys(engine, existing_columns):
+    """Backfill occurred_at and add the generated month_key column + indexes"""
+    from app.time_keys import MONTH_KEY_SQL
+    from app.services.memory_cache import memory_cache
+    
+    with engine.connect() as conn:
+        # timestamp wins when it parses, otherwise fall back to created_at
+        conn.execute(text("""
+            UPDATE memories SET occurred_at = COALESCE(
+                CAST(strftime('%s', timestamp) AS INTEGER),
+                CAST(strftime('%s', created_at) AS INTEGER),
+                CAST(strftime('%s', 'now') AS INTEGER)
+            )
+            WHERE occurred_at IS NULL
+        """))
+        
+        if 'month_key' not in existing_columns:
+            logger.info("Adding generated column: month_key")
+            conn.execute(text(
+                f"ALTER TABLE memories ADD COLUMN month_key INTEGER GENERATED ALWAYS AS ({MONTH_KEY_SQL}) VIRTUAL"
+            ))
+        
+        conn.execute(text("CREATE INDEX IF NOT EXISTS ix_memories_occurred_at ON memories (occurred_at)"))
+        conn.execute(text("CREATE INDEX IF NOT EXISTS ix_memories_month_key ON memories (month_key)"))
+        conn.commit()
+    
+    # Raw SQL skips the session hooks: drop any payloads cached before the backfill
+    memory_cache.clear()
+
+
 def init_database():
     """Initialize database engine"""
     global _engine, _SessionLocal
@@ -96,6 +151,70 @@ def get_session_local():
     return _SessionLocal
 
 
+def get_async_session_local():
+    """Get the AsyncSession factory (same database file as SessionLocal)"""
+    global _async_engine, _AsyncSessionLocal
+    if _AsyncSessionLocal is None:
+        _async_engine = create_async_engine(get_database_url().replace("sqlite://", "sqlite+aiosqlite://", 1))
+        _AsyncSessionLocal = async_sessionmaker(_async_engine, autoflush=False, expire_on_commit=False)
+    return _AsyncSessionLocal
+
+
+def get_database_path() -> str:
+    """File of the live database"""
+    return get_engine().url.database
+
+
+class _BackupRestarted(Exception):
+    pass
+
+
+def backup_database(source_path, target_path, pages: int = BACKUP_PAGES_PER_STEP):
+    """Consistent copy of a (possibly live) SQLite database with the online backup API.
+
+    Copies in steps so writers aren't blocked; a write from another connection makes
+    SQLite restart the copy, so after a few restarts the rest is done in one step.
+    """
+    restarts = 0
+    last_remaining = None
+    
+    def progress(status, remaining, total):
+        nonlocal restarts, last_remaining
+        if last_remaining is not None and remaining > last_remaining:
+            restarts += 1
+            if restarts > BACKUP_MAX_RESTARTS:
+                raise _BackupRestarted()
+        last_remaining = remaining
+    
+    source = sqlite3.connect(str(source_path))
+    target = sqlite3.connect(str(target_path))
+    try:
+        try:
+            source.backup(target, pages=pages, progress=progress, sleep=0.005)
+        except _BackupRestarted:
+            logger.info(f"Backup of {source_path} kept restarting under writes; finishing in one step")
+            source.backup(target, pages=-1)
+    finally:
+        target.close()
+        source.close()
+
+
 # Compatibility
 engine = get_engine()
 SessionLocal = get_session_local()
+
+
+def get_db():
+    """Request-scoped session (FastAPI dependency shared by every router)"""
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+async def get_async_db():
+    """Request-scoped AsyncSession; requests beyond DB_CONCURRENCY wait here for a slot"""
+    async with _db_slots:
+        async with get_async_session_local()() as session:
+            yield session
@@ -1,18 +1,25 @@
 from fastapi import FastAPI, Request, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 from fastapi.responses import JSONResponse
-from .routers import memories, recap, settings, media, ai, backup, system, vault, sync, journal, import_data, cleanup, search, trash, versions, goals, ai_coach, reports, diagnostics
-from .database import Base
-from .config import APP_DATA_DIR
+from .routers import memories, recap, settings, media, ai, backup, system, vault, sync, journal, import_data, cleanup, search, trash, versions, goals, ai_coach, reports, diagnostics, events
+from .database import Base, SessionLocal
+from .responses import FastJSONResponse, GZIP_EXCLUDED_CONTENT_TYPES
+from .config import APP_DATA_DIR, GZIP_MINIMUM_SIZE, GZIP_COMPRESS_LEVEL
 from . import models
 from .services.vault_service import get_vault_service
+from .services.stats_service import daily_stats_service  # registers daily_stats write hooks
+from .services.generation_service import generation_service  # registers generation bumps
+from .services import change_feed  # registers memory change events
+from .services import checkpoint_service  # registers the checkpoint write counter
+from .services.photo_store import photo_store  # registers photo reference counting
 from .services.scheduler import start_scheduler, shutdown_scheduler
 import logging
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-app = FastAPI(title="MyLife")
+app = FastAPI(title="MyLife", default_response_class=FastJSONResponse)
 
 
 @app.on_event("startup")
@@ -29,6 +36,15 @@ def startup_event():
         vault_svc = get_vault_service()
         logger.info(f"Vault exists: {vault_svc.vault_exists()}")
         
+        # Daily aggregates used by reports/insights/recaps
+        db = SessionLocal()
+        try:
+            daily_stats_service.ensure_ready(db)
+            generation_service.ensure_ready(db)
+            photo_store.recount(db)
+        finally:
+            db.close()
+        
         # Start scheduler
         start_scheduler()
         logger.info("MyLife backend started successfully")
@@ -51,6 +67,14 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compression (skips small bodies and already-compressed media)
+app.add_middleware(
+    GZipMiddleware,
+    minimum_size=GZIP_MINIMUM_SIZE,
+    compresslevel=GZIP_COMPRESS_LEVEL,
+    exclude_content_types=GZIP_EXCLUDED_CONTENT_TYPES,
+)
+
 
 # Global exception handler
 @app.exception_handler(Exception)
@@ -89,6 +113,7 @@ app.include_router(goals.router)
 app.include_router(ai_coach.router)
 app.include_router(reports.router)
 app.include_router(diagnostics.router)
+app.include_router(events.router)
 app.include_router(memories.router)
 app.include_router(recap.router)
 app.include_router(settings.router)
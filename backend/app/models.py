@@ -1,6 +1,7 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean
+from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, Computed, Index, event, inspect, text
 from sqlalchemy.sql import func
 from .database import Base
+from .time_keys import MONTH_KEY_SQL, resolve_occurred_at
 
 class Memory(Base):
     __tablename__ = "memories"
@@ -16,6 +17,21 @@ class Memory(Base):
     deleted_at = Column(String, nullable=True)
     created_at = Column(DateTime, default=func.now())
     updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
+    occurred_at = Column(Integer, nullable=True, index=True)  # epoch seconds (timestamp or created_at)
+    month_key = Column(Integer, Computed(MONTH_KEY_SQL, persisted=False), index=True)  # YYYYMM
+
+    __table_args__ = (
+        Index('ix_memories_created_at_id', 'created_at', 'id'),  # newest-first listings
+        Index('ix_memories_created_key_id', text("coalesce(created_at, '')"), 'id'),  # keyset pagination (NULLs last)
+    )
+
+
+@event.listens_for(Memory, "before_insert")
+@event.listens_for(Memory, "before_update")
+def _set_occurred_at(mapper, connection, target):
+    """Keep occurred_at in sync with timestamp/created_at on every ORM write"""
+    if target.occurred_at is None or inspect(target).attrs.timestamp.history.has_changes():
+        target.occurred_at = resolve_occurred_at(target.timestamp, target.created_at)
 
 class AppSettings(Base):
     __tablename__ = "app_settings"
@@ -105,3 +121,48 @@ class SyncState(Base):
     
     def __repr__(self):
         return f"<SyncState(device_id={self.device_id})>"
+
+class DailyStat(Base):
+    __tablename__ = 'daily_stats'
+    
+    day_key = Column(Integer, primary_key=True)  # YYYYMMDD of occurred_at
+    memory_count = Column(Integer, nullable=False, default=0)
+    char_count = Column(Integer, nullable=False, default=0)
+    photo_count = Column(Integer, nullable=False, default=0)
+    
+    def __repr__(self):
+        return f"<DailyStat(day_key={self.day_key}, memories={self.memory_count})>"
+
+class DailyMoodStat(Base):
+    __tablename__ = 'daily_mood_stats'
+    
+    day_key = Column(Integer, primary_key=True)
+    mood = Column(String, primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+
+class DailyTagStat(Base):
+    __tablename__ = 'daily_tag_stats'
+    
+    day_key = Column(Integer, primary_key=True)
+    tag = Column(String, primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+
+class DataGeneration(Base):
+    __tablename__ = 'data_generations'
+    
+    scope = Column(String, primary_key=True)  # table name
+    generation = Column(Integer, nullable=False, default=0)
+    
+    def __repr__(self):
+        return f"<DataGeneration(scope={self.scope}, generation={self.generation})>"
+
+class PhotoBlob(Base):
+    __tablename__ = 'photo_blobs'
+    
+    id = Column(String, primary_key=True)  # HMAC-SHA256 of the plaintext (also the file name)
+    size = Column(Integer, nullable=False, default=0)
+    ref_count = Column(Integer, nullable=False, default=0)  # occurrences in memories.photos
+    created_at = Column(DateTime, default=func.now())
+    
+    def __repr__(self):
+        return f"<PhotoBlob(id={self.id}, refs={self.ref_count})>"
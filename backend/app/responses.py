@@ -0,0 +1,152 @@
+from fastapi import Request, Response
+from fastapi.responses import JSONResponse, StreamingResponse
+from pydantic import BaseModel
+from typing import Any, Iterable, Iterator, Optional
+from collections import OrderedDict
+from threading import Lock
+from app.config import GZIP_MINIMUM_SIZE, GZIP_COMPRESS_LEVEL, PAYLOAD_CACHE_ENTRIES
+import gzip
+import orjson
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+# Already-compressed or incompressible bodies the gzip middleware should pass through
+GZIP_EXCLUDED_CONTENT_TYPES = (
+    "application/zip",
+    "application/gzip",
+    "application/octet-stream",
+    "image/*",
+    "video/*",
+    "audio/*",
+    "text/event-stream",
+)
+
+# Bytes buffered before a streamed chunk is flushed to the client
+NDJSON_FLUSH_SIZE = 64 * 1024
+
+
+def _default(value: Any):
+    """Encode the few types orjson doesn't handle natively"""
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json")
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(content: Any) -> bytes:
+    """Compact UTF-8 JSON (orjson) without going through jsonable_encoder"""
+    # Non-string keys (e.g. int ids) become strings, as with json.dumps
+    return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse that serializes plain dict rows directly"""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def wants_ndjson(request: Request) -> bool:
+    """True when the client asked for a newline-delimited JSON stream"""
+    return NDJSON_MEDIA_TYPE in request.headers.get("accept", "")
+
+
+def iter_ndjson(rows: Iterable[Any], flush_size: int = NDJSON_FLUSH_SIZE) -> Iterator[bytes]:
+    """Encode rows one per line, yielding in chunks of roughly flush_size bytes"""
+    buffer = bytearray()
+    for row in rows:
+        buffer += dumps(row)
+        buffer += b"\n"
+        if len(buffer) >= flush_size:
+            yield bytes(buffer)
+            buffer.clear()
+    if buffer:
+        yield bytes(buffer)
+
+
+class NDJSONResponse(StreamingResponse):
+    """Streams an iterable of rows as application/x-ndjson"""
+
+    def __init__(self, rows: Iterable[Any], **kwargs):
+        super().__init__(iter_ndjson(rows), media_type=NDJSON_MEDIA_TYPE, **kwargs)
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == opaque:
+            return True
+    return False
+
+
+def not_modified(request: Request, etag: str) -> Optional[Response]:
+    """304 response if the client already holds this version, else None"""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and _etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers={"ETag": etag, "Cache-Control": "private, no-cache"})
+    return None
+
+
+def set_etag(response: Response, etag: str):
+    """Tag a response and make clients revalidate it on every use"""
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "private, no-cache"
+
+
+def _request_key(request: Request) -> str:
+    return f"{request.url.path}?{request.url.query}"
+
+
+class PayloadCache:
+    """Small LRU of serialized responses, gzipped once, keyed by URL and ETag"""
+
+    def __init__(self, max_entries: int = PAYLOAD_CACHE_ENTRIES):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # url -> (etag, body, gzipped body or None)
+        self._lock = Lock()
+
+    def get(self, request: Request, etag: str) -> Optional[Response]:
+        """Cached response for this URL if it was built at the same generation"""
+        key = _request_key(request)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != etag:
+                return None
+            self._entries.move_to_end(key)
+        return self._respond(request, entry)
+
+    def put(self, request: Request, etag: str, content: Any) -> Response:
+        """Serialize and compress a payload once, then serve it (gzip is CPU work: call from sync handlers or through run_in_threadpool)"""
+        body = dumps(content)
+        compressed = gzip.compress(body, GZIP_COMPRESS_LEVEL) if len(body) >= GZIP_MINIMUM_SIZE else None
+        entry = (etag, body, compressed)
+        with self._lock:
+            self._entries[_request_key(request)] = entry
+            self._entries.move_to_end(_request_key(request))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return self._respond(request, entry)
+
+    def clear(self):
+        """Drop every entry (bodies are plaintext vault data; wiped when the vault locks)"""
+        with self._lock:
+            self._entries.clear()
+
+    def _respond(self, request: Request, entry) -> Response:
+        etag, body, compressed = entry
+        headers = {"ETag": etag, "Cache-Control": "private, no-cache", "Vary": "Accept-Encoding"}
+        if compressed is not None and "gzip" in request.headers.get("accept-encoding", ""):
+            # Content-Encoding makes the gzip middleware leave it alone
+            headers["Content-Encoding"] = "gzip"
+            body = compressed
+        return Response(content=body, media_type="application/json", headers=headers)
+
+
+# Global instance
+payload_cache = PayloadCache()
@@ -1,22 +1,18 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from datetime import date
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
 from typing import List, Optional, Any, Dict
 from .. import crud, models, schemas
-from ..database import SessionLocal
+from ..database import get_db
+from ..responses import not_modified, payload_cache
+from ..services.generation_service import generation_service
 from ..services.vector_store import vector_store
 from ..services.ai_router import ai_router_service
 from ..services.insights_service import insights_service
 
 router = APIRouter(prefix="/ai", tags=["ai"])
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
 # --- Schemas ---
 class SearchRequest(BaseModel):
     query: str
@@ -53,10 +49,10 @@ class InsightsResponse(BaseModel):
 # --- Endpoints ---
 
 @router.get("/models", response_model=schemas.APIResponse[ModelsResponse])
-def get_ai_models():
+async def get_ai_models():
     """Check Ollama status and get available models"""
     try:
-        data = ai_router_service.get_ollama_models()
+        data = await ai_router_service.get_ollama_models()
         return {"success": True, "data": data}
     except Exception as e:
         return {"success": False, "error": {"message": str(e)}}
@@ -66,13 +62,10 @@ def semantic_search(req: SearchRequest, db: Session = Depends(get_db)):
     try:
         results = vector_store.search(req.query, req.top_k)
         
+        scores = dict(results)
         output = []
-        for mem_id, score in results:
-            db_mem = crud.get_memory(db, mem_id)
-            if db_mem:
-                item = SearchResultItem.model_validate(db_mem)
-                item.score = score
-                output.append(item)
+        for memory in crud.get_memory_payloads(db, list(scores)):
+            output.append({**memory, "score": scores[memory["id"]]})
         
         return {"success": True, "data": {"results": output}}
         
@@ -80,18 +73,24 @@ def semantic_search(req: SearchRequest, db: Session = Depends(get_db)):
         return {"success": False, "error": {"message": str(e)}}
 
 @router.post("/chat", response_model=schemas.APIResponse[ChatResponse])
-def memory_chat(req: ChatRequest, db: Session = Depends(get_db)):
+async def memory_chat(req: ChatRequest):
     try:
-        response = ai_router_service.chat(req.message, db)
+        response = await ai_router_service.chat(req.message)
         return {"success": True, "data": response}
     except Exception as e:
         return {"success": False, "error": {"message": str(e)}}
 
 @router.get("/insights", response_model=schemas.APIResponse[InsightsResponse])
-def get_insights(month: Optional[str] = None, db: Session = Depends(get_db)):
+def get_insights(request: Request, month: Optional[str] = None, db: Session = Depends(get_db)):
     """Get AI-powered or rule-based insights for a specific period"""
+    # Without a month the window is the last 30 days, so it also moves daily
+    etag = generation_service.etag(db, ["memories", "app_settings"], month or date.today().isoformat())
+    unchanged = not_modified(request, etag) or payload_cache.get(request, etag)
+    if unchanged:
+        return unchanged
+
     try:
         data = insights_service.get_insights(db, month)
-        return {"success": True, "data": data}
+        return payload_cache.put(request, etag, {"success": True, "data": InsightsResponse(**data), "error": None})
     except Exception as e:
         return {"success": False, "error": {"message": str(e)}}
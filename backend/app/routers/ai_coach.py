@@ -3,9 +3,9 @@ from sqlalchemy.orm import Session
 from pydantic import BaseModel
 from typing import Optional, List
 from app.schemas import APIResponse
-from app.database import SessionLocal
+from app.database import get_db
 from app.middleware.vault_middleware import require_unlocked_vault
-from app import models
+from app import models, time_keys
 from datetime import datetime
 import logging
 import re
@@ -15,14 +15,6 @@ logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/ai", tags=["ai"])
 
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
-
 class CoachRequest(BaseModel):
     message: str
     month: Optional[str] = None
@@ -37,7 +29,7 @@ def ai_coach(req: CoachRequest, db: Session = Depends(get_db)):
         if req.month:
             memories = db.query(models.Memory).filter(
                 models.Memory.is_deleted == False,
-                models.Memory.timestamp.like(f"{req.month}%")
+                models.Memory.month_key == time_keys.month_key(req.month)
             ).order_by(models.Memory.created_at.desc()).limit(10).all()
         else:
             memories = db.query(models.Memory).filter(
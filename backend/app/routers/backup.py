@@ -1,22 +1,41 @@
 from fastapi import APIRouter, UploadFile, File, Form, HTTPException
-from fastapi.responses import FileResponse, Response
+from fastapi.responses import StreamingResponse
+from typing import BinaryIO, Iterator
 import shutil
 import os
-import io
 import json
 import zipfile
 import base64
+import logging
+import sqlite3
+import tempfile
 from datetime import datetime
 from cryptography.fernet import Fernet
 from cryptography.hazmat.primitives import hashes
 from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
 from .. import schemas
+from ..config import BACKUP_DIR, PHOTO_STORAGE_DIR
+from ..database import Base, SessionLocal, backup_database, engine, get_database_path, migrate_database_schema
+from ..responses import payload_cache
+from ..services import chunked_crypto
+from ..services.generation_service import generation_service
+from ..services.memory_cache import memory_cache
+from ..services.photo_cache import photo_cache
+from ..services.photo_store import photo_store
+from ..services.settings_cache import settings_cache, sync_state_cache
+from ..services.stats_service import rebuild_stats
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/backup", tags=["backup"])
 
-DB_PATH = "memories.db"
-STORAGE_DIR = "backend/storage/photos"
-BACKUP_TMP_DIR = "backend/storage/backups_tmp"
+STORAGE_DIR = str(PHOTO_STORAGE_DIR)
+BACKUP_TMP_DIR = str(BACKUP_DIR)
+
+# Read size for files going into the ZIP (also the granularity of the response stream)
+EXPORT_BLOCK_SIZE = 1024 * 1024
+# Already compressed (or encrypted): deflating them again only costs CPU
+STORED_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.webp', '.gif', '.heic', '.enc', '.zip'}
 
 # --- Encryption Helpers ---
 
@@ -29,93 +48,154 @@ def _derive_key(password: str, salt: bytes) -> bytes:
     )
     return base64.urlsafe_b64encode(kdf.derive(password.encode()))
 
-def encrypt_data(data: bytes, password: str) -> bytes:
+def encrypt_stream(pieces: Iterator[bytes], password: str) -> Iterator[bytes]:
+    """Salt, then the chunked AES-GCM encryption of pieces as they arrive"""
     salt = os.urandom(16)
-    key = _derive_key(password, salt)
-    f = Fernet(key)
-    encrypted = f.encrypt(data)
-    # Return Salt + Encrypted Data
-    return salt + encrypted
+    yield salt
+    yield from chunked_crypto.iter_encrypt(_derive_key(password, salt), pieces)
 
-def decrypt_data(data: bytes, password: str) -> bytes:
+def decrypt_stream(src: BinaryIO, password: str, dst: BinaryIO):
+    """Decrypt an exported backup into dst (chunked, or one Fernet token from older exports)"""
     try:
-        salt = data[:16]
-        ciphertext = data[16:]
+        salt = src.read(16)
         key = _derive_key(password, salt)
-        f = Fernet(key)
-        return f.decrypt(ciphertext)
+        chunked = chunked_crypto.is_chunked(src.read(len(chunked_crypto.MAGIC)))
+        src.seek(16)
+        if chunked:
+            chunked_crypto.decrypt_stream(key, src, dst)
+        else:
+            dst.write(Fernet(key).decrypt(src.read()))
     except Exception:
         raise Exception("Decryption failed. Invalid PIN or corrupted file.")
 
+def _passes_integrity_check(path: str) -> bool:
+    try:
+        conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+        try:
+            return conn.execute("PRAGMA integrity_check").fetchone()[0] == "ok"
+        finally:
+            conn.close()
+    except sqlite3.DatabaseError:
+        return False
+
+class _ZipSink:
+    """Write-only target for ZipFile; the generator drains what has been written so far"""
+
+    def __init__(self):
+        self._buffer = bytearray()
+
+    def write(self, data) -> int:
+        self._buffer += data
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self) -> bytes:
+        data = bytes(self._buffer)
+        self._buffer.clear()
+        return data
+
+def iter_backup_zip(metadata: dict) -> Iterator[bytes]:
+    """Build the backup ZIP on the fly, yielding it piece by piece (memory use doesn't grow with the archive)"""
+    sink = _ZipSink()
+    # The sink can't seek, so ZipFile writes sizes in data descriptors after each entry
+    with zipfile.ZipFile(sink, 'w', zipfile.ZIP_DEFLATED) as zipf:
+        def add_file(file_path: str, arcname: str):
+            compress_type = zipfile.ZIP_STORED \
+                if os.path.splitext(file_path)[1].lower() in STORED_EXTENSIONS else zipfile.ZIP_DEFLATED
+            zinfo = zipfile.ZipInfo.from_file(file_path, arcname)
+            zinfo.compress_type = compress_type
+            with open(file_path, 'rb') as src, zipf.open(zinfo, 'w', force_zip64=True) as dest:
+                for block in iter(lambda: src.read(EXPORT_BLOCK_SIZE), b''):
+                    dest.write(block)
+                    yield sink.drain()
+            yield sink.drain()
+
+        # Add Database (a consistent snapshot, taken without stopping writers)
+        db_path = get_database_path()
+        if os.path.exists(db_path):
+            fd, snapshot_path = tempfile.mkstemp(suffix=".sqlite", dir=BACKUP_TMP_DIR)
+            os.close(fd)
+            try:
+                backup_database(db_path, snapshot_path)
+                yield from add_file(snapshot_path, "memories.db")
+            finally:
+                os.remove(snapshot_path)
+        
+        # Add Photos
+        if os.path.exists(STORAGE_DIR):
+            for root, dirs, files in os.walk(STORAGE_DIR):
+                for file in files:
+                    file_path = os.path.join(root, file)
+                    arcname = os.path.join("photos", file)
+                    yield from add_file(file_path, arcname)
+        
+        # Add Metadata
+        zipf.writestr("metadata.json", json.dumps(metadata, indent=2))
+    # Central directory
+    yield sink.drain()
+
+def _current_generations() -> dict:
+    db = SessionLocal()
+    try:
+        generation_service.ensure_ready(db)
+        return generation_service.get(db, generation_service.tracked_scopes())
+    finally:
+        db.close()
+
+def _refresh_after_restore(previous_generations: dict):
+    """The live DB was replaced underneath the app: drop everything derived from the old one"""
+    Base.metadata.create_all(bind=engine)
+    migrate_database_schema(engine)
+    db = SessionLocal()
+    try:
+        rebuild_stats(db.connection())
+        # Restored generations may be older than ETags clients already hold
+        generation_service.advance_all(db, previous_generations)
+        db.commit()
+        for cache in (memory_cache, payload_cache, photo_cache):
+            cache.clear()
+        settings_cache.invalidate()
+        sync_state_cache.invalidate()
+        photo_store.recount(db)
+    finally:
+        db.close()
+
 # --- Endpoints ---
 
 @router.get("/export")
 def export_backup(pin: str = None):
     try:
-        # Create temp filename
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        zip_filename = f"mylife_backup_{timestamp}.zip"
-        zip_path = os.path.join(BACKUP_TMP_DIR, zip_filename)
-        
-        # Ensure tmp dir exists
-        os.makedirs(BACKUP_TMP_DIR, exist_ok=True)
-
-        # 1. Create ZIP in memory or temp file
-        buffer = io.BytesIO()
-        with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as zipf:
-            # Add Database
-            if os.path.exists(DB_PATH):
-                zipf.write(DB_PATH, arcname="memories.db")
-            
-            # Add Photos
-            if os.path.exists(STORAGE_DIR):
-                for root, dirs, files in os.walk(STORAGE_DIR):
-                    for file in files:
-                        file_path = os.path.join(root, file)
-                        arcname = os.path.join("photos", file)
-                        zipf.write(file_path, arcname=arcname)
-            
-            # Add Metadata
-            metadata = {
-                "app": "MyLife",
-                "version": "1.0",
-                "exported_at": datetime.now().isoformat(),
-                "encrypted": bool(pin)
-            }
-            zipf.writestr("metadata.json", json.dumps(metadata, indent=2))
-        
-        zip_bytes = buffer.getvalue()
+        metadata = {
+            "app": "MyLife",
+            "version": "1.0",
+            "exported_at": datetime.now().isoformat(),
+            "encrypted": bool(pin)
+        }
+        pieces = (piece for piece in iter_backup_zip(metadata) if piece)
 
-        # 2. Encryption (Optional)
+        # Encryption (Optional), applied as the ZIP is produced
         if pin:
-            encrypted_bytes = encrypt_data(zip_bytes, pin)
-            enc_filename = f"mylife_backup_{timestamp}.encrypted"
-            # Return encrypted stream
-            return Response(
-                content=encrypted_bytes,
+            return StreamingResponse(
+                encrypt_stream(pieces, pin),
                 media_type="application/octet-stream",
-                headers={"Content-Disposition": f"attachment; filename={enc_filename}"}
+                headers={"Content-Disposition": f"attachment; filename=mylife_backup_{timestamp}.encrypted"}
             )
-        
-        # 3. Normal Return
-        # Write buffer to disk to serve as FileResponse (better for large files, though we have it in RAM now)
-        # Re-using the logic to write to disk for consistency if needed, 
-        # but returning bytes directly is fine for reasonable sizes.
-        # Let's save to disk as per original requirement for structure
-        with open(zip_path, "wb") as f:
-            f.write(zip_bytes)
 
-        return FileResponse(
-            zip_path, 
-            media_type="application/zip", 
-            filename=zip_filename
+        return StreamingResponse(
+            pieces,
+            media_type="application/zip",
+            headers={"Content-Disposition": f"attachment; filename=mylife_backup_{timestamp}.zip"}
         )
 
     except Exception as e:
+        logger.error(f"Backup export error: {e}")
         return {"success": False, "error": {"message": str(e)}}
 
 @router.post("/restore", response_model=schemas.APIResponse[dict])
-async def restore_backup(
+def restore_backup(
     file: UploadFile = File(...),
     pin: str = Form(None)
 ):
@@ -125,32 +205,30 @@ async def restore_backup(
     os.makedirs(restore_tmp, exist_ok=True)
     
     zip_path = os.path.join(restore_tmp, "upload.zip")
-    old_db_backup = f"{DB_PATH}.bak.{timestamp}"
+    db_path = get_database_path()
+    old_db_backup = f"{db_path}.bak.{timestamp}"
+    previous_generations = _current_generations()
+    db_replaced = False
 
     try:
-        # 1. Read Uploaded Content
-        content = await file.read()
-        
-        # 2. Decrypt if needed
+        # 1. Decrypt if needed
         # Simple check: Does filename end in .encrypted?
         # Or check magic bytes? For now rely on extension or user supplying PIN imply encryption
         is_encrypted = file.filename.endswith(".encrypted")
         
-        final_zip_bytes = content
-        
-        if is_encrypted:
-            if not pin:
-                return {"success": False, "error": {"message": "Backup is encrypted. Please provide a PIN."}}
-            try:
-                final_zip_bytes = decrypt_data(content, pin)
-            except Exception:
-                return {"success": False, "error": {"message": "Invalid PIN or corrupted file."}}
-        
-        # 3. Write ZIP to disk
+        # 2. Write ZIP to disk (streamed from the spooled upload)
         with open(zip_path, "wb") as f:
-            f.write(final_zip_bytes)
+            if is_encrypted:
+                if not pin:
+                    return {"success": False, "error": {"message": "Backup is encrypted. Please provide a PIN."}}
+                try:
+                    decrypt_stream(file.file, pin, f)
+                except Exception:
+                    return {"success": False, "error": {"message": "Invalid PIN or corrupted file."}}
+            else:
+                shutil.copyfileobj(file.file, f)
             
-        # 4. Extract and Validate
+        # 3. Extract and Validate
         try:
             with zipfile.ZipFile(zip_path, 'r') as zipf:
                 zipf.extractall(restore_tmp)
@@ -160,16 +238,22 @@ async def restore_backup(
         if not os.path.exists(os.path.join(restore_tmp, "metadata.json")):
              return {"success": False, "error": {"message": "Invalid backup: Missing metadata.json"}}
              
-        # 5. Safe Restore Strategy
+        db_source = os.path.join(restore_tmp, "memories.db")
+        if os.path.exists(db_source) and not _passes_integrity_check(db_source):
+             return {"success": False, "error": {"message": "Invalid backup: Database failed integrity check"}}
+             
+        # 4. Safe Restore Strategy
+        # The live DB is written through SQLite (backup API), never copied over while open
         
         # Backup existing DB
-        if os.path.exists(DB_PATH):
-            shutil.copy2(DB_PATH, old_db_backup)
+        if os.path.exists(db_path):
+            backup_database(db_path, old_db_backup)
             
         # Restore DB
-        db_source = os.path.join(restore_tmp, "memories.db")
         if os.path.exists(db_source):
-            shutil.copy2(db_source, DB_PATH)
+            db_replaced = True
+            backup_database(db_source, db_path, pages=-1)
+            _refresh_after_restore(previous_generations)
         
         # Restore Photos
         photos_source = os.path.join(restore_tmp, "photos")
@@ -186,7 +270,9 @@ async def restore_backup(
         # Rollback DB
         if os.path.exists(old_db_backup):
             try:
-                shutil.copy2(old_db_backup, DB_PATH)
+                backup_database(old_db_backup, db_path, pages=-1)
+                if db_replaced:
+                    _refresh_after_restore(previous_generations)
             except: 
                 pass
         return {"success": False, "error": {"message": f"Restore failed: {str(e)}"}}
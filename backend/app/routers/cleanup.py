@@ -4,7 +4,7 @@ from pydantic import BaseModel
 from typing import List, Optional
 from app.schemas import APIResponse
 from app.services.cleanup_service import cleanup_service
-from app.database import SessionLocal
+from app.database import get_db
 from app.middleware.vault_middleware import require_unlocked_vault
 import logging
 
@@ -13,14 +13,6 @@ logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/cleanup", tags=["cleanup"])
 
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
-
 class MergeRequest(BaseModel):
     memory_ids: List[int]
     merge_title: Optional[str] = None
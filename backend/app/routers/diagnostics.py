@@ -1,7 +1,14 @@
 from fastapi import APIRouter, Depends
 from sqlalchemy.orm import Session
 from app.schemas import APIResponse
-from app.database import SessionLocal, engine
+from sqlalchemy import text
+from app.database import engine, get_db
+from app.services.memory_cache import memory_cache
+from app.services.settings_cache import settings_cache, sync_state_cache
+from app.services.checkpoint_service import checkpoint_service
+from app.services.photo_cache import photo_cache
+from app.services.photo_store import photo_store
+from app.services.thumbnail_service import thumbnail_service
 from app.services.vault_service import get_vault_service
 from app.services.google_drive_service import get_drive_service
 from app.config import APP_VERSION
@@ -14,14 +21,6 @@ logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/diagnostics", tags=["diagnostics"])
 
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
-
 @router.get("", response_model=APIResponse[dict])
 def get_diagnostics(db: Session = Depends(get_db)):
     """Get system diagnostics (privacy-safe)"""
@@ -48,7 +47,7 @@ def get_diagnostics(db: Session = Depends(get_db)):
         
         # Database status
         try:
-            db.execute("SELECT 1")
+            db.execute(text("SELECT 1"))
             diagnostics['database_status'] = 'connected'
         except Exception as e:
             diagnostics['database_status'] = 'error'
@@ -62,6 +61,16 @@ def get_diagnostics(db: Session = Depends(get_db)):
         except Exception as e:
             diagnostics['last_errors'].append(f"Sync check failed: {str(e)[:100]}")
         
+        # Memory row cache
+        diagnostics['memory_cache'] = memory_cache.get_stats()
+        diagnostics['singleton_cache'] = {
+            cache.name: cache.get_stats() for cache in (settings_cache, sync_state_cache)
+        }
+        diagnostics['vault_checkpoint'] = checkpoint_service.get_stats()
+        diagnostics['photo_cache'] = photo_cache.get_stats()
+        diagnostics['thumbnails'] = thumbnail_service.get_stats()
+        diagnostics['photo_gc'] = photo_store.get_stats()
+        
         # Memory usage
         try:
             process = psutil.Process()
@@ -0,0 +1,64 @@
+from fastapi import APIRouter, Request, Query
+from fastapi.responses import StreamingResponse
+from typing import Optional
+from app.responses import dumps
+from app.services.event_bus import event_bus
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/events", tags=["events"])
+
+# Comment line sent when idle so proxies and the browser keep the stream open
+KEEPALIVE_SECONDS = 15
+RETRY_MS = 3000
+
+
+def format_event(event: dict) -> bytes:
+    return (
+        f"id: {event['id']}\nevent: {event['type']}\ndata: ".encode()
+        + dumps(event['data'])
+        + b"\n\n"
+    )
+
+
+@router.get("")
+async def stream_events(request: Request, last_event_id: Optional[int] = Query(None)):
+    """Server-Sent Events feed of memory, import, job and vault changes"""
+    # Browsers resend the last id as a header on reconnect
+    header_id = request.headers.get("last-event-id")
+    if header_id and header_id.isdigit():
+        last_event_id = int(header_id)
+
+    async def stream():
+        # Subscribed only once the response starts, so a client gone before then leaves nothing behind
+        subscriber, replay, resync_id = event_bus.subscribe(asyncio.get_running_loop(), last_event_id)
+        try:
+            yield f"retry: {RETRY_MS}\n\n".encode()
+            if resync_id is not None:
+                # Missed events are gone; the client should refetch its views.
+                # Its id sits just before the first replayed or queued event so
+                # the next reconnect resumes cleanly.
+                yield format_event({'id': resync_id, 'type': 'resync', 'data': None})
+            for event in replay:
+                yield format_event(event)
+
+            while not await request.is_disconnected():
+                try:
+                    event = await asyncio.wait_for(subscriber.queue.get(), KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield b": keepalive\n\n"
+                    continue
+                if event is None:
+                    logger.warning("Event subscriber fell behind; closing stream")
+                    break
+                yield format_event(event)
+        finally:
+            event_bus.unsubscribe(subscriber)
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
@@ -1,11 +1,13 @@
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, Query, Request, Response
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
 from typing import Optional
 from app.schemas import APIResponse
-from app.database import SessionLocal
+from app.database import get_db
+from app.responses import not_modified, set_etag
+from app.services.generation_service import generation_service
 from app.middleware.vault_middleware import require_unlocked_vault
-from app import models
+from app import models, time_keys
 from datetime import datetime
 import logging
 import re
@@ -15,14 +17,6 @@ logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/goals", tags=["goals"])
 
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
-
 class GoalCreate(BaseModel):
     title: str
     description: str = ""
@@ -36,8 +30,13 @@ class GoalUpdate(BaseModel):
 
 
 @router.get("", response_model=APIResponse[dict], dependencies=[Depends(require_unlocked_vault)])
-def get_goals(db: Session = Depends(get_db)):
+def get_goals(request: Request, response: Response, db: Session = Depends(get_db)):
     """Get all goals"""
+    etag = generation_service.etag(db, ['goals'])
+    unchanged = not_modified(request, etag)
+    if unchanged:
+        return unchanged
+    
     try:
         goals = db.query(models.Goal).order_by(
             models.Goal.created_at.desc()
@@ -53,6 +52,7 @@ def get_goals(db: Session = Depends(get_db)):
             'completed_at': g.completed_at
         } for g in goals]
         
+        set_etag(response, etag)
         return APIResponse(
             success=True,
             data={'goals': results, 'count': len(results)}
@@ -171,7 +171,7 @@ def extract_goals(
         query = db.query(models.Memory).filter(models.Memory.is_deleted == False)
         
         if month:
-            query = query.filter(models.Memory.timestamp.like(f"{month}%"))
+            query = query.filter(models.Memory.month_key == time_keys.month_key(month))
         
         memories = query.order_by(models.Memory.created_at.desc()).limit(50).all()
         
@@ -3,7 +3,7 @@ from sqlalchemy.orm import Session
 from pydantic import BaseModel
 from app.schemas import APIResponse
 from app.services.import_service import import_service
-from app.database import SessionLocal
+from app.database import get_db
 from app.middleware.vault_middleware import require_unlocked_vault
 import logging
 
@@ -12,14 +12,6 @@ logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/import", tags=["import"])
 
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
-
 class PhotosFolderRequest(BaseModel):
     folder_path: str
 
@@ -2,7 +2,7 @@ from fastapi import APIRouter, Depends, Query
 from sqlalchemy.orm import Session
 from app.schemas import APIResponse
 from app.services.journal_service import journal_service
-from app.database import SessionLocal
+from app.database import get_db
 from app.middleware.vault_middleware import require_unlocked_vault
 from typing import Optional
 import logging
@@ -12,14 +12,6 @@ logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/journal", tags=["journal"])
 
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
-
 @router.get("/prompt", response_model=APIResponse[dict])
 def get_daily_prompt(date: Optional[str] = Query(None, regex="^\\d{4}-\\d{2}-\\d{2}$")):
     """Get daily journaling prompt"""
@@ -1,63 +1,119 @@
-import uuid
-from typing import List
-from fastapi import APIRouter, UploadFile, File, HTTPException, Depends
-from fastapi.responses import Response
+import asyncio
+from typing import BinaryIO, List, Optional, Tuple
+from fastapi import APIRouter, UploadFile, File, HTTPException, Depends, Request, Query
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
 from pathlib import Path
 from .. import schemas
+from ..database import get_db
+from ..responses import not_modified, set_etag
+from ..services import chunked_crypto
+from ..services.photo_cache import photo_cache
+from ..services.photo_store import photo_store
+from ..services.thumbnail_service import thumbnail_service
 from ..services.vault_service import get_vault_service, vault_state
 from ..middleware.vault_middleware import require_unlocked_vault
 
 router = APIRouter(prefix="/media", tags=["media"])
 
-MAX_FILE_SIZE = 5 * 1024 * 1024  # 5MB
+MAX_FILE_SIZE = 50 * 1024 * 1024  # 50MB (encrypted as a stream, so memory doesn't grow with it)
 ALLOWED_TYPES = ["image/jpeg", "image/png", "image/webp", "image/jpg"]
 
 
+def sniff_content_type(head: bytes) -> str:
+    """Determine content type (simple heuristic)"""
+    if head[:3] == b'\xff\xd8\xff':
+        return "image/jpeg"
+    elif head[:8] == b'\x89PNG\r\n\x1a\n':
+        return "image/png"
+    elif head[:4] == b'RIFF' and head[8:12] == b'WEBP':
+        return "image/webp"
+    return "application/octet-stream"
+
+
+def parse_range(range_header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """Single "bytes=" range as inclusive (start, end); None serves the whole file"""
+    if not range_header or not range_header.startswith("bytes=") or "," in range_header:
+        return None
+    first, _, last = range_header[len("bytes="):].strip().partition("-")
+    try:
+        if not first:
+            # Suffix range: the last N bytes
+            start, end = max(size - int(last), 0), size - 1
+        else:
+            start = int(first)
+            end = min(int(last), size - 1) if last else size - 1
+    except ValueError:
+        return None
+    if start >= size or start > end:
+        raise HTTPException(
+            status_code=416,
+            detail="Requested range not satisfiable",
+            headers={"Content-Range": f"bytes */{size}"}
+        )
+    return start, end
+
+
+class UploadRejected(Exception):
+    """Uploaded file failed validation while it was being read"""
+
+
+class UploadValidator:
+    """Wraps an upload stream: checks the magic bytes of the first read and the size of every read"""
+    
+    def __init__(self, src: BinaryIO, max_size: int = MAX_FILE_SIZE):
+        self.src = src
+        self.max_size = max_size
+        self.size = 0
+    
+    def read(self, size: int = -1) -> bytes:
+        data = self.src.read(size)
+        if self.size == 0:
+            if not data:
+                raise UploadRejected("File is empty.")
+            if sniff_content_type(data) not in ALLOWED_TYPES:
+                raise UploadRejected("Only JPG, PNG, WEBP allowed.")
+        self.size += len(data)
+        if self.size > self.max_size:
+            raise UploadRejected("Max 50MB.")
+        return data
+
+
 @router.post("/upload", response_model=schemas.APIResponse[dict], dependencies=[Depends(require_unlocked_vault)])
-async def upload_photos(files: List[UploadFile] = File(...)):
-    """Upload and encrypt photos"""
+async def upload_photos(files: List[UploadFile] = File(...), db: Session = Depends(get_db)):
+    """Upload and encrypt photos in parallel (idempotent: a photo already in the vault keeps its id)"""
     try:
-        vault_svc = get_vault_service()
-        saved_ids = []
+        # Starlette has already spooled each file to a temp file; the upload pool reads
+        # them in chunks straight into the encrypter, one file per worker
+        futures = [asyncio.wrap_future(photo_store.submit(UploadValidator(file.file))) for file in files]
+        outcomes = await asyncio.gather(*futures, return_exceptions=True)
         
-        for file in files:
-            # Validate Type
-            if file.content_type not in ALLOWED_TYPES:
-                return schemas.APIResponse(
-                    success=False,
-                    error={"message": f"Invalid file type: {file.filename}. Only JPG, PNG, WEBP allowed."}
-                )
-            
-            # Validate Size
-            file.file.seek(0, 2)
-            size = file.file.tell()
-            file.file.seek(0)
-            
-            if size > MAX_FILE_SIZE:
-                return schemas.APIResponse(
-                    success=False,
-                    error={"message": f"File too large: {file.filename}. Max 5MB."}
-                )
-            
-            # Read file data
-            file_data = await file.read()
-            
-            # Encrypt
-            encrypted_data = vault_svc.encrypt_file(file_data)
-            
-            # Generate photo ID
-            photo_id = str(uuid.uuid4())
-            
-            # Save encrypted
-            photo_path = vault_svc.get_encrypted_photo_path(photo_id)
-            photo_path.write_bytes(encrypted_data)
+        saved_ids = []
+        existing_ids = []
+        results = []
+        for file, outcome in zip(files, outcomes):
+            if isinstance(outcome, Exception):
+                results.append({"filename": file.filename, "success": False, "error": str(outcome)})
+                continue
             
+            photo_id, size, created = outcome
+            await run_in_threadpool(photo_store.register, db, photo_id, size)
+            if created:
+                thumbnail_service.submit(photo_id)
+            else:
+                existing_ids.append(photo_id)
             saved_ids.append(photo_id)
+            results.append({"filename": file.filename, "success": True, "photo_id": photo_id, "existing": not created})
         
-        return schemas.APIResponse(
-            success=True,
-            data={"photo_ids": saved_ids}
-        )
+        data = {"photo_ids": saved_ids, "existing_ids": existing_ids, "results": results}
+        if files and not saved_ids:
+            return schemas.APIResponse(
+                success=False,
+                data=data,
+                error={"message": f"Invalid file: {results[0]['filename']}. {results[0]['error']}"}
+            )
+        return schemas.APIResponse(success=True, data=data)
         
     except Exception as e:
         return schemas.APIResponse(
@@ -66,11 +122,28 @@ async def upload_photos(files: List[UploadFile] = File(...)):
         )
 
 
+@router.post("/gc", response_model=schemas.APIResponse[dict], dependencies=[Depends(require_unlocked_vault)])
+def collect_photo_garbage(db: Session = Depends(get_db)):
+    """Delete stored photos that no memory or version references"""
+    try:
+        return schemas.APIResponse(success=True, data=photo_store.collect_garbage(db))
+    except Exception as e:
+        return schemas.APIResponse(
+            success=False,
+            error={"message": "Photo cleanup failed", "details": str(e)}
+        )
+
+
 @router.get("/photo/{photo_id}", dependencies=[Depends(require_unlocked_vault)])
-async def get_photo(photo_id: str):
-    """Get decrypted photo"""
+def get_photo(
+    photo_id: str,
+    request: Request,
+    thumb_size: Optional[int] = Query(None, alias="size", ge=1, le=10000, description="Longest side wanted, in px; served from the nearest thumbnail")
+):
+    """Get decrypted photo (cached or streamed; honours Range and If-None-Match)"""
     try:
         vault_svc = get_vault_service()
+        key = vault_state.encryption_key
         
         # Get encrypted photo path
         photo_path = vault_svc.get_encrypted_photo_path(photo_id)
@@ -78,23 +151,72 @@ async def get_photo(photo_id: str):
         if not photo_path.exists():
             raise HTTPException(status_code=404, detail="Photo not found")
         
-        # Read encrypted data
-        encrypted_data = photo_path.read_bytes()
+        cache_key = photo_id
+        thumbnail_size = thumbnail_service.pick_size(thumb_size) if thumb_size else None
+        if thumbnail_size:
+            thumbnail_path = vault_svc.get_thumbnail_path(photo_id, thumbnail_size)
+            if thumbnail_path.exists():
+                photo_path = thumbnail_path
+                cache_key = f"{photo_id}@{thumbnail_size}"
+            else:
+                # Not generated yet: serve the original this time
+                thumbnail_service.submit(photo_id)
         
-        # Decrypt
-        decrypted_data = vault_svc.decrypt_file(encrypted_data)
+        # Photo files never change under an id
+        etag = f'"{cache_key}"'
+        unchanged = not_modified(request, etag)
+        if unchanged:
+            return unchanged
         
-        # Determine content type (simple heuristic)
-        if decrypted_data[:4] == b'\xff\xd8\xff\xe0' or decrypted_data[:4] == b'\xff\xd8\xff\xe1':
-            content_type = "image/jpeg"
-        elif decrypted_data[:8] == b'\x89PNG\r\n\x1a\n':
-            content_type = "image/png"
-        elif decrypted_data[:4] == b'RIFF':
-            content_type = "image/webp"
+        data = photo_cache.get(cache_key)
+        if data is None:
+            with open(photo_path, 'rb') as f:
+                chunked = chunked_crypto.is_chunked(f.read(chunked_crypto.HEADER_SIZE))
+                if chunked:
+                    f.seek(0)
+                    plain_size = chunked_crypto.plaintext_size(f)
+            
+            if not chunked:
+                # Photos stored before chunked encryption are one Fernet token
+                data = photo_cache.put(cache_key, vault_svc.decrypt_file(photo_path.read_bytes()))
+            elif photo_cache.accepts(plain_size):
+                with open(photo_path, 'rb') as f:
+                    data = photo_cache.put(cache_key, b"".join(chunked_crypto.iter_decrypt(key, f)))
+        
+        if data is not None:
+            plain_size = len(data)
+            head = bytes(data[:16])
+            
+            def read_range(start: int, end: int):
+                yield bytes(data[start:end + 1])
         else:
-            content_type = "application/octet-stream"
+            # Too big to cache: decrypt only the chunks the response needs
+            with open(photo_path, 'rb') as f:
+                head = b"".join(chunked_crypto.iter_decrypt_range(key, f, 0, 15))
+            
+            def read_range(start: int, end: int):
+                with open(photo_path, 'rb') as f:
+                    yield from chunked_crypto.iter_decrypt_range(key, f, start, end)
+        
+        headers = {"Accept-Ranges": "bytes"}
+        byte_range = parse_range(request.headers.get("range"), plain_size)
+        if byte_range:
+            start, end = byte_range
+            status_code = 206
+            headers["Content-Range"] = f"bytes {start}-{end}/{plain_size}"
+        else:
+            start, end = 0, plain_size - 1
+            status_code = 200
+        headers["Content-Length"] = str(end - start + 1)
         
-        return Response(content=decrypted_data, media_type=content_type)
+        response = StreamingResponse(
+            read_range(start, end) if plain_size else iter(()),
+            status_code=status_code,
+            media_type=sniff_content_type(head),
+            headers=headers
+        )
+        set_etag(response, etag)
+        return response
         
     except HTTPException:
         raise
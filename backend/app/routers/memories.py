@@ -1,17 +1,22 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import List, Optional, Literal
 from datetime import datetime
 from .. import crud, models, schemas
-from ..database import SessionLocal
+from ..database import SessionLocal, get_async_db, get_db
+from ..responses import FastJSONResponse, NDJSONResponse, wants_ndjson, not_modified, set_etag
+from ..services.generation_service import generation_service
 
 router = APIRouter(prefix="/memories", tags=["memories"])
 
-# Dependency
-def get_db():
+MAX_BATCH_IDS = 500
+
+def stream_memories(**kwargs):
+    """Stream rows on a session owned by the response, not the request"""
     db = SessionLocal()
     try:
-        yield db
+        yield from crud.iter_memories(db, **kwargs)
     finally:
         db.close()
 
@@ -24,12 +29,79 @@ def create_memory(memory: schemas.MemoryCreate, db: Session = Depends(get_db)):
         # Standardize unexpected errors
         return {"success": False, "error": {"message": str(e)}}
 
-@router.get("/", response_model=schemas.APIResponse[List[schemas.MemoryRead]])
-def read_memories(
+@router.post("/bulk", response_model=schemas.APIResponse[schemas.BulkMemoryResponse])
+def bulk_write_memories(req: schemas.BulkMemoryRequest, db: Session = Depends(get_db)):
+    """Create/update/delete many memories in one transaction with per-item results"""
+    try:
+        results = crud.bulk_write_memories(db, req.operations)
+        succeeded = [r for r in results if r["success"]]
+        return {"success": True, "data": {
+            "results": results,
+            "created": sum(1 for r in succeeded if r["op"] == "create"),
+            "updated": sum(1 for r in succeeded if r["op"] == "update"),
+            "deleted": sum(1 for r in succeeded if r["op"] == "delete"),
+            "failed": len(results) - len(succeeded)
+        }}
+    except Exception as e:
+        return {"success": False, "error": {"message": str(e)}}
+
+@router.get("/export")
+def export_memories(
+    month: Optional[str] = Query(None, regex="^\\d{4}-\\d{2}$"),
+    view: Literal["summary", "full"] = "full",
+    fields: Optional[str] = None
+):
+    """Stream every memory as NDJSON, newest first, with flat memory use"""
+    if month:
+        try:
+            datetime.strptime(month, "%Y-%m")
+        except ValueError:
+            raise HTTPException(status_code=422, detail="Invalid month value (must be YYYY-MM)")
+
+    try:
+        projection = crud.parse_fields(fields, view) or crud.FULL_FIELDS
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+    return NDJSONResponse(stream_memories(fields=projection, month=month))
+
+@router.get("/batch", response_model=schemas.APIResponse[List[schemas.MemoryRead]])
+async def read_memories_batch(
+    ids: str = Query(..., description="Comma-separated memory ids, e.g. 3,1,2"),
+    view: Literal["summary", "full"] = "full",
+    fields: Optional[str] = None,
+    session: AsyncSession = Depends(get_async_db)
+):
+    """Fetch many memories in one query, in the order requested"""
+    try:
+        memory_ids = [int(i) for i in ids.split(",") if i.strip()]
+        projection = crud.parse_fields(fields, view)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=f"Invalid ids or fields: {e}")
+
+    if len(memory_ids) > MAX_BATCH_IDS:
+        raise HTTPException(status_code=422, detail=f"At most {MAX_BATCH_IDS} ids per request")
+
+    try:
+        if projection:
+            memories = await crud.get_memories_by_ids_async(session, memory_ids, fields=projection)
+        else:
+            memories = await crud.get_memory_payloads_async(session, memory_ids)
+        return FastJSONResponse({"success": True, "data": memories, "error": None})
+    except Exception as e:
+        return {"success": False, "error": {"message": str(e)}}
+
+@router.get("/", response_model=schemas.MemoryListResponse)
+async def read_memories(
+    request: Request,
+    response: Response,
     skip: int = 0, 
-    limit: int = 100, 
+    limit: int = Query(100, ge=1), 
     month: Optional[str] = Query(None, regex="^\\d{4}-\\d{2}$"),
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = None,
+    view: Literal["summary", "full"] = "full",
+    fields: Optional[str] = Query(None, description="Comma-separated columns, e.g. id,title,mood,preview"),
+    session: AsyncSession = Depends(get_async_db)
 ):
     # Strict Month Validation
     if month:
@@ -38,23 +110,52 @@ def read_memories(
         except ValueError:
             raise HTTPException(status_code=422, detail="Invalid month value (must be YYYY-MM)")
 
+    if cursor:
+        try:
+            crud.decode_cursor(cursor)
+        except ValueError:
+            raise HTTPException(status_code=422, detail="Invalid cursor")
+
+    try:
+        projection = crud.parse_fields(fields, view)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+    if wants_ndjson(request):
+        return NDJSONResponse(stream_memories(
+            fields=projection or crud.FULL_FIELDS, month=month, cursor=cursor, limit=limit, skip=skip
+        ))
+
+    etag = await generation_service.etag_async(session, ["memories"])
+    unchanged = not_modified(request, etag)
+    if unchanged:
+        return unchanged
+
     try:
-        memories = crud.get_memories(db, skip=skip, limit=limit, month=month)
-        return {"success": True, "data": memories}
+        memories, next_cursor = await crud.get_memories_page_async(
+            session, limit=limit, month=month, cursor=cursor, skip=skip, fields=projection
+        )
+        if projection:
+            # Rows are already plain dicts; skip MemoryRead validation entirely
+            page = FastJSONResponse({"success": True, "data": memories, "error": None, "next_cursor": next_cursor})
+            set_etag(page, etag)
+            return page
+        set_etag(response, etag)
+        return {"success": True, "data": memories, "next_cursor": next_cursor}
     except Exception as e:
         return {"success": False, "error": {"message": str(e)}}
 
 @router.get("/{memory_id}", response_model=schemas.APIResponse[schemas.MemoryRead])
-def read_memory(memory_id: int, db: Session = Depends(get_db)):
-    db_memory = crud.get_memory(db, memory_id=memory_id)
-    if db_memory is None:
+async def read_memory(memory_id: int, session: AsyncSession = Depends(get_async_db)):
+    payloads = await crud.get_memory_payloads_async(session, [memory_id])
+    if not payloads:
         # Return success=False instead of raising 404 to strictly strict generic shape?
         # The prompt says "error": null OR {"message": ...}
         # If I raise HTTPException(404), FastAPI returns {"detail": "..."}.
         # To strictly follow {success, data, error}, I should return JSONResponse or matching model.
         # But `response_model` is set.
         return {"success": False, "error": {"message": "Memory not found"}}
-    return {"success": True, "data": db_memory}
+    return FastJSONResponse({"success": True, "data": payloads[0], "error": None})
 
 @router.put("/{memory_id}", response_model=schemas.APIResponse[schemas.MemoryRead])
 def update_memory(memory_id: int, memory: schemas.MemoryUpdate, db: Session = Depends(get_db)):
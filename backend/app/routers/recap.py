@@ -1,22 +1,22 @@
-from fastapi import APIRouter, Depends, Query, HTTPException
+from fastapi import APIRouter, Depends, Query, HTTPException, Request
 from sqlalchemy.orm import Session
 from datetime import datetime
 import json
-from .. import schemas, models
+from .. import schemas, models, time_keys
 from ..services import recap_service
-from ..database import SessionLocal
+from ..services.stats_service import daily_stats_service
+from ..database import get_db
+from ..responses import not_modified, payload_cache
+from ..services.generation_service import generation_service
 
-router = APIRouter(prefix="/recap", tags=["recap"])
+# Recaps depend on the memories, the stored recap and the AI mode setting
+RECAP_SCOPES = ["memories", "monthly_recap_cache", "app_settings"]
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+router = APIRouter(prefix="/recap", tags=["recap"])
 
 @router.get("/monthly", response_model=schemas.APIResponse[schemas.MonthlyRecapResponse])
 def get_monthly_recap(
+    request: Request,
     month: str = Query(..., regex="^\\d{4}-\\d{2}$"),
     db: Session = Depends(get_db)
 ):
@@ -26,6 +26,11 @@ def get_monthly_recap(
     except ValueError:
         raise HTTPException(status_code=422, detail="Invalid month value (must be YYYY-MM)")
 
+    etag = generation_service.etag(db, RECAP_SCOPES)
+    unchanged = not_modified(request, etag) or payload_cache.get(request, etag)
+    if unchanged:
+        return unchanged
+
     try:
         # 1. Check Cache
         cached = db.query(models.MonthlyRecapCache).filter(models.MonthlyRecapCache.month == month).first()
@@ -49,20 +54,16 @@ def get_monthly_recap(
             # Re-fetch count cheap
             # Actually, to strictly follow "return cached", we should trust the cache for expensive parts.
             # We'll re-calculate total_memories cheaply.
-            target_date = datetime.strptime(month, "%Y-%m")
-            from sqlalchemy import extract
-            total_memories = db.query(models.Memory).filter(
-                extract('year', models.Memory.created_at) == target_date.year,
-                extract('month', models.Memory.created_at) == target_date.month
-            ).count()
+            start_key, end_key = time_keys.month_day_keys(month)
+            total_memories = daily_stats_service.get_period_stats(db, start_key, end_key)['total_memories']
 
-            return {"success": True, "data": schemas.MonthlyRecapResponse(
+            return payload_cache.put(request, etag, {"success": True, "data": schemas.MonthlyRecapResponse(
                 month=month,
                 total_memories=total_memories,
                 highlights=highlights,
                 mood_hint=cached.mood_hint,
                 summary=cached.summary
-            )}
+            ), "error": None})
 
         # 2. Generate if not cached
         recap = recap_service.generate_monthly_recap(db, month)
@@ -77,6 +78,8 @@ def get_monthly_recap(
         db.add(new_cache)
         db.commit()
 
-        return {"success": True, "data": recap}
+        # Storing the recap bumped its generation; tag with the new one
+        etag = generation_service.etag(db, RECAP_SCOPES)
+        return payload_cache.put(request, etag, {"success": True, "data": recap, "error": None})
     except Exception as e:
          return {"success": False, "error": {"message": str(e)}}
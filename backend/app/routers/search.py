@@ -1,9 +1,11 @@
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, Query, Request
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from typing import Optional
 from app.schemas import APIResponse
 from app.services.fts_service import fts_search_service
-from app.database import SessionLocal
+from app.database import SessionLocal, get_async_db, get_db
+from app.responses import FastJSONResponse, NDJSONResponse, wants_ndjson
 from app.middleware.vault_middleware import require_unlocked_vault
 import logging
 
@@ -12,34 +14,40 @@ logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/search", tags=["search"])
 
 
-def get_db():
+def stream_search(q: str, month: Optional[str], mood: Optional[str], limit: int):
+    """Stream results on a session owned by the response"""
     db = SessionLocal()
     try:
-        yield db
+        yield from fts_search_service.iter_search(db, q, month, mood, limit)
     finally:
         db.close()
 
 
 @router.get("", response_model=APIResponse[dict], dependencies=[Depends(require_unlocked_vault)])
-def fast_search(
+async def fast_search(
+    request: Request,
     q: str = Query(..., min_length=1, description="Search query"),
     month: Optional[str] = Query(None, regex="^\\d{4}-\\d{2}$", description="Filter by month (YYYY-MM)"),
     mood: Optional[str] = Query(None, description="Filter by mood"),
     limit: int = Query(20, ge=1, le=100, description="Result limit"),
-    db: Session = Depends(get_db)
+    session: AsyncSession = Depends(get_async_db)
 ):
     """Fast keyword search using FTS5"""
+    if wants_ndjson(request):
+        return NDJSONResponse(stream_search(q, month, mood, limit))
+    
     try:
-        results = fts_search_service.search(db, q, month, mood, limit)
+        results = await fts_search_service.search_async(session, q, month, mood, limit)
         
-        return APIResponse(
-            success=True,
-            data={
+        return FastJSONResponse({
+            'success': True,
+            'data': {
                 'results': results,
                 'count': len(results),
                 'query': q
-            }
-        )
+            },
+            'error': None
+        })
         
     except Exception as e:
         logger.error(f"Fast search error: {e}")
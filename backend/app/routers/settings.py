@@ -1,17 +1,10 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from .. import crud, schemas
-from ..database import SessionLocal
+from ..database import get_db
 
 router = APIRouter(prefix="/settings", tags=["settings"])
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
 @router.get("/ai", response_model=schemas.APIResponse[schemas.AppSettingsRead])
 def read_settings(db: Session = Depends(get_db)):
     settings = crud.get_settings(db)
@@ -4,7 +4,7 @@ from pydantic import BaseModel
 from app.schemas import APIResponse
 from app.services.sync_service import sync_service
 from app.services.google_drive_service import get_drive_service
-from app.database import SessionLocal
+from app.database import get_db
 from app.middleware.vault_middleware import require_unlocked_vault
 from pathlib import Path
 import logging
@@ -16,14 +16,6 @@ logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/sync", tags=["sync"])
 
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
-
 class ConflictResolveRequest(BaseModel):
     strategy: str  # keep_local, use_remote, merge
     remote_snapshot_path: str = None
@@ -33,7 +25,7 @@ class ConflictResolveRequest(BaseModel):
 def get_sync_status(db: Session = Depends(get_db)):
     """Get sync status and device info"""
     try:
-        sync_state = sync_service.get_or_create_sync_state(db)
+        sync_state = sync_service.get_sync_state(db)
         drive_svc = get_drive_service()
         drive_status = drive_svc.get_status()
         
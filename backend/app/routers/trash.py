@@ -2,9 +2,9 @@ from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from app.schemas import APIResponse
 from app.services.version_service import version_service, audit_service
-from app.database import SessionLocal
+from app.database import get_db
 from app.middleware.vault_middleware import require_unlocked_vault
-from app import models
+from app import models, crud
 import logging
 
 logger = logging.getLogger(__name__)
@@ -12,33 +12,32 @@ logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/trash", tags=["trash"])
 
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
-
 @router.get("", response_model=APIResponse[dict], dependencies=[Depends(require_unlocked_vault)])
 def get_trash(db: Session = Depends(get_db)):
     """Get all deleted memories"""
     try:
-        deleted_memories = db.query(models.Memory).filter(
+        # Only the preview is selected, never the full note
+        deleted_memories = db.query(
+            models.Memory.id,
+            models.Memory.title,
+            crud.MEMORY_COLUMNS['preview'].label('note'),
+            models.Memory.tags,
+            models.Memory.mood,
+            models.Memory.deleted_at,
+            models.Memory.created_at
+        ).filter(
             models.Memory.is_deleted == True
         ).order_by(models.Memory.deleted_at.desc()).all()
         
-        results = []
-        for mem in deleted_memories:
-            results.append({
-                'id': mem.id,
-                'title': mem.title,
-                'note': mem.note[:200],
-                'tags': mem.tags,
-                'mood': mem.mood,
-                'deleted_at': mem.deleted_at,
-                'created_at': mem.created_at.isoformat() if mem.created_at else None
-            })
+        results = [{
+            'id': mem.id,
+            'title': mem.title,
+            'note': mem.note,
+            'tags': mem.tags,
+            'mood': mem.mood,
+            'deleted_at': mem.deleted_at,
+            'created_at': mem.created_at.isoformat() if mem.created_at else None
+        } for mem in deleted_memories]
         
         return APIResponse(
             success=True,
@@ -2,7 +2,7 @@ from fastapi import APIRouter, Depends, Query
 from sqlalchemy.orm import Session
 from app.schemas import APIResponse
 from app.services.version_service import version_service, audit_service
-from app.database import SessionLocal
+from app.database import get_db
 from app.middleware.vault_middleware import require_unlocked_vault
 import logging
 
@@ -11,14 +11,6 @@ logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/versions", tags=["versions"])
 
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
-
 @router.get("/memory/{memory_id}", response_model=APIResponse[dict], dependencies=[Depends(require_unlocked_vault)])
 def get_memory_versions(memory_id: int, db: Session = Depends(get_db)):
     """Get all versions for a memory"""
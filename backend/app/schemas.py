@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field, field_validator, ConfigDict
-from typing import Optional, List, Generic, TypeVar, Any
+from typing import Optional, List, Generic, TypeVar, Any, Literal
 from datetime import datetime
 from enum import Enum
 
@@ -57,6 +57,34 @@ class MemoryRead(MemoryBase):
 
     model_config = ConfigDict(from_attributes=True)
 
+class MemoryListResponse(APIResponse[List[MemoryRead]]):
+    next_cursor: Optional[str] = None  # pass back as ?cursor= for the next page
+
+# --- Bulk Memory Schemas ---
+MAX_BULK_OPERATIONS = 10000
+
+class BulkMemoryOperation(BaseModel):
+    op: Literal["create", "update", "delete"]
+    id: Optional[int] = None  # required for update/delete
+    data: Optional[dict] = None  # MemoryCreate / MemoryUpdate fields, validated per item
+
+class BulkMemoryRequest(BaseModel):
+    operations: List[BulkMemoryOperation] = Field(..., min_length=1, max_length=MAX_BULK_OPERATIONS)
+
+class BulkMemoryItemResult(BaseModel):
+    index: int
+    op: str
+    success: bool
+    id: Optional[int] = None
+    error: Optional[dict] = None
+
+class BulkMemoryResponse(BaseModel):
+    results: List[BulkMemoryItemResult]
+    created: int
+    updated: int
+    deleted: int
+    failed: int
+
 # --- Settings Schemas ---
 class AppSettingsBase(BaseModel):
     ai_provider: str = "auto"
@@ -80,7 +108,19 @@ class AppSettingsUpdate(AppSettingsBase):
 class AppSettingsRead(AppSettingsBase):
     id: int
 
-    model_config = ConfigDict(from_attributes=True)
+    model_config = ConfigDict(from_attributes=True, frozen=True)
+
+# --- Sync State ---
+class SyncStateRead(BaseModel):
+    id: int
+    device_id: str
+    last_push_at: Optional[str] = None
+    last_pull_at: Optional[str] = None
+    last_sync_hash: Optional[str] = None
+    last_sync_file_id: Optional[str] = None
+    last_error: Optional[str] = None
+
+    model_config = ConfigDict(from_attributes=True, frozen=True)
 
 # --- Recap Schemas ---
 class MonthlyRecapResponse(BaseModel):
@@ -1,10 +1,13 @@
 import requests
+import httpx
+import asyncio
 import logging
 import os
 import json
 from openai import OpenAI
 from sqlalchemy.orm import Session
 from .. import crud, models
+from ..database import SessionLocal
 from .vector_store import vector_store
 
 # Configure logging
@@ -13,6 +16,10 @@ logger = logging.getLogger(__name__)
 
 OLLAMA_API_URL = "http://127.0.0.1:11434"
 
+# Concurrent chat generations sent to Ollama (a local model serves one at a time anyway)
+OLLAMA_CONCURRENCY = 2
+_ollama_slots = asyncio.Semaphore(OLLAMA_CONCURRENCY)
+
 class AIRouterService:
     def __init__(self):
         self.openai_client = None
@@ -20,9 +27,10 @@ class AIRouterService:
         if api_key:
             self.openai_client = OpenAI(api_key=api_key)
 
-    def get_ollama_models(self):
+    async def get_ollama_models(self):
         try:
-            res = requests.get(f"{OLLAMA_API_URL}/api/tags", timeout=2)
+            async with httpx.AsyncClient(timeout=2) as client:
+                res = await client.get(f"{OLLAMA_API_URL}/api/tags")
             if res.status_code == 200:
                 data = res.json()
                 models = [m["name"] for m in data.get("models", [])]
@@ -66,7 +74,7 @@ class AIRouterService:
         return reply + " 💬"
 
 
-    def _generate_local_reply(self, message: str, memories: list, model: str):
+    async def _generate_local_reply(self, message: str, memories: list, model: str):
         """Call Ollama with Context"""
         if not model or model == "none":
             raise Exception("No model selected")
@@ -95,7 +103,9 @@ class AIRouterService:
         }
 
         try:
-            res = requests.post(f"{OLLAMA_API_URL}/api/generate", json=payload, timeout=30)
+            async with _ollama_slots:
+                async with httpx.AsyncClient(timeout=30) as client:
+                    res = await client.post(f"{OLLAMA_API_URL}/api/generate", json=payload)
             if res.status_code == 200:
                 return res.json().get("response", "")
             else:
@@ -177,18 +187,21 @@ class AIRouterService:
         return response.choices[0].message.content
 
 
-    def chat(self, message: str, db: Session):
-        settings = crud.get_settings(db)
-        
-        # 1. Retrieve Context
-        top_k = 3 if settings.ai_provider == "auto" else 5
-        search_results = vector_store.search(message, top_k=top_k)
-        
-        memories = []
-        for mem_id, score in search_results:
-            m = crud.get_memory(db, mem_id)
-            if m:
-                memories.append(m)
+    def _retrieve_context(self, message: str):
+        """Settings and the memories most related to the message (DB and embedding work)"""
+        db = SessionLocal()
+        try:
+            settings = crud.get_settings(db)
+            top_k = 3 if settings.ai_provider == "auto" else 5
+            search_results = vector_store.search(message, top_k)
+            memories = crud.get_memories_by_ids(db, [mem_id for mem_id, _ in search_results])
+            return settings, memories
+        finally:
+            db.close()
+
+    async def chat(self, message: str):
+        # 1. Retrieve Context in a worker thread, off the event loop
+        settings, memories = await asyncio.to_thread(self._retrieve_context, message)
         
         memory_refs = [m.id for m in memories]
         reply = ""
@@ -196,9 +209,9 @@ class AIRouterService:
         # 2. Route Request
         try:
             if settings.ai_provider == "openai" and settings.openai_enabled:
-                 reply = self._generate_openai_reply(message, memories)
+                 reply = await asyncio.to_thread(self._generate_openai_reply, message, memories)
             elif settings.ai_provider == "local":
-                 reply = self._generate_local_reply(message, memories, settings.local_model)
+                 reply = await self._generate_local_reply(message, memories, settings.local_model)
             else:
                  reply = self._generate_auto_reply(message, memories)
         except Exception as e:
@@ -0,0 +1,40 @@
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from app import models
+from app.services.event_bus import event_bus
+
+# Session.info key for memory changes waiting for the commit
+PENDING_KEY = 'memory_change_events'
+
+
+def _pending(session) -> dict:
+    return session.info.setdefault(PENDING_KEY, {'created': set(), 'updated': set(), 'deleted': set()})
+
+
+# Changes are collected per flush and only announced once committed
+
+@event.listens_for(Session, "after_flush")
+def _collect_memory_changes(session, flush_context):
+    changes = None
+    for action, objects in (('created', session.new), ('updated', session.dirty), ('deleted', session.deleted)):
+        for obj in objects:
+            if isinstance(obj, models.Memory):
+                changes = changes or _pending(session)
+                changes[action].add(obj.id)
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_memory_changes(session):
+    changes = session.info.pop(PENDING_KEY, None)
+    if not changes:
+        return
+    # A memory created and edited in one transaction is just "created"
+    changes['updated'] -= changes['created'] | changes['deleted']
+    for action in ('created', 'updated', 'deleted'):
+        if changes[action]:
+            event_bus.publish(f"memory.{action}", {'ids': sorted(changes[action])})
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_memory_changes(session, previous_transaction):
+    session.info.pop(PENDING_KEY, None)
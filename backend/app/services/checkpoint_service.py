@@ -0,0 +1,104 @@
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from threading import Lock
+from typing import Dict, Optional
+from app.config import VAULT_CHECKPOINT_WRITES
+from app.database import get_database_path
+from app.services.vault_service import get_vault_service, vault_state
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Session.info flag: this transaction wrote something
+DIRTY_KEY = 'checkpoint_dirty'
+
+
+class CheckpointService:
+    """Background encrypted checkpoints of the app DB while the vault is unlocked"""
+
+    def __init__(self, write_threshold: int = VAULT_CHECKPOINT_WRITES):
+        self.write_threshold = write_threshold
+        self._writes = 0
+        self._lock = Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="vault-checkpoint")
+        self._pending: Optional[Future] = None
+        self.checkpoints = 0
+        self.last_checkpoint_at: Optional[str] = None
+        self.last_error: Optional[str] = None
+
+    def record_write(self):
+        """Count a committed transaction; checkpoints once enough have piled up"""
+        with self._lock:
+            self._writes += 1
+            due = self._writes >= self.write_threshold
+        if due:
+            self.request()
+
+    def request(self, force: bool = False) -> bool:
+        """Queue a checkpoint unless one is already queued or there is nothing new"""
+        if vault_state.state != "UNLOCKED":
+            return False
+        with self._lock:
+            if not force and not self._writes:
+                return False
+            if self._pending is not None and not self._pending.done():
+                return False
+            self._pending = self._executor.submit(self._run)
+            return True
+
+    def _run(self):
+        with self._lock:
+            writes, self._writes = self._writes, 0
+
+        success, error = get_vault_service().checkpoint()
+        if success:
+            self.checkpoints += 1
+            self.last_checkpoint_at = datetime.now().isoformat()
+            self.last_error = None
+        else:
+            # Try again on the next trigger
+            with self._lock:
+                self._writes += writes
+            self.last_error = error
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            return {
+                'pending_writes': self._writes,
+                'running': self._pending is not None and not self._pending.done(),
+                'checkpoints': self.checkpoints,
+                'last_checkpoint_at': self.last_checkpoint_at,
+                'last_error': self.last_error
+            }
+
+
+# Global instance
+checkpoint_service = CheckpointService()
+
+
+# --- Write counter: one per committed transaction that flushed changes to the app DB ---
+
+def _writes_app_db(session) -> bool:
+    """Only writes to the DB the checkpoint snapshots count (not scratch engines)"""
+    database = session.connection().engine.url.database
+    return bool(database) and Path(database).resolve() == Path(get_database_path()).resolve()
+
+
+@event.listens_for(Session, "after_flush")
+def _mark_dirty(session, flush_context):
+    if _writes_app_db(session):
+        session.info[DIRTY_KEY] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _count_commit(session):
+    if session.info.pop(DIRTY_KEY, False):
+        checkpoint_service.record_write()
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_dirty(session, previous_transaction):
+    session.info.pop(DIRTY_KEY, None)
@@ -0,0 +1,199 @@
+# Segmented AES-GCM format for vault files.
+#
+#   header  MAGIC | version (1) | chunk_size (u32) | salt (16)
+#   record  final flag + length (u32) | ciphertext + tag   (repeated)
+#
+# Every chunk but the last holds exactly chunk_size plaintext bytes, so chunk i
+# starts at HEADER_SIZE + i * record_size(chunk_size). Each file gets its own
+# AES key (HKDF of the vault key and the header salt); the nonce is the chunk
+# index plus a "last chunk" flag and the header is the associated data, so
+# reordering, truncation and header edits fail at the chunk where they happen.
+from cryptography.exceptions import InvalidTag
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF
+from typing import BinaryIO, Iterable, Iterator
+import base64
+import os
+import struct
+
+MAGIC = b"MLC1"
+VERSION = 1
+DEFAULT_CHUNK_SIZE = 1024 * 1024
+MAX_CHUNK_SIZE = 64 * 1024 * 1024
+
+_HEADER = struct.Struct(">4sBI16s")
+_RECORD = struct.Struct(">I")
+HEADER_SIZE = _HEADER.size
+TAG_SIZE = 16
+_FINAL_FLAG = 0x80000000
+
+
+class ChunkDecryptionError(Exception):
+    """A chunk failed authentication (wrong key, corruption, truncation)"""
+
+    def __init__(self, index: int, reason: str = "authentication failed"):
+        super().__init__(f"Chunk {index}: {reason}")
+        self.index = index
+
+
+def is_chunked(head: bytes) -> bool:
+    """True if the first bytes of a file are a chunked-format header"""
+    return head[:len(MAGIC)] == MAGIC
+
+
+def record_size(chunk_size: int) -> int:
+    """On-disk size of a full chunk"""
+    return _RECORD.size + chunk_size + TAG_SIZE
+
+
+def _file_cipher(key: bytes, salt: bytes) -> AESGCM:
+    # Vault keys are Fernet keys (urlsafe base64 of 32 bytes)
+    hkdf = HKDF(algorithm=hashes.SHA256(), length=32, salt=salt, info=b"mylife-vault-chunks")
+    return AESGCM(hkdf.derive(base64.urlsafe_b64decode(key)))
+
+
+def _nonce(index: int, final: bool) -> bytes:
+    return struct.pack(">7xIB", index, 1 if final else 0)
+
+
+def _read_full(src: BinaryIO, size: int) -> bytes:
+    """read() that only comes back short at end of stream"""
+    data = src.read(size)
+    if len(data) == size or not data:
+        return data
+    parts = [data]
+    remaining = size - len(data)
+    while remaining:
+        more = src.read(remaining)
+        if not more:
+            break
+        parts.append(more)
+        remaining -= len(more)
+    return b"".join(parts)
+
+
+def encrypt_stream(key: bytes, src: BinaryIO, dst: BinaryIO, chunk_size: int = DEFAULT_CHUNK_SIZE) -> int:
+    """Encrypt src into dst one chunk at a time; returns plaintext bytes written"""
+    header = _HEADER.pack(MAGIC, VERSION, chunk_size, os.urandom(16))
+    cipher = _file_cipher(key, header[-16:])
+    dst.write(header)
+
+    total = 0
+    index = 0
+    chunk = _read_full(src, chunk_size)
+    while True:
+        # Read one chunk ahead so the last one can be flagged
+        following = _read_full(src, chunk_size) if len(chunk) == chunk_size else b""
+        final = not following
+        sealed = cipher.encrypt(_nonce(index, final), chunk, header)
+        dst.write(_RECORD.pack(len(sealed) | (_FINAL_FLAG if final else 0)))
+        dst.write(sealed)
+        total += len(chunk)
+        if final:
+            return total
+        chunk = following
+        index += 1
+
+
+def iter_encrypt(key: bytes, pieces: Iterable[bytes], chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[bytes]:
+    """Encrypt plaintext pieces of any size as they arrive; yields the header, then one record per chunk"""
+    header = _HEADER.pack(MAGIC, VERSION, chunk_size, os.urandom(16))
+    cipher = _file_cipher(key, header[-16:])
+    yield header
+
+    index = 0
+    buffer = bytearray()
+    for piece in pieces:
+        buffer += piece
+        # Hold back at least one byte so the last chunk can be flagged
+        while len(buffer) > chunk_size:
+            sealed = cipher.encrypt(_nonce(index, False), bytes(buffer[:chunk_size]), header)
+            yield _RECORD.pack(len(sealed)) + sealed
+            del buffer[:chunk_size]
+            index += 1
+    sealed = cipher.encrypt(_nonce(index, True), bytes(buffer), header)
+    yield _RECORD.pack(len(sealed) | _FINAL_FLAG) + sealed
+
+
+def read_header(src: BinaryIO):
+    """Parse the header; returns (header bytes, chunk_size)"""
+    header = _read_full(src, HEADER_SIZE)
+    if len(header) != HEADER_SIZE or not is_chunked(header):
+        raise ValueError("Not a chunked vault file")
+    _, version, chunk_size, _ = _HEADER.unpack(header)
+    if version != VERSION:
+        raise ValueError(f"Unsupported chunked format version {version}")
+    if not 0 < chunk_size <= MAX_CHUNK_SIZE:
+        raise ValueError(f"Invalid chunk size {chunk_size}")
+    return header, chunk_size
+
+
+def iter_decrypt(key: bytes, src: BinaryIO, start_index: int = 0) -> Iterator[bytes]:
+    """Yield verified plaintext chunks, from chunk start_index to the end"""
+    # The encrypted data may follow a container prefix; src starts at the header
+    base = src.tell()
+    header, chunk_size = read_header(src)
+    cipher = _file_cipher(key, header[-16:])
+    if start_index:
+        src.seek(base + HEADER_SIZE + start_index * record_size(chunk_size))
+
+    index = start_index
+    while True:
+        prefix = _read_full(src, _RECORD.size)
+        if len(prefix) != _RECORD.size:
+            raise ChunkDecryptionError(index, "file is truncated")
+        (value,) = _RECORD.unpack(prefix)
+        final = bool(value & _FINAL_FLAG)
+        length = value & ~_FINAL_FLAG
+        if length > chunk_size + TAG_SIZE or (not final and length != chunk_size + TAG_SIZE):
+            raise ChunkDecryptionError(index, "bad chunk length")
+        sealed = _read_full(src, length)
+        if len(sealed) != length:
+            raise ChunkDecryptionError(index, "file is truncated")
+        try:
+            plaintext = cipher.decrypt(_nonce(index, final), sealed, header)
+        except InvalidTag:
+            raise ChunkDecryptionError(index)
+        yield plaintext
+        if final:
+            if src.read(1):
+                raise ChunkDecryptionError(index, "data after the last chunk")
+            return
+        index += 1
+
+
+def decrypt_stream(key: bytes, src: BinaryIO, dst: BinaryIO) -> int:
+    """Decrypt src into dst one chunk at a time; returns plaintext bytes written"""
+    total = 0
+    for chunk in iter_decrypt(key, src):
+        dst.write(chunk)
+        total += len(chunk)
+    return total
+
+
+def plaintext_size(src: BinaryIO) -> int:
+    """Plaintext length, from the header and the file size alone"""
+    base = src.tell()
+    _, chunk_size = read_header(src)
+    body = src.seek(0, 2) - base - HEADER_SIZE
+    full, remainder = divmod(body, record_size(chunk_size))
+    if remainder:
+        return full * chunk_size + max(remainder - _RECORD.size - TAG_SIZE, 0)
+    return full * chunk_size
+
+
+def iter_decrypt_range(key: bytes, src: BinaryIO, start: int, end: int) -> Iterator[bytes]:
+    """Yield plaintext bytes start..end (inclusive), decrypting only the chunks that cover them"""
+    base = src.tell()
+    _, chunk_size = read_header(src)
+    src.seek(base)
+    first = start // chunk_size
+    position = first * chunk_size
+    for chunk in iter_decrypt(key, src, start_index=first):
+        piece = chunk[max(start - position, 0):end + 1 - position]
+        if piece:
+            yield piece
+        position += len(chunk)
+        if position > end:
+            return
@@ -0,0 +1,97 @@
+from collections import deque
+from threading import Lock
+from typing import Any, Dict, List, Optional, Tuple
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Events kept for replay when a client reconnects with Last-Event-ID
+HISTORY_SIZE = 1000
+# Per-subscriber backlog; a subscriber that falls this far behind is dropped
+QUEUE_SIZE = 256
+
+
+class Subscriber:
+    """One connected client: a bounded queue owned by its event loop"""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, maxsize: int = QUEUE_SIZE):
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize=maxsize)
+        self.overflowed = False
+
+    def offer(self, event: Optional[Dict]):
+        """Runs on the subscriber's loop; a full queue ends the stream"""
+        if self.overflowed:
+            return
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # Drop the backlog and signal the stream to close; the client
+            # reconnects with Last-Event-ID and replays from history
+            self.overflowed = True
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(None)
+
+
+class EventBus:
+    """In-process pub/sub; publish() is safe from any thread"""
+
+    def __init__(self, history_size: int = HISTORY_SIZE, queue_size: int = QUEUE_SIZE):
+        self.queue_size = queue_size
+        self._history = deque(maxlen=history_size)
+        self._subscribers: List[Subscriber] = []
+        self._last_id = 0
+        self._lock = Lock()
+
+    def publish(self, event_type: str, data: Any = None) -> int:
+        """Record an event and hand it to every subscriber"""
+        with self._lock:
+            self._last_id += 1
+            event = {'id': self._last_id, 'type': event_type, 'data': data}
+            self._history.append(event)
+            for subscriber in list(self._subscribers):
+                try:
+                    subscriber.loop.call_soon_threadsafe(subscriber.offer, event)
+                except RuntimeError:
+                    # Loop already closed; the stream is gone
+                    self._subscribers.remove(subscriber)
+            return event['id']
+
+    def subscribe(self, loop: asyncio.AbstractEventLoop, last_event_id: Optional[int] = None) -> Tuple[Subscriber, List[Dict], Optional[int]]:
+        """Register a subscriber; returns it, the events to replay, and (when some were lost) the resync id.
+
+        The resync id sits just before the first replayed or queued event, read under
+        the same lock as the subscription so nothing published meanwhile is skipped.
+        """
+        subscriber = Subscriber(loop, self.queue_size)
+        with self._lock:
+            self._subscribers.append(subscriber)
+            if last_event_id is None:
+                return subscriber, [], None
+
+            replay = [e for e in self._history if e['id'] > last_event_id]
+            oldest_id = self._history[0]['id'] if self._history else self._last_id + 1
+            # Older than the history, or from before a restart
+            gap = last_event_id < oldest_id - 1 or last_event_id > self._last_id
+            if not gap:
+                return subscriber, replay, None
+            return subscriber, replay, replay[0]['id'] - 1 if replay else self._last_id
+
+    def unsubscribe(self, subscriber: Subscriber):
+        with self._lock:
+            if subscriber in self._subscribers:
+                self._subscribers.remove(subscriber)
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            return {
+                'subscribers': len(self._subscribers),
+                'last_event_id': self._last_id,
+                'history': len(self._history)
+            }
+
+
+# Global instance
+event_bus = EventBus()
@@ -1,6 +1,8 @@
 from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from typing import List, Dict, Optional
+from typing import Iterator, List, Dict, Optional
+from app import time_keys
 import logging
 
 logger = logging.getLogger(__name__)
@@ -82,6 +84,100 @@ class FTSSearchService:
             db.rollback()
             return False
     
+    def _row_to_dict(self, row) -> Dict:
+        return {
+            'id': row[0],
+            'title': row[1],
+            'note': row[2],
+            'tags': row[3],
+            'mood': row[4],
+            'timestamp': row[5],
+            'created_at': str(row[6]) if row[6] else None,
+            'rank': row[7]
+        }
+    
+    def _search_statements(self, query: str, month: Optional[str], mood: Optional[str], limit: int):
+        """(FTS statement, LIKE fallback), each as (sql, params); None for an empty query"""
+        # Build FTS query
+        # Escape special characters and prepare for MATCH
+        safe_query = query.replace('"', '""').strip()
+        if not safe_query:
+            return None
+        
+        fts_query = """
+            SELECT 
+                m.id,
+                m.title,
+                m.note,
+                m.tags,
+                m.mood,
+                m.timestamp,
+                m.created_at,
+                fts.rank
+            FROM memories_fts fts
+            JOIN memories m ON m.id = fts.memory_id
+            WHERE memories_fts MATCH :query
+        """
+        fts_params = {'query': safe_query}
+        
+        # Fallback to simple LIKE search
+        like_query = """
+            SELECT 
+                id,
+                title,
+                note,
+                tags,
+                mood,
+                timestamp,
+                created_at,
+                0 as rank
+            FROM memories
+            WHERE (title LIKE :query OR note LIKE :query OR tags LIKE :query)
+        """
+        like_params = {'query': f"%{query}%"}
+        
+        # Add filters
+        if month:
+            fts_query += " AND m.month_key = :month_key"
+            like_query += " AND month_key = :month_key"
+            fts_params['month_key'] = like_params['month_key'] = time_keys.month_key(month)
+        
+        if mood:
+            fts_query += " AND m.mood = :mood"
+            like_query += " AND mood = :mood"
+            fts_params['mood'] = like_params['mood'] = mood
+        
+        # Order by rank (or recency) and limit
+        fts_query += " ORDER BY fts.rank LIMIT :limit"
+        like_query += " ORDER BY created_at DESC LIMIT :limit"
+        fts_params['limit'] = like_params['limit'] = limit
+        
+        return (text(fts_query), fts_params), (text(like_query), like_params)
+    
+    def iter_search(
+        self,
+        db: Session,
+        query: str,
+        month: Optional[str] = None,
+        mood: Optional[str] = None,
+        limit: int = 20
+    ) -> Iterator[Dict]:
+        """Yield search results straight from the result cursor"""
+        statements = self._search_statements(query, month, mood, limit)
+        if statements is None:
+            return
+        fts, like = statements
+        
+        # Try FTS search first
+        try:
+            result = db.execute(*fts)
+        except Exception as fts_error:
+            logger.warning(f"FTS search failed, falling back to LIKE: {fts_error}")
+            result = db.execute(*like)
+        
+        for row in result:
+            yield self._row_to_dict(row)
+    
     def search(
         self,
         db: Session,
@@ -92,103 +188,31 @@ class FTSSearchService:
     ) -> List[Dict]:
         """Fast keyword search using FTS5"""
         try:
-            # Build FTS query
-            # Escape special characters and prepare for MATCH
-            safe_query = query.replace('"', '""').strip()
-            if not safe_query:
+            return list(self.iter_search(db, query, month, mood, limit))
+        except Exception as e:
+            logger.error(f"Search error: {e}")
+            return []
+    
+    async def search_async(
+        self,
+        session: AsyncSession,
+        query: str,
+        month: Optional[str] = None,
+        mood: Optional[str] = None,
+        limit: int = 20
+    ) -> List[Dict]:
+        """search() on an AsyncSession"""
+        try:
+            statements = self._search_statements(query, month, mood, limit)
+            if statements is None:
                 return []
-            
-            # Try FTS search first
+            fts, like = statements
             try:
-                base_query = """
-                    SELECT 
-                        m.id,
-                        m.title,
-                        m.note,
-                        m.tags,
-                        m.mood,
-                        m.timestamp,
-                        m.created_at,
-                        fts.rank
-                    FROM memories_fts fts
-                    JOIN memories m ON m.id = fts.memory_id
-                    WHERE memories_fts MATCH :query
-                """
-                
-                params = {'query': safe_query}
-                
-                # Add filters
-                if month:
-                    base_query += " AND m.timestamp LIKE :month"
-                    params['month'] = f"{month}%"
-                
-                if mood:
-                    base_query += " AND m.mood = :mood"
-                    params['mood'] = mood
-                
-                # Order by rank and limit
-                base_query += " ORDER BY fts.rank LIMIT :limit"
-                params['limit'] = limit
-                
-                result = db.execute(text(base_query), params)
-                rows = result.fetchall()
-                
-                return [{
-                    'id': row[0],
-                    'title': row[1],
-                    'note': row[2],
-                    'tags': row[3],
-                    'mood': row[4],
-                    'timestamp': row[5],
-                    'created_at': str(row[6]) if row[6] else None,
-                    'rank': row[7]
-                } for row in rows]
-                
+                result = await session.execute(*fts)
             except Exception as fts_error:
                 logger.warning(f"FTS search failed, falling back to LIKE: {fts_error}")
-                
-                # Fallback to simple LIKE search
-                base_query = """
-                    SELECT 
-                        id,
-                        title,
-                        note,
-                        tags,
-                        mood,
-                        timestamp,
-                        created_at,
-                        0 as rank
-                    FROM memories
-                    WHERE (title LIKE :query OR note LIKE :query OR tags LIKE :query)
-                """
-                
-                params = {'query': f"%{query}%"}
-                
-                if month:
-                    base_query += " AND timestamp LIKE :month"
-                    params['month'] = f"{month}%"
-                
-                if mood:
-                    base_query += " AND mood = :mood"
-                    params['mood'] = mood
-                
-                base_query += " ORDER BY created_at DESC LIMIT :limit"
-                params['limit'] = limit
-                
-                result = db.execute(text(base_query), params)
-                rows = result.fetchall()
-                
-                return [{
-                    'id': row[0],
-                    'title': row[1],
-                    'note': row[2],
-                    'tags': row[3],
-                    'mood': row[4],
-                    'timestamp': row[5],
-                    'created_at': str(row[6]) if row[6] else None,
-                    'rank': row[7]
-                } for row in rows]
-                
+                result = await session.execute(*like)
+            return [self._row_to_dict(row) for row in result]
         except Exception as e:
             logger.error(f"Search error: {e}")
             return []
@@ -0,0 +1,103 @@
+from sqlalchemy import event, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from itertools import chain
+from typing import Dict, Iterable
+from app import models
+from app.database import Base
+import hashlib
+import logging
+
+logger = logging.getLogger(__name__)
+
+BUMP = text("""
+    INSERT INTO data_generations (scope, generation) VALUES (:scope, 1)
+    ON CONFLICT(scope) DO UPDATE SET generation = generation + 1
+""")
+SET_GENERATION = text("""
+    INSERT INTO data_generations (scope, generation) VALUES (:scope, :generation)
+    ON CONFLICT(scope) DO UPDATE SET generation = excluded.generation
+""")
+
+# Derived tables change only together with their source table
+UNTRACKED_TABLES = {'data_generations', 'daily_stats', 'daily_mood_stats', 'daily_tag_stats'}
+
+
+def _bump(connection, tables: Iterable[str]):
+    rows = [{'scope': t} for t in sorted(set(tables) - UNTRACKED_TABLES)]
+    if rows:
+        connection.execute(BUMP, rows)
+
+
+# --- Write-path bumps (same transaction as the change itself) ---
+
+@event.listens_for(Session, "after_flush")
+def _generation_after_flush(session, flush_context):
+    tables = {
+        obj.__table__.name
+        for obj in chain(session.new, session.dirty, session.deleted)
+        if hasattr(obj, '__table__')
+    }
+    _bump(session.connection(), tables)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _generation_bulk_write(orm_execute_state):
+    # query.update()/query.delete() skip the flush
+    if (orm_execute_state.is_update or orm_execute_state.is_delete) and orm_execute_state.bind_mapper:
+        _bump(orm_execute_state.session.connection(), [orm_execute_state.bind_mapper.local_table.name])
+
+
+class GenerationService:
+
+    def ensure_ready(self, db: Session):
+        """Create the generation table on databases that predate it"""
+        models.DataGeneration.__table__.create(bind=db.get_bind(), checkfirst=True)
+
+    def get(self, db: Session, scopes: Iterable[str]) -> Dict[str, int]:
+        """Current generation per table (0 if never written)"""
+        scopes = list(scopes)
+        return _generations(scopes, db.execute(_generations_select(scopes)))
+
+    async def get_async(self, session: AsyncSession, scopes: Iterable[str]) -> Dict[str, int]:
+        scopes = list(scopes)
+        return _generations(scopes, await session.execute(_generations_select(scopes)))
+
+    def tracked_scopes(self) -> Iterable[str]:
+        """Every table whose writes bump a generation"""
+        return sorted(set(Base.metadata.tables) - UNTRACKED_TABLES)
+
+    def advance_all(self, db: Session, floor: Dict[str, int]):
+        """Move every generation past both its current value and floor (e.g. the values before a restore)"""
+        self.ensure_ready(db)
+        current = self.get(db, set(self.tracked_scopes()) | set(floor))
+        rows = [{'scope': scope, 'generation': max(value, floor.get(scope, 0)) + 1} for scope, value in current.items()]
+        db.execute(SET_GENERATION, rows)
+
+    def etag(self, db: Session, scopes: Iterable[str], *extra) -> str:
+        """Weak ETag for a view built from the given tables (plus extra inputs)"""
+        return _etag(self.get(db, scopes), extra)
+
+    async def etag_async(self, session: AsyncSession, scopes: Iterable[str], *extra) -> str:
+        return _etag(await self.get_async(session, scopes), extra)
+
+
+def _generations_select(scopes):
+    return select(models.DataGeneration.scope, models.DataGeneration.generation).where(
+        models.DataGeneration.scope.in_(scopes)
+    )
+
+
+def _generations(scopes, rows) -> Dict[str, int]:
+    generations = dict.fromkeys(scopes, 0)
+    generations.update(tuple(row) for row in rows)
+    return generations
+
+
+def _etag(generations: Dict[str, int], extra) -> str:
+    key = "|".join(chain((f"{s}:{g}" for s, g in sorted(generations.items())), map(str, extra)))
+    return f'W/"{hashlib.sha1(key.encode()).hexdigest()[:20]}"'
+
+
+# Global instance
+generation_service = GenerationService()
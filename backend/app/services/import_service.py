@@ -1,4 +1,5 @@
 import hashlib
+import json
 import os
 import re
 from pathlib import Path
@@ -7,10 +8,16 @@ from datetime import datetime
 from sqlalchemy.orm import Session
 from app import models
 from app.services.vault_service import get_vault_service
+from app.services.event_bus import event_bus
+from app.services.photo_store import photo_store
+from app.services.thumbnail_service import thumbnail_service
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Items between import.progress events
+PROGRESS_EVERY = 25
+
 
 class ImportService:
     
@@ -39,6 +46,17 @@ class ImportService:
             if status in ['success', 'failed']:
                 job.finished_at = datetime.now().isoformat()
             db.commit()
+            event_bus.publish('import.status', {
+                'job_id': job_id,
+                'type': job.type,
+                'status': status,
+                'details': details
+            })
+    
+    def report_progress(self, job_id: int, processed: int, total: int):
+        """Publish progress every PROGRESS_EVERY items (and on the last one)"""
+        if processed % PROGRESS_EVERY == 0 or processed == total:
+            event_bus.publish('import.progress', {'job_id': job_id, 'processed': processed, 'total': total})
     
     def get_file_hash(self, file_path: Path) -> str:
         """Calculate file hash for duplicate detection"""
@@ -71,18 +89,27 @@ class ImportService:
             skipped_count = 0
             failed_count = 0
             
-            # Track existing photos by hash (simplified - in production use better dedup)
-            existing_hashes = set()
+            # Photo ids are content hashes, so duplicates are caught across runs too
+            seen_ids = set()
             
-            for image_path in image_files:
+            for processed, image_path in enumerate(image_files, 1):
+                self.report_progress(job.id, processed, len(image_files))
                 try:
-                    # Check for duplicates
-                    file_hash = self.get_file_hash(image_path)
-                    if file_hash in existing_hashes:
+                    # Check for duplicates before paying for encryption
+                    with open(image_path, 'rb') as f:
+                        photo_id = get_vault_service().photo_id_for(f)
+                    blob = db.get(models.PhotoBlob, photo_id)
+                    if photo_id in seen_ids or (blob is not None and blob.ref_count > 0):
                         skipped_count += 1
                         continue
                     
-                    existing_hashes.add(file_hash)
+                    # Encrypt into the vault (reuses an identical orphaned photo)
+                    with open(image_path, 'rb') as f:
+                        photo_id, created = photo_store.add(db, f)
+                    
+                    seen_ids.add(photo_id)
+                    if created:
+                        thumbnail_service.submit(photo_id)
                     
                     # Create memory
                     memory = models.Memory(
@@ -90,12 +117,10 @@ class ImportService:
                         note="Imported from folder.",
                         mood="neutral",
                         tags="import,photo",
+                        photos=json.dumps([photo_id]),
                         timestamp=datetime.now().isoformat()
                     )
                     
-                    # TODO: Handle photo storage - for now skip actual file copy
-                    # In production: copy to vault storage or encrypt
-                    
                     db.add(memory)
                     db.commit()
                     imported_count += 1
@@ -163,7 +188,8 @@ class ImportService:
             # Create memories for each date
             imported_count = 0
             
-            for date_key, messages in messages_by_date.items():
+            for processed, (date_key, messages) in enumerate(messages_by_date.items(), 1):
+                self.report_progress(job.id, processed, len(messages_by_date))
                 try:
                     # Count participants
                     participants = {}
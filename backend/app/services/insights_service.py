@@ -1,32 +1,32 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import extract
 from collections import Counter
 from datetime import datetime, timedelta
-from .. import models, crud
+from .. import models, crud, time_keys
 from .ai_router import ai_router_service
+from .stats_service import daily_stats_service
 
 class InsightsService:
     def get_insights(self, db: Session, month: str = None):
-        # 1. Fetch Data
-        query = db.query(models.Memory)
+        # 1. Fetch Data (pre-aggregated per day)
+        start_key, end_key = None, None
+        period_filter = None
         
         if month:
             try:
-                target_date = datetime.strptime(month, "%Y-%m")
-                query = query.filter(
-                    extract('year', models.Memory.created_at) == target_date.year,
-                    extract('month', models.Memory.created_at) == target_date.month
-                )
+                start_key, end_key = time_keys.month_day_keys(month)
+                period_filter = models.Memory.month_key == time_keys.month_key(month)
             except ValueError:
                 pass # Ignore invalid month
-        else:
+        
+        if start_key is None:
             # Default to last 30 days
-            cutoff = datetime.now() - timedelta(days=30)
-            query = query.filter(models.Memory.created_at >= cutoff)
+            cutoff_epoch = time_keys.to_epoch(datetime.now() - timedelta(days=30))
+            start_key = time_keys.day_key(cutoff_epoch)
+            period_filter = models.Memory.occurred_at >= cutoff_epoch
             
-        memories = query.order_by(models.Memory.created_at.desc()).all()
+        stats = daily_stats_service.get_period_stats(db, start_key, end_key)
         
-        total = len(memories)
+        total = stats['total_memories']
         if total == 0:
             return {
                 "summary": "No data available for this period.",
@@ -37,18 +37,12 @@ class InsightsService:
             }
 
         # 2. Calculate Stats (Deterministic)
-        moods = [m.mood for m in memories if m.mood]
-        mood_breakdown = dict(Counter(moods))
-        
-        all_tags = []
-        for m in memories:
-            if m.tags:
-                all_tags.extend([t.strip() for t in m.tags.split(',') if t.strip()])
+        mood_breakdown = stats['mood_breakdown']
         
-        tag_counts = Counter(all_tags).most_common(5)
+        tag_counts = stats['tag_counts'][:5]
         focus_tags = [{"tag": t, "count": c} for t, c in tag_counts]
         
-        top_mood = Counter(moods).most_common(1)[0][0] if moods else "neutral"
+        top_mood = Counter(mood_breakdown).most_common(1)[0][0] if mood_breakdown else "neutral"
 
         # 3. Rule-Based Insights (Default/Fallback)
         summary = f"You created {total} memories. Your dominant mood was '{top_mood}'."
@@ -66,9 +60,9 @@ class InsightsService:
         
         try:
             if settings.ai_provider == 'openai' and settings.openai_enabled:
-                ai_result = ai_router_service.analyze_insights(memories, 'openai', None)
+                ai_result = ai_router_service.analyze_insights(self._recent_memories(db, period_filter), 'openai', None)
             elif settings.ai_provider == 'local' and settings.local_model != 'none':
-                ai_result = ai_router_service.analyze_insights(memories, 'local', settings.local_model)
+                ai_result = ai_router_service.analyze_insights(self._recent_memories(db, period_filter), 'local', settings.local_model)
         except Exception:
             pass # Fallback to rules
 
@@ -86,4 +80,11 @@ class InsightsService:
             "mood_breakdown": mood_breakdown
         }
 
+    def _recent_memories(self, db: Session, period_filter, limit: int = 40):
+        """Load only the rows the LLM prompt actually uses"""
+        return db.query(models.Memory).filter(
+            models.Memory.is_deleted == False,
+            period_filter
+        ).order_by(models.Memory.created_at.desc()).limit(limit).all()
+
 insights_service = InsightsService()
@@ -2,7 +2,8 @@ import random
 from datetime import datetime, timedelta
 from typing import Optional, List, Dict
 from sqlalchemy.orm import Session
-from app import models
+from app import models, time_keys
+from app.services.stats_service import daily_stats_service
 import logging
 
 logger = logging.getLogger(__name__)
@@ -131,14 +132,12 @@ class JournalService:
         try:
             start_date = datetime.strptime(week_start, "%Y-%m-%d")
             end_date = start_date + timedelta(days=7)
+            start_key, end_key = time_keys.day_key_range(week_start, days=7)
             
-            # Get memories for the week
-            memories = db.query(models.Memory).filter(
-                models.Memory.timestamp >= start_date.isoformat(),
-                models.Memory.timestamp < end_date.isoformat()
-            ).all()
+            # Pre-aggregated stats for the week
+            stats = daily_stats_service.get_period_stats(db, start_key, end_key)
             
-            if not memories:
+            if not stats['total_memories']:
                 return {
                     "week_start": week_start,
                     "week_end": end_date.strftime("%Y-%m-%d"),
@@ -150,38 +149,13 @@ class JournalService:
                 }
             
             # Calculate stats
-            total_memories = len(memories)
-            
-            # Mood breakdown
-            mood_counts = {}
-            for memory in memories:
-                mood = memory.mood or "neutral"
-                mood_counts[mood] = mood_counts.get(mood, 0) + 1
-            
-            # Top tags
-            tag_counts = {}
-            for memory in memories:
-                if memory.tags:
-                    tags = [t.strip() for t in memory.tags.split(',')]
-                    for tag in tags:
-                        if tag:
-                            tag_counts[tag] = tag_counts.get(tag, 0) + 1
-            
-            top_tags = sorted(tag_counts.items(), key=lambda x: x[1], reverse=True)[:5]
-            top_tags = [{"tag": tag, "count": count} for tag, count in top_tags]
+            total_memories = stats['total_memories']
+            mood_counts = stats['mood_breakdown']
+            top_tags = [{"tag": tag, "count": count} for tag, count in stats['tag_counts'][:5]]
             
             # Highlights (memories with photos or long notes)
-            highlights = []
-            for memory in memories:
-                if memory.photos or (memory.note and len(memory.note) > 100):
-                    highlights.append({
-                        "id": memory.id,
-                        "title": memory.title,
-                        "date": memory.timestamp[:10] if memory.timestamp else None,
-                        "mood": memory.mood
-                    })
-            
-            highlights = highlights[:5]  # Top 5
+            start_epoch, end_epoch = time_keys.day_epoch_range(week_start, days=7)
+            highlights = daily_stats_service.get_highlights(db, start_epoch, end_epoch, limit=5)
             
             # Summary
             summary = f"You created {total_memories} memories this week. "
@@ -0,0 +1,142 @@
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from collections import OrderedDict
+from threading import Lock
+from typing import Dict, Iterable, List, Optional
+from app import models
+from app.responses import dumps
+import logging
+
+logger = logging.getLogger(__name__)
+
+MAX_ENTRIES = 2000
+MAX_BYTES = 8 * 1024 * 1024
+
+# Session.info key for memory ids written in the current transaction
+PENDING_KEY = 'memory_cache_invalidations'
+
+
+class MemoryRowCache:
+    """Process-wide LRU of serialized Memory rows, keyed by (id, updated_at)"""
+
+    def __init__(self, max_entries: int = MAX_ENTRIES, max_bytes: int = MAX_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # id -> (updated_at, payload, size)
+        self._bytes = 0
+        self._epoch = 0
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def token(self) -> int:
+        """Taken before reading from the DB; put() ignores rows read before a later invalidation"""
+        with self._lock:
+            return self._epoch
+
+    def get_many(self, versions: Dict[int, object]) -> Dict[int, dict]:
+        """Cached payloads for {id: current updated_at}; entries for another version are dropped"""
+        found = {}
+        with self._lock:
+            for memory_id, updated_at in versions.items():
+                entry = self._entries.get(memory_id)
+                if entry is not None and entry[0] != updated_at:
+                    # Changed behind the session hooks (raw SQL, another process)
+                    del self._entries[memory_id]
+                    self._bytes -= entry[2]
+                    self.invalidations += 1
+                    entry = None
+                if entry is None:
+                    self.misses += 1
+                    continue
+                self._entries.move_to_end(memory_id)
+                found[memory_id] = entry[1]
+                self.hits += 1
+        return found
+
+    def put(self, memory_id: int, updated_at, payload: dict, token: int):
+        size = len(dumps(payload))
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if token != self._epoch:
+                return
+            current = self._entries.get(memory_id)
+            if current is not None:
+                if updated_at is not None and current[0] is not None and current[0] > updated_at:
+                    return
+                self._bytes -= current[2]
+            self._entries[memory_id] = (updated_at, payload, size)
+            self._entries.move_to_end(memory_id)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, (_, _, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+
+    def invalidate(self, memory_ids: Iterable[int]):
+        with self._lock:
+            self._epoch += 1
+            for memory_id in memory_ids:
+                entry = self._entries.pop(memory_id, None)
+                if entry is not None:
+                    self._bytes -= entry[2]
+                    self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._epoch += 1
+            self._entries.clear()
+            self._bytes = 0
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0,
+                'invalidations': self.invalidations
+            }
+
+
+# Global instance
+memory_cache = MemoryRowCache()
+
+
+# --- Invalidation on every committed Memory write (crud, trash, bulk, imports) ---
+
+@event.listens_for(Session, "after_flush")
+def _collect_memory_writes(session, flush_context):
+    ids = {
+        obj.id
+        for objects in (session.new, session.dirty, session.deleted)
+        for obj in objects
+        if isinstance(obj, models.Memory)
+    }
+    if ids:
+        session.info.setdefault(PENDING_KEY, set()).update(ids)
+        # Stop concurrent readers from caching rows that are about to change
+        memory_cache.invalidate(ids)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed(session):
+    ids = session.info.pop(PENDING_KEY, None)
+    if ids:
+        memory_cache.invalidate(ids)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_pending(session, previous_transaction):
+    session.info.pop(PENDING_KEY, None)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _invalidate_bulk_writes(orm_execute_state):
+    # query.update()/delete() don't say which rows they touch
+    if (orm_execute_state.is_update or orm_execute_state.is_delete) and \
+            orm_execute_state.bind_mapper is not None and orm_execute_state.bind_mapper.class_ is models.Memory:
+        memory_cache.clear()
@@ -0,0 +1,85 @@
+from collections import OrderedDict
+from threading import Lock
+from typing import Dict, Optional
+from app.config import PHOTO_CACHE_BYTES, PHOTO_CACHE_MAX_ENTRY_BYTES
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class PhotoCache:
+    """LRU of decrypted photo bytes under a byte budget; wiped when the vault locks"""
+
+    def __init__(self, max_bytes: int = PHOTO_CACHE_BYTES, max_entry_bytes: int = PHOTO_CACHE_MAX_ENTRY_BYTES):
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = max_entry_bytes
+        self._entries = OrderedDict()  # key -> bytearray
+        self._bytes = 0
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def accepts(self, size: int) -> bool:
+        """Whether a photo of this size is worth decrypting whole to cache"""
+        return 0 < size <= min(self.max_entry_bytes, self.max_bytes)
+
+    def get(self, key: str) -> Optional[bytearray]:
+        with self._lock:
+            data = self._entries.get(key)
+            if data is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return data
+
+    def put(self, key: str, data: bytes) -> bytearray:
+        entry = bytearray(data)
+        if not self.accepts(len(entry)):
+            return entry
+        with self._lock:
+            current = self._entries.pop(key, None)
+            if current is not None:
+                self._bytes -= len(current)
+            self._entries[key] = entry
+            self._bytes += len(entry)
+            while self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= len(evicted)
+                self.evictions += 1
+        return entry
+
+    def invalidate(self, key: str):
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                self._bytes -= len(entry)
+
+    def clear(self):
+        """Drop every entry and overwrite the plaintext still held in them"""
+        with self._lock:
+            entries = list(self._entries.values())
+            self._entries.clear()
+            self._bytes = 0
+        for entry in entries:
+            entry[:] = bytes(len(entry))
+        if entries:
+            logger.info(f"Photo cache wiped ({len(entries)} entries)")
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0,
+                'evictions': self.evictions
+            }
+
+
+# Global instance
+photo_cache = PhotoCache()
@@ -0,0 +1,245 @@
+from sqlalchemy import event, inspect, or_, text
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from collections import Counter
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import BinaryIO, Dict, Optional, Set, Tuple
+from app import models
+from app.config import PHOTO_GC_BATCH_SIZE, PHOTO_GC_GRACE_HOURS, PHOTO_GC_QUARANTINE, UPLOAD_WORKERS
+from app.services import chunked_crypto
+from app.services.photo_cache import photo_cache
+from app.services.vault_service import get_vault_service, vault_state
+import json
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+ADJUST_REFS = text("UPDATE photo_blobs SET ref_count = ref_count + :delta WHERE id = :id")
+OLD_PHOTOS = text("SELECT photos FROM memories WHERE id = :id")
+OLD_SNAPSHOT_PHOTOS = text("SELECT snapshot_photos FROM memory_versions WHERE id = :id")
+
+# Session.info flag: a bulk Memory/MemoryVersion write needs a full recount after commit
+RECOUNT_KEY = 'photo_refs_recount'
+
+
+def photo_refs(photos) -> Counter:
+    """Photo ids referenced by a memories.photos value (ids or /media/photo/<id> URLs)"""
+    if not photos:
+        return Counter()
+    if isinstance(photos, str):
+        try:
+            photos = json.loads(photos)
+        except ValueError:
+            return Counter()
+    return Counter(
+        entry.split('?', 1)[0].rstrip('/').rsplit('/', 1)[-1]
+        for entry in photos
+        if isinstance(entry, str) and entry
+    )
+
+
+class PhotoStore:
+    """Content-addressed vault photos with reference counts from memories and saved versions"""
+
+    def __init__(self, workers: int = UPLOAD_WORKERS):
+        # Hashing, AES-GCM and file writes release the GIL, so uploads scale with cores
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="photo-upload")
+        self.last_gc: Optional[Dict] = None
+
+    def add(self, db: Session, src: BinaryIO) -> Tuple[str, bool]:
+        """Store a photo; an identical one already in the vault is reused. Returns (photo_id, created)"""
+        photo_id, size, created = get_vault_service().store_photo(src)
+        self.register(db, photo_id, size)
+        return photo_id, created
+
+    def submit(self, src: BinaryIO) -> Future:
+        """Encrypt a photo on the upload pool; the future gives (photo_id, size, created). Call register() after"""
+        return self._executor.submit(get_vault_service().store_photo, src)
+
+    def register(self, db: Session, photo_id: str, size: int):
+        """Add the photo_blobs row for a stored photo if it has none"""
+        if db.get(models.PhotoBlob, photo_id) is None:
+            db.add(models.PhotoBlob(id=photo_id, size=size, ref_count=0))
+            try:
+                db.commit()
+            except IntegrityError:
+                # Same photo uploaded concurrently
+                db.rollback()
+
+    def recount(self, db: Session) -> Dict:
+        """Rebuild every ref_count from memories and versions, and register photo files that have no row"""
+        vault_svc = get_vault_service()
+        known = {blob_id for (blob_id,) in db.query(models.PhotoBlob.id)}
+        for path in vault_svc.encrypted_photos_dir.glob("*.enc"):
+            if path.stem not in known:
+                with open(path, 'rb') as f:
+                    head = f.read(chunked_crypto.HEADER_SIZE)
+                    f.seek(0)
+                    size = chunked_crypto.plaintext_size(f) if chunked_crypto.is_chunked(head) else 0
+                db.add(models.PhotoBlob(id=path.stem, size=size, ref_count=0))
+                known.add(path.stem)
+
+        counts = Counter()
+        for column in (models.Memory.photos, models.MemoryVersion.snapshot_photos):
+            for (photos,) in db.query(column).yield_per(1000):
+                counts.update(photo_refs(photos))
+
+        db.query(models.PhotoBlob).update({models.PhotoBlob.ref_count: 0}, synchronize_session=False)
+        rows = [{'id': blob_id, 'delta': count} for blob_id, count in counts.items() if blob_id in known]
+        if rows:
+            db.execute(ADJUST_REFS, rows)
+        db.commit()
+        return {'photos': len(known), 'referenced': len(rows)}
+
+    def still_referenced(self, db: Session, photo_ids) -> Set[str]:
+        """Which of these ids a memory (trashed ones included) or saved version still names"""
+        photo_ids = set(photo_ids)
+        found = set()
+        for column in (models.Memory.photos, models.MemoryVersion.snapshot_photos):
+            rows = db.query(column).filter(or_(*[column.contains(photo_id, autoescape=True) for photo_id in photo_ids]))
+            for (photos,) in rows.yield_per(1000):
+                found.update(photo_refs(photos).keys() & photo_ids)
+        return found
+
+    def collect_garbage(self, db: Session, grace_hours: int = PHOTO_GC_GRACE_HOURS,
+                        quarantine: bool = PHOTO_GC_QUARANTINE, batch_size: int = PHOTO_GC_BATCH_SIZE) -> Dict:
+        """Delete (or quarantine) photos with no references; fresh uploads get a grace period to be attached"""
+        if vault_state.state != "UNLOCKED":
+            return {'skipped': 'vault locked'}
+
+        vault_svc = get_vault_service()
+        # ref_count covers memories and versions; files without a row were never counted
+        candidates = {blob_id for (blob_id,) in db.query(models.PhotoBlob.id).filter(models.PhotoBlob.ref_count <= 0)}
+        known = {blob_id for (blob_id,) in db.query(models.PhotoBlob.id)}
+        candidates.update(path.stem for path in vault_svc.encrypted_photos_dir.glob("*.enc") if path.stem not in known)
+
+        cutoff = time.time() - grace_hours * 3600
+        candidates = [
+            photo_id for photo_id in candidates
+            if not (path := vault_svc.get_encrypted_photo_path(photo_id)).exists() or path.stat().st_mtime < cutoff
+        ]
+
+        # Last look at the rows themselves, so a drifted count never costs a photo
+        orphans = []
+        kept = 0
+        for i in range(0, len(candidates), batch_size):
+            batch = candidates[i:i + batch_size]
+            referenced = self.still_referenced(db, batch)
+            kept += len(referenced)
+            orphans.extend(photo_id for photo_id in batch if photo_id not in referenced)
+        if kept:
+            logger.warning(f"Photo GC kept {kept} photos with ref_count 0 that are still referenced")
+
+        reclaimed = 0
+        for i in range(0, len(orphans), batch_size):
+            batch = orphans[i:i + batch_size]
+            for photo_id in batch:
+                reclaimed += self._delete_files(vault_svc, photo_id, quarantine)
+            db.query(models.PhotoBlob).filter(models.PhotoBlob.id.in_(batch)).delete(synchronize_session=False)
+            db.commit()
+
+        # Thumbnails whose original is gone (e.g. removed by hand)
+        for path in vault_svc.thumbnails_dir.glob("*.enc"):
+            if not vault_svc.get_encrypted_photo_path(path.stem.rsplit('_', 1)[0]).exists():
+                reclaimed += path.stat().st_size
+                path.unlink()
+
+        result = {
+            'candidates': len(candidates),
+            'kept': kept,
+            'removed': len(orphans),
+            'quarantined': quarantine,
+            'reclaimed_bytes': reclaimed
+        }
+        self.last_gc = dict(result, finished_at=datetime.now().isoformat())
+        if orphans:
+            action = "quarantined" if quarantine else "removed"
+            logger.info(f"Photo GC {action} {len(orphans)} orphaned photos ({reclaimed} bytes)")
+        return result
+
+    def get_stats(self) -> Dict:
+        return {'last_gc': self.last_gc}
+
+    def _delete_files(self, vault_svc, photo_id: str, quarantine: bool = False) -> int:
+        paths = [vault_svc.get_encrypted_photo_path(photo_id)]
+        paths.extend(vault_svc.thumbnails_dir.glob(f"{photo_id}_*.enc"))
+        reclaimed = 0
+        for path in paths:
+            if not path.exists():
+                continue
+            reclaimed += path.stat().st_size
+            if quarantine and path.parent == vault_svc.encrypted_photos_dir:
+                # Still encrypted; moved aside for manual review instead of deleted
+                vault_svc.quarantine_dir.mkdir(exist_ok=True)
+                path.replace(vault_svc.quarantine_dir / path.name)
+            else:
+                path.unlink()
+        for key in [photo_id] + [f"{photo_id}@{p.stem.rsplit('_', 1)[-1]}" for p in paths[1:]]:
+            photo_cache.invalidate(key)
+        return reclaimed
+
+
+# Global instance
+photo_store = PhotoStore()
+
+
+# --- Reference counting on every Memory/MemoryVersion write (same transaction as the write) ---
+
+def _old_photos(connection, statement, row_id) -> Counter:
+    row = connection.execute(statement, {'id': row_id}).first()
+    return photo_refs(row[0]) if row else Counter()
+
+
+@event.listens_for(Session, "before_flush")
+def _adjust_photo_refs(session, flush_context, instances):
+    delta = Counter()
+    for obj in session.new:
+        if isinstance(obj, models.Memory):
+            delta.update(photo_refs(obj.photos))
+        elif isinstance(obj, models.MemoryVersion):
+            delta.update(photo_refs(obj.snapshot_photos))
+    for obj in session.dirty:
+        if isinstance(obj, models.Memory) and inspect(obj).attrs.photos.history.has_changes():
+            delta.update(photo_refs(obj.photos))
+            delta.subtract(_old_photos(session.connection(), OLD_PHOTOS, obj.id))
+        elif isinstance(obj, models.MemoryVersion) and inspect(obj).attrs.snapshot_photos.history.has_changes():
+            delta.update(photo_refs(obj.snapshot_photos))
+            delta.subtract(_old_photos(session.connection(), OLD_SNAPSHOT_PHOTOS, obj.id))
+    for obj in session.deleted:
+        if isinstance(obj, models.Memory):
+            delta.subtract(_old_photos(session.connection(), OLD_PHOTOS, obj.id))
+        elif isinstance(obj, models.MemoryVersion):
+            delta.subtract(_old_photos(session.connection(), OLD_SNAPSHOT_PHOTOS, obj.id))
+
+    rows = [{'id': photo_id, 'delta': count} for photo_id, count in delta.items() if count]
+    if rows:
+        session.connection().execute(ADJUST_REFS, rows)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _flag_bulk_memory_writes(orm_execute_state):
+    # query.update()/delete() don't say which photos they touch
+    if (orm_execute_state.is_update or orm_execute_state.is_delete) and \
+            orm_execute_state.bind_mapper is not None and \
+            orm_execute_state.bind_mapper.class_ in (models.Memory, models.MemoryVersion):
+        orm_execute_state.session.info[RECOUNT_KEY] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _recount_after_bulk(session):
+    if session.info.pop(RECOUNT_KEY, False):
+        from app.database import SessionLocal
+        db = SessionLocal()
+        try:
+            photo_store.recount(db)
+        except Exception as e:
+            logger.error(f"Photo ref recount failed: {e}")
+        finally:
+            db.close()
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_recount(session, previous_transaction):
+    session.info.pop(RECOUNT_KEY, None)
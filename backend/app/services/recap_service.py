@@ -1,25 +1,21 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import extract
 from collections import Counter
-from datetime import datetime
-from .. import models, schemas, crud
+from .. import models, schemas, crud, time_keys
 from .ai_router import ai_router_service
+from .stats_service import daily_stats_service
 
 def generate_monthly_recap(db: Session, month: str) -> schemas.MonthlyRecapResponse:
     # 1. Fetch memories for the month
     try:
-        target_date = datetime.strptime(month, "%Y-%m")
+        target_key = time_keys.month_key(month)
+        start_key, end_key = time_keys.month_day_keys(month)
     except ValueError:
         return schemas.MonthlyRecapResponse(
             month=month, total_memories=0, highlights=[], mood_hint="unknown", summary="Invalid date format."
         )
 
-    memories = db.query(models.Memory).filter(
-        extract('year', models.Memory.created_at) == target_date.year,
-        extract('month', models.Memory.created_at) == target_date.month
-    ).order_by(models.Memory.created_at.desc()).all()
-
-    total_memories = len(memories)
+    stats = daily_stats_service.get_period_stats(db, start_key, end_key)
+    total_memories = stats['total_memories']
     
     if total_memories == 0:
         return schemas.MonthlyRecapResponse(
@@ -31,11 +27,13 @@ def generate_monthly_recap(db: Session, month: str) -> schemas.MonthlyRecapRespo
         )
 
     # 2. Base Statistics (shared)
-    highlights = [m.title for m in memories[:3]]
-    moods = [m.mood for m in memories if m.mood]
+    month_filter = (models.Memory.is_deleted == False, models.Memory.month_key == target_key)
+    highlights = [row.title for row in db.query(models.Memory.title).filter(
+        *month_filter
+    ).order_by(models.Memory.created_at.desc()).limit(3)]
     mood_hint = "neutral"
-    if moods:
-        mood_hint = Counter(moods).most_common(1)[0][0]
+    if stats['mood_breakdown']:
+        mood_hint = Counter(stats['mood_breakdown']).most_common(1)[0][0]
 
     # 3. Generate Summary
     summary = ""
@@ -44,6 +42,10 @@ def generate_monthly_recap(db: Session, month: str) -> schemas.MonthlyRecapRespo
     # Try OpenAI if enabled
     if settings.ai_provider == "openai" and settings.openai_enabled:
         try:
+            # The prompt only uses the 30 most recent entries
+            memories = db.query(models.Memory).filter(
+                *month_filter
+            ).order_by(models.Memory.created_at.desc()).limit(30).all()
             summary = ai_router_service.generate_recap_openai(memories)
         except Exception as e:
             print(f"OpenAI Recap failed: {e}")
@@ -52,13 +54,7 @@ def generate_monthly_recap(db: Session, month: str) -> schemas.MonthlyRecapRespo
             
     # Auto Mode Logic (Fallback or Default)
     if not summary:
-        all_tags = []
-        for m in memories:
-            if m.tags:
-                tags_list = [t.strip() for t in m.tags.split(",") if t.strip()]
-                all_tags.extend(tags_list)
-        
-        top_tags = [tag for tag, count in Counter(all_tags).most_common(3)]
+        top_tags = [tag for tag, count in stats['tag_counts'][:3]]
         tags_str = ", ".join(top_tags)
         
         summary = f"You recorded {total_memories} memories this month."
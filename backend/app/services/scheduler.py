@@ -1,6 +1,7 @@
 from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.triggers.interval import IntervalTrigger
 from apscheduler.triggers.cron import CronTrigger
+from apscheduler.events import EVENT_JOB_EXECUTED, EVENT_JOB_ERROR
 from sqlalchemy.orm import Session
 from datetime import datetime, timedelta
 import logging
@@ -9,6 +10,11 @@ from .. import models, crud
 from ..database import SessionLocal
 from ..services import recap_service
 from ..services.vector_store import vector_store
+from ..services.event_bus import event_bus
+from ..services.checkpoint_service import checkpoint_service
+from ..services.thumbnail_service import thumbnail_service
+from ..services.photo_store import photo_store
+from ..config import VAULT_CHECKPOINT_MINUTES
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -72,8 +78,43 @@ def job_refresh_embeddings():
     pass
 
 
+def job_vault_checkpoint():
+    """Encrypt recent runtime DB changes into the vault (no-op when locked or idle)"""
+    if checkpoint_service.request():
+        logger.info("Running job: Vault Checkpoint")
+
+
+def job_thumbnail_backfill():
+    """Create thumbnails for photos that don't have them yet (no-op when locked)"""
+    logger.info("Running job: Thumbnail Backfill")
+    thumbnail_service.backfill()
+
+
+def job_photo_gc():
+    """Remove encrypted photos no memory or version references (no-op when locked)"""
+    logger.info("Running job: Photo GC")
+    db = SessionLocal()
+    try:
+        result = photo_store.collect_garbage(db)
+        logger.info(f"Photo GC: {result}")
+    except Exception as e:
+        logger.error(f"Photo GC Failed: {e}")
+    finally:
+        db.close()
+
+
+def _announce_job(event):
+    """Push job completion to /events subscribers"""
+    event_bus.publish('job.completed', {
+        'job_id': event.job_id,
+        'success': event.exception is None,
+        'error': str(event.exception) if event.exception else None
+    })
+
 def start_scheduler():
     if not scheduler.running:
+        scheduler.add_listener(_announce_job, EVENT_JOB_EXECUTED | EVENT_JOB_ERROR)
+
         # (A) Monthly Recap: Daily at 01:00
         scheduler.add_job(
             job_generate_daily_recap,
@@ -91,6 +132,30 @@ def start_scheduler():
             next_run_time=datetime.now() # Run once on startup too
         )
 
+        # (C) Vault checkpoint: interval; commits also trigger it past a threshold
+        scheduler.add_job(
+            job_vault_checkpoint,
+            IntervalTrigger(minutes=VAULT_CHECKPOINT_MINUTES),
+            id="job_vault_checkpoint",
+            replace_existing=True
+        )
+
+        # (D) Thumbnail backfill: every 30 mins
+        scheduler.add_job(
+            job_thumbnail_backfill,
+            IntervalTrigger(minutes=30),
+            id="job_thumbnail_backfill",
+            replace_existing=True
+        )
+
+        # (E) Orphaned photo cleanup: Daily at 03:00
+        scheduler.add_job(
+            job_photo_gc,
+            CronTrigger(hour=3, minute=0),
+            id="job_photo_gc",
+            replace_existing=True
+        )
+
         scheduler.start()
         logger.info("Scheduler Started.")
 
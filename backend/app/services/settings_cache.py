@@ -0,0 +1,94 @@
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from threading import Lock
+from typing import Callable, Dict, Generic, Optional, TypeVar
+from app import models
+import logging
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar('T')
+
+# Session.info key for singleton tables written in the current transaction
+PENDING_KEY = 'singleton_cache_invalidations'
+
+
+class SingletonCache(Generic[T]):
+    """Immutable snapshot of a single-row table, loaded once and shared across threads"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._value: Optional[T] = None
+        self._epoch = 0
+        self._lock = Lock()
+        self.loads = 0
+        self.hits = 0
+
+    def get(self, db: Session, loader: Callable[[Session], T]) -> T:
+        with self._lock:
+            value = self._value
+            if value is not None:
+                self.hits += 1
+                return value
+            epoch = self._epoch
+        value = loader(db)
+        with self._lock:
+            # A write committed while we were loading; hand back what we read
+            # but let the next caller load again
+            if epoch == self._epoch:
+                self._value = value
+            self.loads += 1
+        return value
+
+    def invalidate(self):
+        with self._lock:
+            self._epoch += 1
+            self._value = None
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            return {'cached': self._value is not None, 'loads': self.loads, 'hits': self.hits}
+
+
+# Global instances
+settings_cache: SingletonCache = SingletonCache('app_settings')
+sync_state_cache: SingletonCache = SingletonCache('sync_state')
+
+CACHES = {
+    models.AppSettings: settings_cache,
+    models.SyncState: sync_state_cache
+}
+
+
+# --- Refresh after every committed write to a cached row ---
+
+def _touched(objects) -> set:
+    return {CACHES[type(obj)] for obj in objects if type(obj) in CACHES}
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_singleton_writes(session, flush_context):
+    caches = _touched(session.new) | _touched(session.dirty) | _touched(session.deleted)
+    if caches:
+        session.info.setdefault(PENDING_KEY, set()).update(caches)
+        # Don't let a concurrent load cache the pre-commit row
+        for cache in caches:
+            cache.invalidate()
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed(session):
+    for cache in session.info.pop(PENDING_KEY, ()):
+        cache.invalidate()
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_pending(session, previous_transaction):
+    session.info.pop(PENDING_KEY, None)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _invalidate_bulk_writes(orm_execute_state):
+    if (orm_execute_state.is_update or orm_execute_state.is_delete) and \
+            orm_execute_state.bind_mapper is not None and orm_execute_state.bind_mapper.class_ in CACHES:
+        CACHES[orm_execute_state.bind_mapper.class_].invalidate()
@@ -0,0 +1,350 @@
+from sqlalchemy import event, func, inspect, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, object_session
+from collections import Counter
+from typing import Optional, List, Dict
+from app import models, time_keys
+import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Memory columns that feed the daily aggregates
+TRACKED_FIELDS = ('occurred_at', 'mood', 'tags', 'note', 'photos', 'is_deleted')
+
+STATS_ROW_SQL = """
+    SELECT occurred_at, mood, tags, length(note), photos, is_deleted
+    FROM memories
+"""
+
+STORED_ROW = text(STATS_ROW_SQL + " WHERE id = :id")
+
+UPSERT_DAY = text("""
+    INSERT INTO daily_stats (day_key, memory_count, char_count, photo_count)
+    VALUES (:day_key, :memories, :chars, :photos)
+    ON CONFLICT(day_key) DO UPDATE SET
+        memory_count = memory_count + excluded.memory_count,
+        char_count = char_count + excluded.char_count,
+        photo_count = photo_count + excluded.photo_count
+""")
+UPSERT_MOOD = text("""
+    INSERT INTO daily_mood_stats (day_key, mood, count) VALUES (:day_key, :mood, :n)
+    ON CONFLICT(day_key, mood) DO UPDATE SET count = count + excluded.count
+""")
+UPSERT_TAG = text("""
+    INSERT INTO daily_tag_stats (day_key, tag, count) VALUES (:day_key, :tag, :n)
+    ON CONFLICT(day_key, tag) DO UPDATE SET count = count + excluded.count
+""")
+PRUNE_DAY = text("DELETE FROM daily_stats WHERE day_key = :day_key AND memory_count <= 0")
+PRUNE_MOOD = text("DELETE FROM daily_mood_stats WHERE day_key = :day_key AND mood = :mood AND count <= 0")
+PRUNE_TAG = text("DELETE FROM daily_tag_stats WHERE day_key = :day_key AND tag = :tag AND count <= 0")
+
+# Session.info key for deltas collected during a flush
+PENDING_KEY = 'daily_stats_delta'
+# Session.info flag: a bulk Memory write needs a full rebuild before commit
+REBUILD_KEY = 'daily_stats_rebuild'
+
+
+def split_tags(tags: Optional[str]) -> List[str]:
+    """Split a comma-separated tag string the same way the reports always have"""
+    if not tags:
+        return []
+    return [t.strip() for t in tags.split(',') if t.strip()]
+
+
+def count_photos(photos) -> int:
+    """Number of photos in a memory's JSON photo list"""
+    if not photos:
+        return 0
+    try:
+        value = json.loads(photos) if isinstance(photos, str) else photos
+    except (TypeError, ValueError):
+        return 0
+    return len(value) if isinstance(value, list) else 0
+
+
+class StatsDelta:
+    """Signed per-day contributions, collected before being written in one go"""
+
+    def __init__(self):
+        self.days = {}  # day_key -> [memories, chars, photos]
+        self.moods = Counter()  # (day_key, mood) -> count
+        self.tags = Counter()  # (day_key, tag) -> count
+
+    def add(self, occurred_at, mood, tags, chars, photos, is_deleted, sign: int = 1):
+        """Add (sign=1) or remove (sign=-1) one memory's contribution"""
+        if is_deleted or occurred_at is None:
+            return
+
+        day = time_keys.day_key(occurred_at)
+        totals = self.days.setdefault(day, [0, 0, 0])
+        totals[0] += sign
+        totals[1] += sign * (chars or 0)
+        totals[2] += sign * count_photos(photos)
+
+        mood = getattr(mood, 'value', mood) or 'neutral'
+        self.moods[(day, mood)] += sign
+        for tag in split_tags(tags):
+            self.tags[(day, tag)] += sign
+
+    def write(self, connection):
+        """Upsert the accumulated deltas and drop rows that reached zero"""
+        day_rows = [
+            {'day_key': day, 'memories': n, 'chars': c, 'photos': p}
+            for day, (n, c, p) in self.days.items() if n or c or p
+        ]
+        mood_rows = [{'day_key': d, 'mood': m, 'n': n} for (d, m), n in self.moods.items() if n]
+        tag_rows = [{'day_key': d, 'tag': t, 'n': n} for (d, t), n in self.tags.items() if n]
+
+        for upsert, prune, rows, count_field in (
+            (UPSERT_DAY, PRUNE_DAY, day_rows, 'memories'),
+            (UPSERT_MOOD, PRUNE_MOOD, mood_rows, 'n'),
+            (UPSERT_TAG, PRUNE_TAG, tag_rows, 'n'),
+        ):
+            if not rows:
+                continue
+            connection.execute(upsert, rows)
+            emptied = [r for r in rows if r[count_field] < 0]
+            if emptied:
+                connection.execute(prune, emptied)
+
+
+def rebuild_stats(connection) -> int:
+    """Recompute every daily aggregate from the memories table; returns the number of days"""
+    connection.execute(text("DELETE FROM daily_stats"))
+    connection.execute(text("DELETE FROM daily_mood_stats"))
+    connection.execute(text("DELETE FROM daily_tag_stats"))
+
+    delta = StatsDelta()
+    for row in connection.execute(text(STATS_ROW_SQL)):
+        delta.add(*row)
+    delta.write(connection)
+    return len(delta.days)
+
+
+def _pending_delta(target: models.Memory) -> StatsDelta:
+    """Delta shared by every memory written in the current flush"""
+    return object_session(target).info.setdefault(PENDING_KEY, StatsDelta())
+
+
+def _add_stored_row(delta: StatsDelta, connection, memory_id: int):
+    """Subtract the contribution of the row as it currently is in the database"""
+    row = connection.execute(STORED_ROW, {'id': memory_id}).first()
+    if row:
+        delta.add(*row, sign=-1)
+
+
+def _add_target(delta: StatsDelta, target: models.Memory):
+    delta.add(
+        target.occurred_at, target.mood, target.tags,
+        len(target.note or ''), target.photos, target.is_deleted
+    )
+
+
+# --- Write-path maintenance (runs inside the ORM flush transaction) ---
+# Per-row hooks only accumulate; the whole flush is written once in after_flush.
+
+@event.listens_for(models.Memory, "after_insert")
+def _stats_after_insert(mapper, connection, target):
+    _add_target(_pending_delta(target), target)
+
+
+@event.listens_for(models.Memory, "before_update")
+def _stats_before_update(mapper, connection, target):
+    state = inspect(target)
+    if not any(state.attrs[name].history.has_changes() for name in TRACKED_FIELDS):
+        return
+
+    delta = _pending_delta(target)
+    _add_stored_row(delta, connection, target.id)
+    _add_target(delta, target)
+
+
+@event.listens_for(models.Memory, "before_delete")
+def _stats_before_delete(mapper, connection, target):
+    _add_stored_row(_pending_delta(target), connection, target.id)
+
+
+@event.listens_for(Session, "after_flush")
+def _stats_after_flush(session, flush_context):
+    delta = session.info.pop(PENDING_KEY, None)
+    if delta is not None:
+        delta.write(session.connection())
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _stats_bulk_write(orm_execute_state):
+    # query.update()/delete() skip the per-row hooks
+    if (orm_execute_state.is_update or orm_execute_state.is_delete) and \
+            orm_execute_state.bind_mapper is not None and orm_execute_state.bind_mapper.class_ is models.Memory:
+        orm_execute_state.session.info[REBUILD_KEY] = True
+
+
+@event.listens_for(Session, "before_commit")
+def _stats_before_commit(session):
+    # Rebuilt in the same transaction as the bulk write
+    if session.info.pop(REBUILD_KEY, False):
+        rebuild_stats(session.connection())
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _stats_after_rollback(session, previous_transaction):
+    # A failed flush must not leak its half-collected delta into the next one
+    session.info.pop(PENDING_KEY, None)
+    session.info.pop(REBUILD_KEY, None)
+
+
+class DailyStatsService:
+
+    def rebuild(self, db: Session) -> bool:
+        """Recompute every daily aggregate from the memories table"""
+        try:
+            days = rebuild_stats(db.connection())
+            db.commit()
+            logger.info(f"Daily stats rebuilt for {days} days")
+            return True
+
+        except Exception as e:
+            logger.error(f"Error rebuilding daily stats: {e}")
+            db.rollback()
+            return False
+
+    def ensure_ready(self, db: Session):
+        """Create the aggregate tables and backfill them on first run"""
+        bind = db.get_bind()
+        for model in (models.DailyStat, models.DailyMoodStat, models.DailyTagStat):
+            model.__table__.create(bind=bind, checkfirst=True)
+
+        if not inspect(bind).has_table('memories'):
+            return
+
+        has_stats = db.query(models.DailyStat.day_key).first() is not None
+        has_memories = db.query(models.Memory.id).first() is not None
+        if has_memories and not has_stats:
+            self.rebuild(db)
+
+    def get_period_stats(self, db: Session, start_key: int, end_key: Optional[int] = None) -> Dict:
+        """Totals, mood counts and tag counts for day_keys in [start_key, end_key)"""
+        totals, moods, tags = _period_stats_queries(start_key, end_key)
+        return _period_stats(db.execute(totals).one(), db.execute(moods).all(), db.execute(tags).all())
+
+    async def get_period_stats_async(self, session: AsyncSession, start_key: int, end_key: Optional[int] = None) -> Dict:
+        totals, moods, tags = _period_stats_queries(start_key, end_key)
+        return _period_stats(
+            (await session.execute(totals)).one(),
+            (await session.execute(moods)).all(),
+            (await session.execute(tags)).all()
+        )
+
+    def get_monthly_breakdown(self, db: Session, start_key: int, end_key: int) -> Dict[str, Dict]:
+        """Per-month memory and mood counts for day_keys in [start_key, end_key)"""
+        counts, moods = _monthly_breakdown_queries(start_key, end_key)
+        return _monthly_breakdown(db.execute(counts), db.execute(moods))
+
+    async def get_monthly_breakdown_async(self, session: AsyncSession, start_key: int, end_key: int) -> Dict[str, Dict]:
+        counts, moods = _monthly_breakdown_queries(start_key, end_key)
+        return _monthly_breakdown(await session.execute(counts), await session.execute(moods))
+
+    def get_highlights(self, db: Session, start_epoch: int, end_epoch: int, limit: int = 5) -> List[Dict]:
+        """Memories with photos or long notes, without loading the note bodies"""
+        return _highlights(db.execute(_highlights_query(start_epoch, end_epoch, limit)))
+
+    async def get_highlights_async(self, session: AsyncSession, start_epoch: int, end_epoch: int, limit: int = 5) -> List[Dict]:
+        return _highlights(await session.execute(_highlights_query(start_epoch, end_epoch, limit)))
+
+
+# --- Read statements, shared by the sync and async readers ---
+
+def _period_stats_queries(start_key: int, end_key: Optional[int]):
+    def in_range(column):
+        clauses = [column >= start_key]
+        if end_key is not None:
+            clauses.append(column < end_key)
+        return clauses
+
+    totals = select(
+        func.coalesce(func.sum(models.DailyStat.memory_count), 0),
+        func.coalesce(func.sum(models.DailyStat.char_count), 0),
+        func.coalesce(func.sum(models.DailyStat.photo_count), 0)
+    ).where(*in_range(models.DailyStat.day_key))
+
+    moods = select(
+        models.DailyMoodStat.mood, func.sum(models.DailyMoodStat.count)
+    ).where(*in_range(models.DailyMoodStat.day_key)).group_by(models.DailyMoodStat.mood)
+
+    tag_total = func.sum(models.DailyTagStat.count)
+    tags = select(
+        models.DailyTagStat.tag, tag_total
+    ).where(*in_range(models.DailyTagStat.day_key)).group_by(
+        models.DailyTagStat.tag
+    ).order_by(tag_total.desc(), models.DailyTagStat.tag)
+
+    return totals, moods, tags
+
+
+def _period_stats(totals, mood_rows, tag_rows) -> Dict:
+    total_memories, total_chars, total_photos = totals
+    return {
+        'total_memories': total_memories,
+        'total_chars': total_chars,
+        'total_photos': total_photos,
+        'mood_breakdown': {mood: count for mood, count in mood_rows},
+        'tag_counts': [(tag, count) for tag, count in tag_rows]
+    }
+
+
+def _monthly_breakdown_queries(start_key: int, end_key: int):
+    month_col = models.DailyStat.day_key // 100
+    counts = select(
+        month_col, func.sum(models.DailyStat.memory_count)
+    ).where(
+        models.DailyStat.day_key >= start_key,
+        models.DailyStat.day_key < end_key
+    ).group_by(month_col).order_by(month_col)
+
+    mood_month_col = models.DailyMoodStat.day_key // 100
+    moods = select(
+        mood_month_col, models.DailyMoodStat.mood, func.sum(models.DailyMoodStat.count)
+    ).where(
+        models.DailyMoodStat.day_key >= start_key,
+        models.DailyMoodStat.day_key < end_key
+    ).group_by(mood_month_col, models.DailyMoodStat.mood)
+
+    return counts, moods
+
+
+def _monthly_breakdown(count_rows, mood_rows) -> Dict[str, Dict]:
+    months = {}
+    for month, count in count_rows:
+        months[time_keys.month_key_to_str(month)] = {'count': count, 'moods': {}}
+    for month, mood, count in mood_rows:
+        entry = months.setdefault(time_keys.month_key_to_str(month), {'count': 0, 'moods': {}})
+        entry['moods'][mood] = count
+    return months
+
+
+def _highlights_query(start_epoch: int, end_epoch: int, limit: int):
+    return select(
+        models.Memory.id,
+        models.Memory.title,
+        models.Memory.mood,
+        models.Memory.occurred_at
+    ).where(
+        models.Memory.is_deleted == False,
+        models.Memory.occurred_at >= start_epoch,
+        models.Memory.occurred_at < end_epoch,
+        (models.Memory.photos.notin_(['', '[]'])) | (func.length(models.Memory.note) > 100)
+    ).order_by(models.Memory.occurred_at).limit(limit)
+
+
+def _highlights(rows) -> List[Dict]:
+    return [{
+        'id': row.id,
+        'title': row.title,
+        'date': time_keys.day_key_to_str(time_keys.day_key(row.occurred_at)),
+        'mood': row.mood
+    } for row in rows]
+
+
+# Global instance
+daily_stats_service = DailyStatsService()
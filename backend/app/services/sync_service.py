@@ -1,6 +1,6 @@
 from sqlalchemy.orm import Session
-from app import models
-from app.config import VAULT_DIR, BACKUPS_DIR
+from app import models, schemas
+from app.config import VAULT_DIR, VAULT_SEGMENTS_DIR, BACKUPS_DIR
 from datetime import datetime
 import uuid
 import hashlib
@@ -9,6 +9,7 @@ import zipfile
 import json
 import logging
 from pathlib import Path
+from app.services.settings_cache import sync_state_cache
 
 logger = logging.getLogger(__name__)
 
@@ -31,6 +32,12 @@ class SyncService:
         
         return sync_state
     
+    def get_sync_state(self, db: Session) -> schemas.SyncStateRead:
+        """Read-only sync state snapshot, safe to share across threads"""
+        return sync_state_cache.get(
+            db, lambda s: schemas.SyncStateRead.model_validate(self.get_or_create_sync_state(s))
+        )
+    
     def calculate_sync_hash(self, vault_path: Path) -> str:
         """Calculate hash of vault file for conflict detection"""
         try:
@@ -61,6 +68,14 @@ class SyncService:
             
             shutil.copy(vault_enc, snapshot_dir / "vault.enc")
             
+            # DB segments (vault.enc is their manifest)
+            segment_names = []
+            if VAULT_SEGMENTS_DIR.exists():
+                (snapshot_dir / "segments").mkdir()
+                for segment in VAULT_SEGMENTS_DIR.glob("*.seg"):
+                    shutil.copy(segment, snapshot_dir / "segments" / segment.name)
+                    segment_names.append(segment.name)
+            
             if salt_bin.exists():
                 shutil.copy(salt_bin, snapshot_dir / "salt.bin")
             
@@ -77,7 +92,8 @@ class SyncService:
                 'device_id': sync_state.device_id,
                 'exported_at': datetime.now().isoformat(),
                 'sync_hash': sync_hash,
-                'version': '1.0'
+                'segments': sorted(segment_names),
+                'version': '1.1'
             }
             
             with open(snapshot_dir / "metadata.json", 'w') as f:
@@ -161,7 +177,14 @@ class SyncService:
                 backup_path = BACKUPS_DIR / f"vault_backup_{datetime.now().strftime('%Y%m%d_%H%M%S')}.enc"
                 shutil.copy(current_vault, backup_path)
             
-            # Copy vault files
+            # Copy vault files; segments are content-addressed, so only new ones are copied
+            imported_segments = temp_dir / "segments"
+            if imported_segments.exists():
+                VAULT_SEGMENTS_DIR.mkdir(parents=True, exist_ok=True)
+                for segment in imported_segments.glob("*.seg"):
+                    if not (VAULT_SEGMENTS_DIR / segment.name).exists():
+                        shutil.copy(segment, VAULT_SEGMENTS_DIR / segment.name)
+            
             imported_vault = temp_dir / "vault.enc"
             if imported_vault.exists():
                 shutil.copy(imported_vault, current_vault)
@@ -198,7 +221,7 @@ class SyncService:
     def detect_conflicts(self, db: Session) -> list:
         """Detect sync conflicts"""
         try:
-            sync_state = self.get_or_create_sync_state(db)
+            sync_state = self.get_sync_state(db)
             vault_path = VAULT_DIR / "vault.enc"
             
             if not vault_path.exists():
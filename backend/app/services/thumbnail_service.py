@@ -0,0 +1,106 @@
+from concurrent.futures import Future, ThreadPoolExecutor
+from threading import RLock
+from typing import Dict, Optional
+from PIL import Image, ImageOps
+from app.config import THUMBNAIL_SIZES, THUMBNAIL_QUALITY, THUMBNAIL_WORKERS
+from app.services.vault_service import get_vault_service, vault_state
+import io
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class ThumbnailService:
+    """Encrypted WebP thumbnails of vault photos, one file per size"""
+
+    def __init__(self, sizes=THUMBNAIL_SIZES, workers: int = THUMBNAIL_WORKERS):
+        self.sizes = tuple(sorted(sizes))
+        # Pillow releases the GIL while decoding, resizing and encoding
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="thumbnails")
+        self._inflight: Dict[str, Future] = {}
+        self._lock = RLock()  # done callbacks may run inside submit()
+        self.generated = 0
+        self.failed = 0
+
+    def pick_size(self, requested: int) -> Optional[int]:
+        """Smallest thumbnail at least as big as requested; None means the original"""
+        for size in self.sizes:
+            if size >= requested:
+                return size
+        return None
+
+    def has_thumbnails(self, photo_id: str) -> bool:
+        vault_svc = get_vault_service()
+        return all(vault_svc.get_thumbnail_path(photo_id, size).exists() for size in self.sizes)
+
+    def generate(self, photo_id: str, original: Optional[bytes] = None) -> int:
+        """Decode the photo once and write every missing size; returns how many were written"""
+        vault_svc = get_vault_service()
+        missing = [size for size in self.sizes if not vault_svc.get_thumbnail_path(photo_id, size).exists()]
+        if not missing:
+            return 0
+
+        if original is None:
+            original = vault_svc.read_encrypted_file(vault_svc.get_encrypted_photo_path(photo_id))
+
+        with Image.open(io.BytesIO(original)) as source:
+            # Bake in the camera rotation; thumbnails carry no EXIF
+            image = ImageOps.exif_transpose(source)
+            if image.mode not in ("RGB", "RGBA"):
+                image = image.convert("RGBA" if "transparency" in image.info else "RGB")
+
+            # Largest first, each one shrunk from the previous
+            for size in sorted(missing, reverse=True):
+                image.thumbnail((size, size), Image.LANCZOS)
+                encoded = io.BytesIO()
+                image.save(encoded, format="WEBP", quality=THUMBNAIL_QUALITY, method=4)
+                encoded.seek(0)
+                vault_svc.save_encrypted_file(vault_svc.get_thumbnail_path(photo_id, size), encoded)
+
+        self.generated += len(missing)
+        return len(missing)
+
+    def _generate_logged(self, photo_id: str, original: Optional[bytes] = None) -> int:
+        try:
+            return self.generate(photo_id, original)
+        except Exception as e:
+            self.failed += 1
+            logger.error(f"Thumbnail generation failed for {photo_id}: {e}")
+            return 0
+
+    def submit(self, photo_id: str, original: Optional[bytes] = None) -> Future:
+        """Generate thumbnails in the background (once per photo at a time)"""
+        with self._lock:
+            future = self._inflight.get(photo_id)
+            if future is None:
+                future = self._executor.submit(self._generate_logged, photo_id, original)
+                self._inflight[photo_id] = future
+                future.add_done_callback(lambda _: self._finished(photo_id))
+            return future
+
+    def _finished(self, photo_id: str):
+        with self._lock:
+            self._inflight.pop(photo_id, None)
+
+    def backfill(self) -> Dict:
+        """Create thumbnails for photos stored before the pipeline existed"""
+        if vault_state.state != "UNLOCKED":
+            return {'skipped': 'vault locked'}
+
+        vault_svc = get_vault_service()
+        pending = [
+            path.stem for path in vault_svc.encrypted_photos_dir.glob("*.enc")
+            if not self.has_thumbnails(path.stem)
+        ]
+        futures = [self.submit(photo_id) for photo_id in pending]
+        written = sum(future.result() for future in futures)
+        if pending:
+            logger.info(f"Thumbnail backfill: {len(pending)} photos, {written} thumbnails written")
+        return {'photos': len(pending), 'thumbnails': written}
+
+    def get_stats(self) -> Dict:
+        return {'sizes': list(self.sizes), 'generated': self.generated, 'failed': self.failed}
+
+
+# Global instance
+thumbnail_service = ThumbnailService()
@@ -1,23 +1,73 @@
 import os
 import shutil
 import secrets
+import sqlite3
+import threading
 from pathlib import Path
-from typing import Optional, Tuple
+from typing import BinaryIO, Optional, Tuple
 from cryptography.fernet import Fernet, InvalidToken
 from cryptography.hazmat.primitives import hashes
 from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF
+from app.services.event_bus import event_bus
+from app.services import chunked_crypto
+from app.services.photo_cache import photo_cache
+from app.responses import payload_cache
+from app.services.memory_cache import memory_cache
+from app.database import backup_database, get_database_path
 import base64
+import hashlib
+import hmac
+import io
+import json
 import logging
 
 logger = logging.getLogger(__name__)
 
+# vault.enc starting with this holds the segment manifest; the DB lives in segments/
+MANIFEST_MAGIC = b"MLS1"
+# Plaintext DB bytes per segment (1024 SQLite pages of 4 KiB)
+SEGMENT_SIZE = 4 * 1024 * 1024
+# Photos use small chunks so a Range request decrypts little beyond what it asks for
+PHOTO_CHUNK_SIZE = 64 * 1024
+# SQLite pages copied per backup step during a checkpoint
+CHECKPOINT_PAGES_PER_STEP = 1024
+
+
+class VaultCorruptedError(Exception):
+    """Vault data is present but fails verification"""
+
+
+class _HashingReader:
+    """File wrapper that feeds everything read through a hash"""
+    
+    def __init__(self, src: BinaryIO, digest):
+        self.src = src
+        self.digest = digest
+    
+    def read(self, size: int = -1) -> bytes:
+        data = self.src.read(size)
+        self.digest.update(data)
+        return data
+
 
 class VaultState:
     """Global vault state"""
     is_unlocked: bool = False
     encryption_key: Optional[bytes] = None
     runtime_db_path: Optional[Path] = None
-    state: str = "LOCKED"  # LOCKED, UNLOCKED, UNAVAILABLE
+    _state: str = "LOCKED"  # LOCKED, UNLOCKED, UNAVAILABLE
+    
+    @property
+    def state(self) -> str:
+        return self._state
+    
+    @state.setter
+    def state(self, value: str):
+        changed = value != self._state
+        self._state = value
+        if changed:
+            event_bus.publish('vault.state', {'state': value})
 
 
 vault_state = VaultState()
@@ -29,14 +79,22 @@ class VaultService:
         self.vault_dir = app_data_dir / 'vault'
         self.vault_db = self.vault_dir / 'vault.enc'
         self.salt_file = self.vault_dir / 'salt.bin'
+        self.segments_dir = self.vault_dir / 'segments'
         self.encrypted_photos_dir = self.vault_dir / 'photos'
+        self.thumbnails_dir = self.encrypted_photos_dir / 'thumbs'
+        self.quarantine_dir = self.encrypted_photos_dir / 'quarantine'
         self.runtime_dir = app_data_dir / 'runtime'
         self.runtime_db = self.runtime_dir / 'db.sqlite'
         self.backups_dir = self.vault_dir / 'backups'
+        self.checkpoint_db = self.runtime_dir / 'checkpoint.sqlite'
+        # Serializes writes to vault.enc/segments (lock, setup, checkpoints)
+        self._persist_lock = threading.RLock()
         
         # Ensure directories exist
         self.vault_dir.mkdir(parents=True, exist_ok=True)
         self.encrypted_photos_dir.mkdir(parents=True, exist_ok=True)
+        self.thumbnails_dir.mkdir(parents=True, exist_ok=True)
+        self.segments_dir.mkdir(parents=True, exist_ok=True)
         self.runtime_dir.mkdir(parents=True, exist_ok=True)
         self.backups_dir.mkdir(parents=True, exist_ok=True)
     
@@ -55,6 +113,127 @@ class VaultService:
         """Check if vault has been set up"""
         return self.salt_file.exists()
     
+    def vault_format(self) -> str:
+        """'segments', 'chunked' (whole DB, one file) or 'fernet' (legacy single token)"""
+        with open(self.vault_db, 'rb') as f:
+            head = f.read(chunked_crypto.HEADER_SIZE)
+        if head.startswith(MANIFEST_MAGIC):
+            return 'segments'
+        return 'chunked' if chunked_crypto.is_chunked(head) else 'fernet'
+    
+    def get_segment_path(self, segment_id: str) -> Path:
+        """Get path for an encrypted DB segment"""
+        return self.segments_dir / f"{segment_id}.seg"
+    
+    def _content_mac(self, key: bytes, purpose: bytes):
+        """Keyed content hash, so file names don't reveal plaintext hashes"""
+        mac_key = HKDF(
+            algorithm=hashes.SHA256(), length=32, salt=None, info=purpose
+        ).derive(base64.urlsafe_b64decode(key))
+        return hmac.new(mac_key, digestmod=hashlib.sha256)
+    
+    def _segment_id(self, key: bytes, data: bytes) -> str:
+        mac = self._content_mac(key, b"mylife-vault-segments")
+        mac.update(data)
+        return mac.hexdigest()
+    
+    def read_manifest(self, key: bytes) -> Optional[dict]:
+        """Decrypt the segment manifest; None if vault.enc is in an older format"""
+        if not self.vault_db.exists():
+            return None
+        with open(self.vault_db, 'rb') as f:
+            if f.read(len(MANIFEST_MAGIC)) != MANIFEST_MAGIC:
+                return None
+            return json.loads(b"".join(chunked_crypto.iter_decrypt(key, f)))
+    
+    def _write_manifest(self, key: bytes, manifest: dict):
+        temp_vault = self.vault_db.with_suffix('.tmp')
+        try:
+            with open(temp_vault, 'wb') as dst:
+                dst.write(MANIFEST_MAGIC)
+                chunked_crypto.encrypt_stream(key, io.BytesIO(json.dumps(manifest).encode()), dst)
+            temp_vault.replace(self.vault_db)
+        finally:
+            if temp_vault.exists():
+                temp_vault.unlink()
+    
+    def _encrypt_runtime_db(self, key: bytes, source=None) -> int:
+        """Persist the runtime DB (a file, or serialized bytes) as segments, writing only the ones whose content changed"""
+        with self._persist_lock:
+            if isinstance(source, (bytes, bytearray, memoryview)):
+                return self._write_segments(key, io.BytesIO(source))
+            with open(source or self.runtime_db, 'rb') as src:
+                return self._write_segments(key, src)
+    
+    def _write_segments(self, key: bytes, src: BinaryIO) -> int:
+        segment_ids = []
+        size = 0
+        written = 0
+        while data := src.read(SEGMENT_SIZE):
+            segment_id = self._segment_id(key, data)
+            segment_path = self.get_segment_path(segment_id)
+            if not segment_path.exists():
+                temp_segment = segment_path.with_suffix('.tmp')
+                with open(temp_segment, 'wb') as dst:
+                    chunked_crypto.encrypt_stream(key, io.BytesIO(data), dst)
+                temp_segment.replace(segment_path)
+                written += 1
+            segment_ids.append(segment_id)
+            size += len(data)
+        
+        manifest = {'version': 1, 'size': size, 'segment_size': SEGMENT_SIZE, 'segments': segment_ids}
+        # An unchanged DB keeps the same vault.enc (and sync hash)
+        if manifest != self.read_manifest(key):
+            self._write_manifest(key, manifest)
+        
+        # Drop segments the manifest no longer references
+        live = set(segment_ids)
+        for segment_path in self.segments_dir.glob('*.seg'):
+            if segment_path.stem not in live:
+                segment_path.unlink()
+        
+        logger.info(f"Vault persisted: {written} of {len(segment_ids)} segments written")
+        return written
+    
+    def _decrypt_vault_db(self, key: bytes) -> str:
+        """Stream vault.enc (or its segments) into the runtime DB file; returns the format it was in"""
+        temp_db = self.runtime_db.with_suffix('.tmp')
+        try:
+            with open(temp_db, 'wb') as dst:
+                vault_format = self._decrypt_vault_to(key, dst)
+            temp_db.replace(self.runtime_db)
+            return vault_format
+        finally:
+            if temp_db.exists():
+                temp_db.unlink()
+    
+    def _decrypt_vault_to(self, key: bytes, dst: BinaryIO) -> str:
+        vault_format = self.vault_format()
+        if vault_format == 'segments':
+            manifest = self.read_manifest(key)
+            for index, segment_id in enumerate(manifest['segments']):
+                try:
+                    with open(self.get_segment_path(segment_id), 'rb') as src:
+                        data = b"".join(chunked_crypto.iter_decrypt(key, src))
+                except (OSError, chunked_crypto.ChunkDecryptionError, ValueError) as e:
+                    raise VaultCorruptedError(f"Segment {index}: {e}")
+                if self._segment_id(key, data) != segment_id:
+                    raise VaultCorruptedError(f"Segment {index}: content does not match manifest")
+                dst.write(data)
+        elif vault_format == 'chunked':
+            with open(self.vault_db, 'rb') as src:
+                try:
+                    chunked_crypto.decrypt_stream(key, src, dst)
+                except chunked_crypto.ChunkDecryptionError as e:
+                    # The first chunk is where a wrong key shows up; later ones mean damage
+                    if e.index == 0:
+                        raise
+                    raise VaultCorruptedError(str(e))
+        else:
+            # Old format: one token for the whole DB, so this is the last full-size read
+            dst.write(Fernet(key).decrypt(self.vault_db.read_bytes()))
+        return vault_format
+    
     def setup_vault(self, pin: str) -> Tuple[bool, Optional[str]]:
         """Initialize vault with PIN"""
         try:
@@ -78,16 +257,7 @@ class VaultService:
             conn.close()
             
             # Encrypt to vault
-            with open(self.runtime_db, 'rb') as f:
-                db_data = f.read()
-            
-            fernet = Fernet(key)
-            encrypted = fernet.encrypt(db_data)
-            
-            # Atomic write
-            temp_vault = self.vault_db.with_suffix('.tmp')
-            temp_vault.write_bytes(encrypted)
-            temp_vault.replace(self.vault_db)
+            self._encrypt_runtime_db(key)
             
             # Remove runtime DB
             if self.runtime_db.exists():
@@ -115,19 +285,20 @@ class VaultService:
             salt = self.salt_file.read_bytes()
             key = self.derive_key(pin, salt)
             
-            # Try to decrypt vault
-            fernet = Fernet(key)
-            encrypted_data = self.vault_db.read_bytes()
-            
+            # Decrypt vault into the runtime DB (streamed, segment by segment)
             try:
-                decrypted_db = fernet.decrypt(encrypted_data)
-            except InvalidToken:
+                vault_format = self._decrypt_vault_db(key)
+            except (InvalidToken, chunked_crypto.ChunkDecryptionError):
                 return False, "Invalid PIN"
+            except VaultCorruptedError as e:
+                logger.error(f"Vault corrupted: {e}")
+                vault_state.state = "UNAVAILABLE"
+                return False, f"Vault is corrupted ({e})"
             
-            # Write to runtime DB (atomic)
-            temp_db = self.runtime_db.with_suffix('.tmp')
-            temp_db.write_bytes(decrypted_db)
-            temp_db.replace(self.runtime_db)
+            if vault_format != 'segments':
+                # Migrate right away rather than on the next lock
+                self._encrypt_runtime_db(key)
+                logger.info(f"Vault migrated from {vault_format} to segmented storage")
             
             # Update state
             vault_state.is_unlocked = True
@@ -153,35 +324,61 @@ class VaultService:
                 vault_state.state = "UNAVAILABLE"
                 return False, "Runtime database not found"
             
-            # Read runtime DB
-            with open(self.runtime_db, 'rb') as f:
-                db_data = f.read()
-            
-            # Encrypt
-            fernet = Fernet(vault_state.encryption_key)
-            encrypted = fernet.encrypt(db_data)
+            with self._persist_lock:
+                # Encrypt changed segments (checkpoints leave only the last delta), then swap in the new manifest
+                self._encrypt_runtime_db(vault_state.encryption_key, self._snapshot_app_db())
+                
+                # Delete runtime DB and the snapshot
+                for path in (self.runtime_db, self.checkpoint_db):
+                    if path.exists():
+                        path.unlink()
+                
+                # Clear state
+                photo_cache.clear()
+                memory_cache.clear()
+                payload_cache.clear()
+                vault_state.is_unlocked = False
+                vault_state.encryption_key = None
+                vault_state.runtime_db_path = None
+                vault_state.state = "LOCKED"
             
-            # Atomic write to vault
-            temp_vault = self.vault_db.with_suffix('.tmp')
-            temp_vault.write_bytes(encrypted)
-            temp_vault.replace(self.vault_db)
+            logger.info("Vault locked successfully")
+            return True, None
             
-            # Delete runtime DB
-            if self.runtime_db.exists():
-                self.runtime_db.unlink()
+        except Exception as e:
+            logger.error(f"Vault lock failed: {e}")
+            return False, str(e)
+    
+    def _snapshot_app_db(self) -> Path:
+        """Consistent copy of the database the app's sessions write to"""
+        # Online backup in steps: writers get the DB back between steps
+        backup_database(get_database_path(), self.checkpoint_db, pages=CHECKPOINT_PAGES_PER_STEP)
+        return self.checkpoint_db
+    
+    def checkpoint(self) -> Tuple[bool, Optional[str]]:
+        """Encrypt a consistent snapshot of the app DB into the vault without locking it"""
+        key = vault_state.encryption_key
+        if vault_state.state != "UNLOCKED" or not key:
+            return False, "Vault is not unlocked"
+        
+        try:
+            snapshot = self._snapshot_app_db()
             
-            # Clear state
-            vault_state.is_unlocked = False
-            vault_state.encryption_key = None
-            vault_state.runtime_db_path = None
-            vault_state.state = "LOCKED"
+            with self._persist_lock:
+                # A lock that finished meanwhile has already persisted newer data
+                if vault_state.state != "UNLOCKED" or vault_state.encryption_key != key:
+                    return False, "Vault was locked during checkpoint"
+                written = self._encrypt_runtime_db(key, snapshot)
             
-            logger.info("Vault locked successfully")
+            logger.info(f"Vault checkpoint completed ({written} segments written)")
             return True, None
             
         except Exception as e:
-            logger.error(f"Vault lock failed: {e}")
+            logger.error(f"Vault checkpoint failed: {e}")
             return False, str(e)
+        finally:
+            if self.checkpoint_db.exists():
+                self.checkpoint_db.unlink()
     
     def recover_vault(self) -> Tuple[bool, Optional[str]]:
         """Recover from corrupted vault"""
@@ -205,6 +402,9 @@ class VaultService:
                 self.runtime_db.unlink()
             
             # Reset state
+            photo_cache.clear()
+            memory_cache.clear()
+            payload_cache.clear()
             vault_state.is_unlocked = False
             vault_state.encryption_key = None
             vault_state.runtime_db_path = None
@@ -237,6 +437,70 @@ class VaultService:
         """Get path for encrypted photo"""
         return self.encrypted_photos_dir / f"{photo_id}.enc"
     
+    def get_thumbnail_path(self, photo_id: str, size: int) -> Path:
+        """Get path for an encrypted photo thumbnail"""
+        return self.thumbnails_dir / f"{photo_id}_{size}.enc"
+    
+    def store_photo(self, src: BinaryIO) -> Tuple[str, int, bool]:
+        """Encrypt a photo stream under the HMAC of its content; returns (photo_id, size, newly stored)"""
+        key = vault_state.encryption_key
+        if not key:
+            raise Exception("Vault is locked")
+        
+        # Hash while encrypting, so the upload is read once
+        mac = self._content_mac(key, b"mylife-photo-ids")
+        temp_path = self.encrypted_photos_dir / f"upload-{secrets.token_hex(8)}.tmp"
+        try:
+            with open(temp_path, 'wb') as dst:
+                size = chunked_crypto.encrypt_stream(key, _HashingReader(src, mac), dst, PHOTO_CHUNK_SIZE)
+            photo_id = mac.hexdigest()
+            photo_path = self.get_encrypted_photo_path(photo_id)
+            if photo_path.exists():
+                # Restart the GC grace period for a re-uploaded orphan
+                os.utime(photo_path)
+                return photo_id, size, False
+            temp_path.replace(photo_path)
+            return photo_id, size, True
+        finally:
+            if temp_path.exists():
+                temp_path.unlink()
+    
+    def photo_id_for(self, src: BinaryIO) -> str:
+        """The id store_photo would give this content, without encrypting or writing anything"""
+        key = vault_state.encryption_key
+        if not key:
+            raise Exception("Vault is locked")
+        
+        mac = self._content_mac(key, b"mylife-photo-ids")
+        while data := src.read(PHOTO_CHUNK_SIZE):
+            mac.update(data)
+        return mac.hexdigest()
+    
+    def save_encrypted_file(self, path: Path, src: BinaryIO) -> int:
+        if not vault_state.encryption_key:
+            raise Exception("Vault is locked")
+        
+        temp_path = path.with_suffix('.tmp')
+        try:
+            with open(temp_path, 'wb') as dst:
+                size = chunked_crypto.encrypt_stream(vault_state.encryption_key, src, dst, PHOTO_CHUNK_SIZE)
+            temp_path.replace(path)
+            return size
+        finally:
+            if temp_path.exists():
+                temp_path.unlink()
+    
+    def read_encrypted_file(self, path: Path) -> bytes:
+        """Decrypt a whole photo file (chunked or legacy Fernet)"""
+        if not vault_state.encryption_key:
+            raise Exception("Vault is locked")
+        
+        with open(path, 'rb') as f:
+            if chunked_crypto.is_chunked(f.read(chunked_crypto.HEADER_SIZE)):
+                f.seek(0)
+                return b"".join(chunked_crypto.iter_decrypt(vault_state.encryption_key, f))
+        return self.decrypt_file(path.read_bytes())
+    
     def emergency_export_files(self) -> list:
         """Get list of files for emergency export"""
         files = []
@@ -247,6 +511,10 @@ class VaultService:
         if self.salt_file.exists():
             files.append(self.salt_file)
         
+        # Add DB segments referenced by vault.enc
+        if self.segments_dir.exists():
+            files.extend(self.segments_dir.glob("*.seg"))
+        
         # Add encrypted photos
         if self.encrypted_photos_dir.exists():
             for photo in self.encrypted_photos_dir.glob("*.enc"):
@@ -82,10 +82,36 @@ class VectorStore:
             'embedding': embedding
         })
 
+    def add_or_update_many(self, memories: List[models.Memory]):
+        """Batch-encode and upsert several memories in one model call."""
+        if not memories:
+            return
+        if not self.model:
+            self.load_model()
+
+        embeddings = self.model.encode([self._get_text(m) for m in memories], convert_to_numpy=True)
+        positions = {item['id']: i for i, item in enumerate(self.index)}
+
+        for memory, embedding in zip(memories, embeddings):
+            if memory.id in positions:
+                self.index[positions[memory.id]]['embedding'] = embedding
+            else:
+                positions[memory.id] = len(self.index)
+                self.index.append({
+                    'id': memory.id,
+                    'embedding': embedding
+                })
+
     def remove(self, memory_id: int):
         """Remove a memory from the index."""
         self.index = [item for item in self.index if item['id'] != memory_id]
 
+    def remove_many(self, memory_ids: List[int]):
+        """Remove several memories from the index in one pass."""
+        ids = set(memory_ids)
+        if ids:
+            self.index = [item for item in self.index if item['id'] not in ids]
+
     def search(self, query: str, top_k: int = 5) -> List[Tuple[int, float]]:
         """
         Search for memories similar to query.
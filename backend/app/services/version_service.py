@@ -1,4 +1,6 @@
+from sqlalchemy import func
 from sqlalchemy.orm import Session
+from typing import List
 from app import models
 from datetime import datetime
 import logging
@@ -44,6 +46,41 @@ class VersionService:
             db.rollback()
             return None
     
+    def add_versions(
+        self,
+        db: Session,
+        memories: List[models.Memory],
+        action: str,
+        chunk_size: int = 500
+    ) -> int:
+        """Stage version snapshots for many memories; the caller commits.
+        
+        Version numbers come from one grouped count per chunk instead of a
+        count query per memory.
+        """
+        added = 0
+        for start in range(0, len(memories), chunk_size):
+            chunk = memories[start:start + chunk_size]
+            counts = dict(db.query(
+                models.MemoryVersion.memory_id, func.count(models.MemoryVersion.id)
+            ).filter(
+                models.MemoryVersion.memory_id.in_([m.id for m in chunk])
+            ).group_by(models.MemoryVersion.memory_id).all())
+            
+            db.add_all([models.MemoryVersion(
+                memory_id=memory.id,
+                version_no=counts.get(memory.id, 0) + 1,
+                snapshot_title=memory.title,
+                snapshot_note=memory.note,
+                snapshot_tags=memory.tags or "",
+                snapshot_mood=memory.mood or "neutral",
+                snapshot_photos=memory.photos or "[]",
+                action=action
+            ) for memory in chunk])
+            added += len(chunk)
+        
+        return added
+    
     def get_versions(self, db: Session, memory_id: int):
         """Get all versions for a memory"""
         try:
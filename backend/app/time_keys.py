@@ -0,0 +1,90 @@
+from datetime import datetime, timedelta
+from calendar import timegm
+from typing import Optional, Tuple, Union
+
+# Canonical time keys for memories.
+#
+# occurred_at: integer epoch seconds. Naive datetimes (the app stores wall-clock
+# ISO strings) are treated as UTC so that SQLite's strftime(..., 'unixepoch')
+# gives back the same calendar day/month that was written.
+# month_key:   integer YYYYMM derived from occurred_at (generated column).
+# day_key:     integer YYYYMMDD, used by the daily_stats aggregate tables.
+
+# Kept VIRTUAL so it can be added to existing databases with ALTER TABLE
+MONTH_KEY_SQL = "CAST(strftime('%Y%m', occurred_at, 'unixepoch') AS INTEGER)"
+
+
+def to_epoch(value: Union[datetime, str, None]) -> Optional[int]:
+    """Convert a datetime or ISO string to epoch seconds (None if unparseable)"""
+    if value is None:
+        return None
+
+    if isinstance(value, str):
+        try:
+            value = datetime.fromisoformat(value.strip().replace('Z', '+00:00'))
+        except ValueError:
+            return None
+
+    if value.tzinfo is not None:
+        return timegm(value.utctimetuple())
+    return timegm(value.timetuple())
+
+
+def month_key(month: str) -> int:
+    """'YYYY-MM' -> YYYYMM (raises ValueError on bad input)"""
+    target = datetime.strptime(month, "%Y-%m")
+    return target.year * 100 + target.month
+
+
+def month_key_to_str(key: int) -> str:
+    """YYYYMM -> 'YYYY-MM'"""
+    return f"{key // 100:04d}-{key % 100:02d}"
+
+
+def year_day_keys(year: int) -> Tuple[int, int]:
+    """Half-open day_key range covering a calendar year"""
+    return year * 10000 + 101, (year + 1) * 10000 + 101
+
+
+def day_epoch_range(day: str, days: int = 1) -> Tuple[int, int]:
+    """'YYYY-MM-DD' plus N days -> half-open epoch range"""
+    start = datetime.strptime(day, "%Y-%m-%d")
+    return to_epoch(start), to_epoch(start + timedelta(days=days))
+
+
+def day_key(epoch: int) -> int:
+    """Epoch seconds -> YYYYMMDD"""
+    day = datetime(1970, 1, 1) + timedelta(seconds=epoch)
+    return day.year * 10000 + day.month * 100 + day.day
+
+
+def day_key_to_str(key: int) -> str:
+    """YYYYMMDD -> 'YYYY-MM-DD'"""
+    return f"{key // 10000:04d}-{key // 100 % 100:02d}-{key % 100:02d}"
+
+
+def day_key_range(day: str, days: int = 1) -> Tuple[int, int]:
+    """'YYYY-MM-DD' plus N days -> half-open day_key range"""
+    start = datetime.strptime(day, "%Y-%m-%d")
+    end = start + timedelta(days=days)
+    return (
+        start.year * 10000 + start.month * 100 + start.day,
+        end.year * 10000 + end.month * 100 + end.day
+    )
+
+
+def month_day_keys(month: str) -> Tuple[int, int]:
+    """'YYYY-MM' -> half-open day_key range covering the month"""
+    key = month_key(month)
+    return key * 100 + 1, key * 100 + 32
+
+
+def resolve_occurred_at(timestamp: Optional[str], created_at: Optional[datetime]) -> int:
+    """Pick the canonical event time: explicit timestamp, else created_at, else now"""
+    epoch = to_epoch(timestamp)
+    if epoch is None:
+        epoch = to_epoch(created_at)
+    if epoch is None:
+        # created_at defaults to CURRENT_TIMESTAMP, which is UTC
+        epoch = to_epoch(datetime.utcnow())
+    return epoch
@@ -0,0 +1,54 @@
+import os
+import tempfile
+
+# Keep the suite away from the developer's real data: set before anything imports app
+os.environ["MYLIFE_DATA_DIR"] = tempfile.mkdtemp(prefix="mylife-tests-")
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app import crud, models
+from app.database import Base
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = tmp_path / "test.db"
+    engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    engine.dispose()
+    return path
+
+
+@pytest.fixture
+def session_factory(db_path):
+    engine = create_engine(f"sqlite:///{db_path}", connect_args={"check_same_thread": False})
+    yield sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    engine.dispose()
+
+
+@pytest.fixture
+def db(session_factory):
+    session = session_factory()
+    yield session
+    session.close()
+
+
+@pytest.fixture(autouse=True)
+def no_embeddings(monkeypatch):
+    """Keep the embedding model out of unit tests"""
+    monkeypatch.setattr(crud.vector_store, "add_or_update_many", lambda memories: None)
+    monkeypatch.setattr(crud.vector_store, "remove_many", lambda ids: None)
+
+
+@pytest.fixture
+def add_memory(db):
+    def add(**fields) -> models.Memory:
+        values = {"title": "A memory", "note": "Something happened", "mood": "neutral", "tags": ""}
+        values.update(fields)
+        memory = models.Memory(**values)
+        db.add(memory)
+        db.commit()
+        return memory
+    return add
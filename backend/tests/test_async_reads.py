@@ -0,0 +1,91 @@
+import asyncio
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app import crud
+from app.services.generation_service import generation_service
+from app.services.memory_cache import memory_cache
+from app.services.stats_service import daily_stats_service
+
+
+@pytest.fixture
+def run_async(db_path):
+    """Run a coroutine function against an AsyncSession on the test database"""
+    def run(fn):
+        async def main():
+            engine = create_async_engine(f"sqlite+aiosqlite:///{db_path}")
+            try:
+                async with async_sessionmaker(engine, expire_on_commit=False)() as session:
+                    return await fn(session)
+            finally:
+                await engine.dispose()
+        return asyncio.run(main())
+    return run
+
+
+@pytest.fixture
+def memories(add_memory):
+    return [
+        add_memory(title=f"Memory {i}", mood="happy" if i % 2 else "sad", tags="walk,park",
+                   photos='["abc"]' if i % 3 == 0 else "[]")
+        for i in range(12)
+    ]
+
+
+def test_async_pages_match_sync(db, memories, run_async):
+    for fields in (None, crud.SUMMARY_FIELDS):
+        first, cursor = crud.get_memories_page(db, limit=5, fields=fields)
+        first_async, cursor_async = run_async(lambda s: crud.get_memories_page_async(s, limit=5, fields=fields))
+        assert cursor_async == cursor
+
+        rest, _ = crud.get_memories_page(db, limit=50, cursor=cursor, fields=fields)
+        rest_async, end = run_async(lambda s: crud.get_memories_page_async(s, limit=50, cursor=cursor, fields=fields))
+        assert end is None
+
+        if fields is None:
+            first, first_async = [m.id for m in first], [m.id for m in first_async]
+            rest, rest_async = [m.id for m in rest], [m.id for m in rest_async]
+        assert first_async == first
+        assert rest_async == rest
+
+
+def test_async_payloads_keep_input_order(db, memories, run_async):
+    memory_cache.clear()
+    ids = [memories[4].id, memories[0].id, 999999, memories[7].id]
+
+    payloads = run_async(lambda s: crud.get_memory_payloads_async(s, ids))
+
+    assert [p["id"] for p in payloads] == [memories[4].id, memories[0].id, memories[7].id]
+    assert payloads == crud.get_memory_payloads(db, ids)
+
+
+def test_async_stats_and_etag_match_sync(db, memories, run_async):
+    async def read(session):
+        return (
+            await daily_stats_service.get_period_stats_async(session, 0),
+            await daily_stats_service.get_highlights_async(session, 0, 2 ** 40),
+            await generation_service.etag_async(session, ["memories"])
+        )
+
+    stats, highlights, etag = run_async(read)
+
+    assert stats == daily_stats_service.get_period_stats(db, 0)
+    assert stats["total_memories"] == len(memories)
+    assert highlights == daily_stats_service.get_highlights(db, 0, 2 ** 40)
+    assert etag == generation_service.etag(db, ["memories"])
+
+
+def test_payloads_skip_cache_entries_changed_by_raw_sql(db, memories, run_async):
+    memory_cache.clear()
+    target = memories[2]
+    assert crud.get_memory_payloads(db, [target.id])[0]["title"] == "Memory 2"
+
+    # Bypasses the session hooks, like a migration or another process
+    db.execute(text("UPDATE memories SET title = 'Edited', updated_at = '2030-01-01 00:00:00' WHERE id = :id"),
+               {"id": target.id})
+    db.commit()
+
+    assert crud.get_memory_payloads(db, [target.id])[0]["title"] == "Edited"
+    assert run_async(lambda s: crud.get_memory_payloads_async(s, [target.id]))[0]["title"] == "Edited"
@@ -0,0 +1,114 @@
+import functools
+import io
+import sqlite3
+import threading
+import zipfile
+
+import pytest
+
+from app import database, models
+from app.routers import backup
+
+SEED_ROWS = 300
+
+
+def count_rows(path):
+    conn = sqlite3.connect(str(path))
+    try:
+        return conn.execute("SELECT COUNT(*) FROM memories").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def integrity(path):
+    conn = sqlite3.connect(str(path))
+    try:
+        return conn.execute("PRAGMA integrity_check").fetchone()[0]
+    finally:
+        conn.close()
+
+
+@pytest.fixture
+def seeded(db, db_path):
+    db.add_all([
+        models.Memory(title=f"Seed {i}", note="x" * 1000, mood="neutral", tags="") for i in range(SEED_ROWS)
+    ])
+    db.commit()
+    return db_path
+
+
+@pytest.fixture
+def writer(session_factory):
+    """Commits one memory at a time on its own thread until stopped"""
+    class Writer(threading.Thread):
+        def __init__(self):
+            super().__init__(daemon=True)
+            self.stop = threading.Event()
+            self.writing = threading.Event()
+            self.commits = 0
+            self.error = None
+
+        def run(self):
+            session = session_factory()
+            try:
+                while not self.stop.is_set():
+                    session.add(models.Memory(title="Concurrent", note="y" * 1000, mood="happy", tags=""))
+                    session.commit()
+                    self.commits += 1
+                    self.writing.set()
+            except Exception as e:
+                self.error = e
+                self.writing.set()
+            finally:
+                session.close()
+
+        def __enter__(self):
+            self.start()
+            self.writing.wait(timeout=10)
+            return self
+
+        def __exit__(self, *exc):
+            self.stop.set()
+            self.join()
+            assert self.error is None
+
+    return Writer
+
+
+def test_backup_database_is_consistent_under_writes(seeded, writer, tmp_path):
+    target = tmp_path / "snapshot.db"
+
+    with writer() as w:
+        # Small steps so writes land between them and force restarts
+        database.backup_database(seeded, target, pages=4)
+
+    assert integrity(target) == "ok"
+    assert SEED_ROWS <= count_rows(target) <= SEED_ROWS + w.commits
+    assert count_rows(seeded) == SEED_ROWS + w.commits
+    assert w.commits > 0
+
+
+def test_backup_zip_restores_a_consistent_database(seeded, writer, tmp_path, monkeypatch):
+    photos = tmp_path / "photos"
+    photos.mkdir()
+    (photos / "a.jpg").write_bytes(b"jpeg bytes")
+    monkeypatch.setattr(backup, "get_database_path", lambda: str(seeded))
+    monkeypatch.setattr(backup, "STORAGE_DIR", str(photos))
+    monkeypatch.setattr(backup, "BACKUP_TMP_DIR", str(tmp_path))
+    monkeypatch.setattr(backup, "backup_database", functools.partial(database.backup_database, pages=4))
+
+    with writer() as w:
+        archive = b"".join(backup.iter_backup_zip({"app": "MyLife"}))
+
+    with zipfile.ZipFile(io.BytesIO(archive)) as zipf:
+        assert sorted(zipf.namelist()) == ["memories.db", "metadata.json", "photos/a.jpg"]
+        assert zipf.read("photos/a.jpg") == b"jpeg bytes"
+        zipf.extract("memories.db", tmp_path / "export")
+
+    # Restore the way restore_backup does: through the backup API into a database file
+    restored = tmp_path / "restored.db"
+    database.backup_database(tmp_path / "export" / "memories.db", restored, pages=-1)
+
+    assert integrity(restored) == "ok"
+    assert SEED_ROWS <= count_rows(restored) <= SEED_ROWS + w.commits
+    assert not list(tmp_path.glob("*.sqlite")), "snapshot left behind"
@@ -0,0 +1,89 @@
+from app import crud, models, schemas
+from app.services import version_service as version_module
+
+
+def op(kind, memory_id=None, **data):
+    return schemas.BulkMemoryOperation(op=kind, id=memory_id, data=data or None)
+
+
+def versions(db, memory_id):
+    return [v.version_no for v in db.query(models.MemoryVersion).filter(
+        models.MemoryVersion.memory_id == memory_id
+    ).order_by(models.MemoryVersion.version_no)]
+
+
+def test_invalid_items_are_skipped_and_the_rest_committed(db, add_memory):
+    memory = add_memory()
+
+    results = crud.bulk_write_memories(db, [
+        op("create", title="New one", note="Fresh memory"),
+        op("create", title="x", note="too short title"),
+        op("update", memory.id, mood="happy"),
+        op("update", None, mood="sad"),
+        op("delete", 999999),
+    ])
+
+    assert [r["success"] for r in results] == [True, False, True, False, False]
+    assert results[1]["error"]["message"] == "Validation failed"
+    assert results[3]["error"]["message"] == "id is required for update"
+    assert results[4]["error"]["message"] == "Memory not found"
+
+    db.expire_all()
+    assert db.get(models.Memory, memory.id).mood == "happy"
+    assert db.get(models.Memory, results[0]["id"]).title == "New one"
+    assert versions(db, results[0]["id"]) == [1]
+    assert versions(db, memory.id) == [1]
+
+
+def test_failed_commit_rolls_back_every_item(db, add_memory, monkeypatch):
+    memory = add_memory(mood="calm")
+
+    def broken(*args, **kwargs):
+        raise RuntimeError("disk full")
+    monkeypatch.setattr(version_module.version_service, "add_versions", broken)
+
+    results = crud.bulk_write_memories(db, [
+        op("create", title="Never saved", note="Rolled back"),
+        op("update", memory.id, mood="happy"),
+        op("update", None),
+    ])
+
+    assert not any(r["success"] for r in results)
+    assert results[0]["error"]["message"] == "Transaction rolled back"
+    assert results[1]["error"]["details"] == "disk full"
+    assert results[2]["error"]["message"] == "id is required for update"
+
+    db.expire_all()
+    assert db.get(models.Memory, memory.id).mood == "calm"
+    assert db.query(models.Memory).count() == 1
+    assert db.query(models.MemoryVersion).count() == 0
+
+
+def test_duplicate_ids_are_rejected(db, add_memory):
+    memory = add_memory()
+
+    results = crud.bulk_write_memories(db, [
+        op("update", memory.id, mood="happy"),
+        op("update", memory.id, mood="sad"),
+        op("delete", memory.id),
+    ])
+
+    assert [r["success"] for r in results] == [True, False, False]
+    assert results[1]["error"]["message"].startswith("Duplicate id in batch")
+
+    db.expire_all()
+    assert db.get(models.Memory, memory.id).mood == "happy"
+    assert versions(db, memory.id) == [1]
+
+
+def test_invalid_item_does_not_claim_its_id(db, add_memory):
+    memory = add_memory()
+
+    results = crud.bulk_write_memories(db, [
+        op("update", memory.id, title="x"),
+        op("delete", memory.id),
+    ])
+
+    assert [r["success"] for r in results] == [False, True]
+    db.expire_all()
+    assert db.get(models.Memory, memory.id) is None
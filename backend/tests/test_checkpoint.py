@@ -0,0 +1,75 @@
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app import models
+from app.database import Base
+from app.services import checkpoint_service as checkpoints
+from app.services.checkpoint_service import checkpoint_service
+from app.services.vault_service import vault_state
+
+THRESHOLD = 3
+
+
+class FakeVault:
+    def __init__(self):
+        self.calls = 0
+
+    def checkpoint(self):
+        self.calls += 1
+        return True, None
+
+
+@pytest.fixture
+def vault(db_path, monkeypatch):
+    """Unlocked vault whose app DB is the test database"""
+    fake = FakeVault()
+    monkeypatch.setattr(checkpoints, "get_database_path", lambda: str(db_path))
+    monkeypatch.setattr(checkpoints, "get_vault_service", lambda: fake)
+    monkeypatch.setattr(vault_state, "_state", "UNLOCKED")
+    monkeypatch.setattr(checkpoint_service, "write_threshold", THRESHOLD)
+    monkeypatch.setattr(checkpoint_service, "_writes", 0)
+    return fake
+
+
+def wait_for_checkpoint():
+    if checkpoint_service._pending is not None:
+        checkpoint_service._pending.result(timeout=10)
+
+
+def test_checkpoint_fires_after_threshold_commits(db, vault):
+    for i in range(THRESHOLD - 1):
+        db.add(models.Memory(title=f"Write {i}", note="", mood="neutral", tags=""))
+        db.commit()
+    wait_for_checkpoint()
+    assert vault.calls == 0
+    assert checkpoint_service.get_stats()["pending_writes"] == THRESHOLD - 1
+
+    # Read-only commits don't count
+    db.query(models.Memory).count()
+    db.commit()
+    assert checkpoint_service.get_stats()["pending_writes"] == THRESHOLD - 1
+
+    db.add(models.Memory(title="Last", note="", mood="neutral", tags=""))
+    db.commit()
+    wait_for_checkpoint()
+
+    assert vault.calls == 1
+    assert checkpoint_service.get_stats()["pending_writes"] == 0
+
+
+def test_writes_to_other_databases_are_not_counted(vault, tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'other.db'}")
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)()
+    try:
+        for i in range(THRESHOLD):
+            session.add(models.Memory(title=f"Elsewhere {i}", note="", mood="neutral", tags=""))
+            session.commit()
+    finally:
+        session.close()
+        engine.dispose()
+    wait_for_checkpoint()
+
+    assert vault.calls == 0
+    assert checkpoint_service.get_stats()["pending_writes"] == 0
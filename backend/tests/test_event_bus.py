@@ -0,0 +1,27 @@
+import asyncio
+
+from app.services.event_bus import EventBus
+
+
+def test_resync_id_precedes_events_queued_after_subscribing():
+    async def main():
+        bus = EventBus(history_size=2)
+        for i in range(5):
+            bus.publish("memory.created", {"n": i})
+
+        # Event 1 fell out of the 2-event history: a gap, with 4 and 5 replayed
+        subscriber, replay, resync_id = bus.subscribe(asyncio.get_running_loop(), last_event_id=1)
+        assert [e["id"] for e in replay] == [4, 5]
+        assert resync_id == 3
+
+        # From before a restart: nothing to replay, resume right before the next event
+        late, replay, resync_id = bus.subscribe(asyncio.get_running_loop(), last_event_id=99)
+        bus.publish("memory.updated")
+        queued = await asyncio.wait_for(late.queue.get(), 1)
+        assert replay == []
+        assert resync_id == queued["id"] - 1
+
+        _, _, resync_id = bus.subscribe(asyncio.get_running_loop(), last_event_id=5)
+        assert resync_id is None
+
+    asyncio.run(main())
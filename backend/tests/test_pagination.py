@@ -0,0 +1,35 @@
+from sqlalchemy import text
+
+from app import crud
+
+
+def test_keyset_pages_include_rows_without_created_at(db, add_memory):
+    ids = [add_memory(title=f"Memory {i}").id for i in range(7)]
+    # Legacy rows imported before created_at existed
+    db.execute(text("UPDATE memories SET created_at = NULL WHERE id IN (:a, :b, :c)"),
+               {"a": ids[1], "b": ids[4], "c": ids[5]})
+    db.commit()
+
+    seen, cursor = [], None
+    while True:
+        page, cursor = crud.get_memories_page(db, limit=2, cursor=cursor, fields=("id",))
+        seen += [row["id"] for row in page]
+        if cursor is None:
+            break
+
+    everything, _ = crud.get_memories_page(db, limit=100, fields=("id",))
+    assert seen == [row["id"] for row in everything]
+    assert sorted(seen) == sorted(ids)
+    # Dated rows first, then the undated ones
+    assert seen[-3:] == [ids[5], ids[4], ids[1]]
+
+
+def test_stream_honours_skip(db, add_memory):
+    for i in range(5):
+        add_memory(title=f"Memory {i}")
+
+    page, _ = crud.get_memories_page(db, limit=2, skip=2, fields=("id",))
+    streamed = list(crud.iter_memories(db, fields=("id",), limit=2, skip=2))
+
+    assert streamed == page
+    assert len(streamed) == 2
@@ -68,3 +68,32 @@ export const api = {
     // New: Download Helper
     download: (url) => apiRequest(url, { method: 'GET', responseType: 'blob' })
 };
+
+/**
+ * Titles for a list of memory ids, in one /memories/batch call.
+ * Missing (deleted) memories are dropped; on failure the bare ids come back.
+ * @param {number[]} ids
+ * @returns {Promise<{id: number, title: string|null}[]>}
+ */
+export async function fetchMemoryRefs(ids) {
+    if (!ids || ids.length === 0) return [];
+    try {
+        return await api.get(`/memories/batch?ids=${ids.join(',')}&fields=id,title`);
+    } catch (err) {
+        return ids.map(id => ({ id, title: null }));
+    }
+}
+
+/**
+ * Listen to the backend's Server-Sent Events feed (/events).
+ * The browser reconnects on its own and resends the last event id.
+ * @param {object} handlers - event type -> callback(data); 'resync' fires when events were missed
+ * @returns {function} close the stream
+ */
+export function subscribeEvents(handlers) {
+    const source = new EventSource(`${BASE_URL}/events`);
+    for (const [type, handler] of Object.entries(handlers)) {
+        source.addEventListener(type, (e) => handler(e.data ? JSON.parse(e.data) : null));
+    }
+    return () => source.close();
+}
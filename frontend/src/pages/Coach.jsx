@@ -1,5 +1,6 @@
 import { useState } from 'react';
 import { Brain, Send, CheckCircle, ExternalLink } from 'lucide-react';
+import { fetchMemoryRefs } from '../api/client';
 
 export default function Coach() {
     const [message, setMessage] = useState('');
@@ -30,7 +31,7 @@ export default function Coach() {
                     role: 'assistant',
                     content: data.data.reply,
                     action_plan: data.data.action_plan,
-                    memory_refs: data.data.memory_refs
+                    memory_refs: await fetchMemoryRefs(data.data.memory_refs)
                 }]);
             } else {
                 setError(data.error?.message || 'Coach unavailable');
@@ -88,13 +89,13 @@ export default function Coach() {
                                     <div className="mt-3 pt-3 border-t border-white/10">
                                         <p className="text-xs font-semibold mb-2 opacity-70">Related Memories:</p>
                                         <div className="flex flex-wrap gap-1">
-                                            {msg.memory_refs.map(id => (
+                                            {msg.memory_refs.map(ref => (
                                                 <a
-                                                    key={id}
-                                                    href={`/memory/${id}`}
+                                                    key={ref.id}
+                                                    href={`/memory/${ref.id}`}
                                                     className="px-2 py-1 bg-white/10 hover:bg-white/20 rounded text-xs flex items-center gap-1 transition-colors"
                                                 >
-                                                    #{id}
+                                                    {ref.title || `#${ref.id}`}
                                                     <ExternalLink size={10} />
                                                 </a>
                                             ))}
@@ -1,5 +1,6 @@
 import { useState, useEffect } from 'react';
 import { Upload, FolderOpen, FileText, MessageSquare, RefreshCw, CheckCircle, XCircle, Clock } from 'lucide-react';
+import { subscribeEvents } from '../api/client';
 
 export default function Import() {
     const [folderPath, setFolderPath] = useState('');
@@ -9,9 +10,17 @@ export default function Import() {
     const [error, setError] = useState('');
     const [success, setSuccess] = useState('');
     const [jobs, setJobs] = useState([]);
+    const [progress, setProgress] = useState({});
 
     useEffect(() => {
         fetchJobs();
+        // Job status and progress are pushed by the backend instead of polled
+        return subscribeEvents({
+            'import.status': () => fetchJobs(),
+            'import.progress': ({ job_id, processed, total }) =>
+                setProgress(p => ({ ...p, [job_id]: { processed, total } })),
+            'resync': () => fetchJobs()
+        });
     }, []);
 
     const fetchJobs = async () => {
@@ -320,6 +329,11 @@ export default function Import() {
                                         {job.details && (
                                             <div className="text-xs text-gray-400">{job.details}</div>
                                         )}
+                                        {job.status === 'running' && progress[job.id] && (
+                                            <div className="text-xs text-gray-400">
+                                                {progress[job.id].processed} / {progress[job.id].total}
+                                            </div>
+                                        )}
                                     </div>
                                 </div>
                                 <div className="text-xs text-gray-500">
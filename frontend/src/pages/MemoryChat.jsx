@@ -1,5 +1,5 @@
 import React, { useState, useRef, useEffect } from 'react';
-import { api } from '../api/client';
+import { api, fetchMemoryRefs } from '../api/client';
 import StatusMessage from '../components/StatusMessage';
 import { MessageSquare, Send, Bot, User, Link as LinkIcon } from 'lucide-react';
 import { Link } from 'react-router-dom';
@@ -34,7 +34,7 @@ export default function MemoryChat() {
             const botMsg = {
                 role: 'assistant',
                 text: data.reply,
-                refs: data.memory_refs || []
+                refs: await fetchMemoryRefs(data.memory_refs)
             };
             setMessages(prev => [...prev, botMsg]);
 
@@ -81,13 +81,13 @@ export default function MemoryChat() {
                                     <span className="text-xs text-indigo-300 font-semibold flex items-center gap-1">
                                         <LinkIcon size={10} /> Referenced:
                                     </span>
-                                    {msg.refs.map(refId => (
+                                    {msg.refs.map(ref => (
                                         <Link
-                                            key={refId}
-                                            to={`/memory/${refId}`}
+                                            key={ref.id}
+                                            to={`/memory/${ref.id}`}
                                             className="text-xs bg-black/20 hover:bg-black/40 px-2 py-1 rounded text-indigo-200 transition-colors"
                                         >
-                                            #{refId}
+                                            {ref.title || `#${ref.id}`}
                                         </Link>
                                     ))}
                                 </div>
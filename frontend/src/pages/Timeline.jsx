@@ -1,5 +1,5 @@
 import React, { useEffect, useState, useMemo } from 'react';
-import { api } from '../api/client';
+import { api, subscribeEvents } from '../api/client';
 import MemoryCard from '../components/MemoryCard';
 import StatusMessage from '../components/StatusMessage';
 import { Search, Filter, X } from 'lucide-react';
@@ -18,8 +18,8 @@ export default function Timeline({ month }) {
     useEffect(() => { localStorage.setItem('mylife_search', searchQuery); }, [searchQuery]);
     useEffect(() => { localStorage.setItem('mylife_mood', moodFilter); }, [moodFilter]);
 
-    async function loadMemories() {
-        setLoading(true);
+    async function loadMemories({ quiet = false } = {}) {
+        if (!quiet) setLoading(true);
         setError(null);
         try {
             const data = await api.get(`/memories/?month=${selectedMonth}`);
@@ -35,6 +35,17 @@ export default function Timeline({ month }) {
         loadMemories();
     }, [selectedMonth]);
 
+    // Reload when memories change elsewhere (imports, other windows, sync)
+    useEffect(() => {
+        const reload = () => loadMemories({ quiet: true });
+        return subscribeEvents({
+            'memory.created': reload,
+            'memory.updated': reload,
+            'memory.deleted': reload,
+            'resync': reload
+        });
+    }, [selectedMonth]);
+
     // Client-side Filtering
     const filteredMemories = useMemo(() => {
         if (!memories) return [];